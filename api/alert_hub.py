@@ -0,0 +1,53 @@
+# Built-in imports
+import json
+import asyncio
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+
+
+class AlertHub:
+    """Fan alert events pushed by inference out to Server-Sent Events clients.
+
+    Every subscriber has its own bounded queue; a client that stops reading
+    loses its oldest events instead of holding up the others.
+
+    Args:
+        max_queue (int, optional): Events buffered per subscriber. Defaults to 256.
+        keepalive (float, optional): Seconds between SSE keep-alive comments. Defaults to 15.
+    """
+
+    def __init__(self, max_queue=256, keepalive=15.0):
+        self.max_queue = max_queue
+        self.keepalive = keepalive
+        self.subscribers = set()
+
+    def publish(self, events):
+        for subscriber in self.subscribers:
+            for event in events:
+                if subscriber.full():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(event)
+
+    async def stream(self, location=None):
+        """Yield SSE messages for new alerts, optionally of one location only."""
+        subscriber = asyncio.Queue(maxsize=self.max_queue)
+        self.subscribers.add(subscriber)
+        logger.debug(f"Alert stream subscribed ({len(self.subscribers)} clients)")
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if location is not None and event.get("location") != location:
+                    continue
+                yield f"event: alert\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.subscribers.discard(subscriber)
+
+
+alert_hub = AlertHub()
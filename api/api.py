@@ -1,14 +1,29 @@
 # Built-in imports
+import os
+import hmac
+import asyncio
+import hashlib
+import ipaddress
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from typing import Generic, Literal, Optional, TypeVar
 
 # Third-party imports
 import uvicorn
-from pydantic import BaseModel
+from loguru import logger
+from pydantic import BaseModel, ConfigDict, Field
 from pymongo import MongoClient
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, Header, Request, Response, BackgroundTasks
+from fastapi.responses import JSONResponse, StreamingResponse
 
 # Local imports
-from utility import (
+from synapsis_common.log import (
+    configure_logging,
+    set_log_level,
+    get_log_level,
+    log_stats,
+)
+from synapsis_common.utility import (
     SynapsisResponse,
     get_areas,
     update_area,
@@ -17,7 +32,54 @@ from utility import (
     get_count_live,
     get_count,
     delete_area,
+    set_areas_many,
+    delete_areas_many,
+    ensure_area_indexes,
+    ensure_count_collections,
+    get_snapshot_ref,
+    get_object_range_from_minio,
+    get_heatmap,
+    ensure_heatmap_indexes,
+    ensure_alert_indexes,
+    get_alerts,
+    ensure_trajectory_indexes,
+    get_track,
+    get_tracks_in_area,
+    get_freshness,
+    describe_freshness,
+)
+from cache import response_cache
+from alert_hub import alert_hub
+from occupancy_hub import occupancy_hub
+from shared_state import shared_state
+from export import (
+    DATASETS,
+    iter_arrow_ipc,
+    run_export_job,
+    create_export_job,
+    get_export_job,
 )
+from encoding import BSONJSONResponse, dumps
+
+configure_logging()
+
+# Shared secret of the alert push endpoint; without it only loopback callers may push
+ALERTS_PUSH_TOKEN = os.getenv("ALERTS_PUSH_TOKEN", "")
+
+
+def is_cacheable(resp):
+    return not isinstance(resp, SynapsisResponse)
+
+
+def is_trusted_pusher(request: Request, authorization: Optional[str]):
+    if ALERTS_PUSH_TOKEN:
+        return authorization is not None and hmac.compare_digest(
+            authorization.encode(), f"Bearer {ALERTS_PUSH_TOKEN}".encode()
+        )
+    try:
+        return ipaddress.ip_address(request.client.host).is_loopback
+    except (AttributeError, ValueError):
+        return False
 
 
 class SetAreaRequest(BaseModel):
@@ -42,40 +104,512 @@ class DeleteAreaRequest(BaseModel):
     area_name: str
 
 
-app = FastAPI()
+class BulkSetAreaRequest(BaseModel):
+    areas: list[SetAreaRequest]
+
+
+class BulkDeleteAreaRequest(BaseModel):
+    areas: list[DeleteAreaRequest]
+
+
+# Response schemas: they document the endpoints in OpenAPI. Data endpoints
+# return BSONJSONResponse directly, so large pages are not validated by them.
+T = TypeVar("T")
+
+
+class APIResponse(BaseModel, Generic[T]):
+    status: str
+    message: str
+    data: Optional[T] = None
+
+
+class CountRecord(BaseModel):
+    id: str = Field(alias="_id")
+    location: Optional[str] = None
+    area_id: str
+    in_: int = Field(alias="in")
+    out: int
+    in_people_id: list[str]
+    out_people_id: list[str]
+    in_people_tracker_id: list[str]
+    out_people_tracker_id: list[str]
+    in_people_occurrences: dict[str, int]
+    timestamp: datetime
+    written_at: Optional[datetime] = None
+    trace_id: Optional[str] = None
+
+
+class Freshness(BaseModel):
+    captured_at: datetime
+    trace_id: Optional[str] = None
+    data_age_seconds: float
+    write_lag_seconds: Optional[float] = None
+    slo_seconds: float
+    within_slo: bool
+
+
+class LiveCountResponse(APIResponse[CountRecord]):
+    freshness: Optional[Freshness] = None
+
+
+class CountPage(BaseModel):
+    page: int
+    limit: int
+    total_in: int
+    total_out: int
+    total_records: int
+    data: list[CountRecord]
+
+
+class Area(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    location: str
+    area_name: str
+    polygon_zone: list[list[int]]
+    updated_at: Optional[datetime] = None
+
+
+class Heatmap(BaseModel):
+    location: str
+    area_id: str
+    cell: int
+    shape: list[int]
+    frames: int
+    buckets: int
+    max: int
+    data: list[list[int]]
 
 
-@app.get("/api/stats", tags=["status"])
+class Track(BaseModel):
+    tracker_id: str
+    location: str
+    start: int
+    end: int
+    area_ids: list[str]
+    points: list[list[int]]
+
+
+class TrackSummary(BaseModel):
+    tracker_id: str
+    start: int
+    end: int
+    segments: int
+    n: int
+    points: Optional[list[list[int]]] = None
+
+
+class AreaOccupancy(BaseModel):
+    area_id: str
+    area_name: str
+    occupancy: int
+
+
+class OccupancySample(BaseModel):
+    captured_at: float
+    total: int
+    areas: list[AreaOccupancy]
+
+
+class AlertEvent(BaseModel):
+    # The events emitted by the inference AlertEngine
+    model_config = ConfigDict(extra="forbid")
+
+    location: str
+    area_id: str
+    area_name: str
+    rule: str
+    status: Literal["firing", "resolved"]
+    metric: str
+    op: Literal[">=", ">", "<=", "<"]
+    threshold: float
+    value: float
+    metrics: dict[str, float]
+    epoch_ms: int
+
+
+class LiveOccupancy(OccupancySample):
+    location: str
+    age_seconds: float
+    history: Optional[list[OccupancySample]] = None
+
+
+def etag_response(request: Request, content):
+    """Return `content` as JSON with an ETag, or a 304 if the client already has it."""
+    body = dumps(content, sort_keys=True)
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+async def sync_shared_state(interval):
+    """Apply what other workers wrote to the shared state: alerts and the log level."""
+    last_id = shared_state.last_event_id()
+    while True:
+        try:
+            last_id, events = shared_state.events_after(last_id)
+            if events:
+                alert_hub.publish(events)
+            level = shared_state.get_setting("log_level")
+            if level is not None and level != get_log_level():
+                set_log_level(level)
+        except Exception as e:
+            logger.error(f"Error reading the shared API state: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_area_indexes()
+    ensure_count_collections()
+    ensure_heatmap_indexes()
+    ensure_alert_indexes()
+    ensure_trajectory_indexes()
+    occupancy_hub.start()
+    sync_task = asyncio.create_task(
+        sync_shared_state(float(os.getenv("API_STATE_POLL_INTERVAL", "0.2")))
+    )
+    yield
+    sync_task.cancel()
+    await occupancy_hub.stop()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=BSONJSONResponse)
+
+
+@app.get("/api/stats", tags=["status"], response_model=APIResponse[CountPage])
 async def fastapi_get_stats(
     start_time: str = None, end_time: str = None, page: int = 1, limit: int = 10
 ):
-    resp = get_count(start_time=start_time, end_time=end_time, page=page, limit=limit)
+    resp = response_cache.get_or_set(
+        "stats",
+        (start_time, end_time, page, limit),
+        lambda: get_count(
+            start_time=start_time, end_time=end_time, page=page, limit=limit
+        ),
+        cacheable=is_cacheable,
+    )
     if resp == SynapsisResponse.SERVER_ERROR:
         return {"status": "error", "message": "Error retrieving stats"}
     else:
-        return {
-            "status": "success",
-            "message": "Stats retrieved successfully",
-            "data": resp,
-        }
+        return BSONJSONResponse(
+            {
+                "status": "success",
+                "message": "Stats retrieved successfully",
+                "data": resp,
+            }
+        )
 
 
-@app.get("/api/stats/live", tags=["status"])
+@app.get("/api/stats/live", tags=["status"], response_model=LiveCountResponse)
 def get_latest_stats():
-    resp = get_count_live()
+    resp = response_cache.get_or_set(
+        "stats_live", (), get_count_live, cacheable=is_cacheable
+    )
     if resp == SynapsisResponse.SERVER_ERROR:
         return {"status": "error", "message": "Error retrieving latest stats"}
     else:
-        return {
+        # Computed per request: the cached count ages, its freshness must not
+        return BSONJSONResponse(
+            {
+                "status": "success",
+                "message": "Latest stats retrieved successfully",
+                "data": resp,
+                "freshness": (
+                    describe_freshness(resp) if isinstance(resp, dict) else None
+                ),
+            }
+        )
+
+
+@app.get(
+    "/api/occupancy/live",
+    tags=["status"],
+    response_model=APIResponse[list[LiveOccupancy]],
+)
+async def fastapi_get_live_occupancy(
+    location: str = None, area_id: str = None, seconds: float = None
+):
+    # From the inference feed, not the database. On the event loop, like the
+    # feed readers, so the rings are not read while they are appended to
+    return BSONJSONResponse(
+        {
+            "status": "success",
+            "message": "Live occupancy retrieved successfully",
+            "data": occupancy_hub.live(
+                location=location, area_id=area_id, seconds=seconds
+            ),
+        }
+    )
+
+
+@app.get("/api/occupancy/feeds", tags=["status"])
+async def fastapi_get_occupancy_feeds():
+    return {
+        "status": "success",
+        "message": "Occupancy feeds retrieved successfully",
+        "data": occupancy_hub.stats(),
+    }
+
+
+@app.get("/api/freshness", tags=["status"], response_model=APIResponse[list[dict]])
+def fastapi_get_freshness(location: str = None):
+    resp = get_freshness(location=location)
+    if resp == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Error retrieving freshness"}
+    return BSONJSONResponse(
+        {
+            "status": "success",
+            "message": "Freshness retrieved successfully",
+            "data": resp,
+        }
+    )
+
+
+@app.get("/api/heatmap", tags=["status"], response_model=APIResponse[Heatmap])
+def fastapi_get_heatmap(
+    location: str,
+    area_id: str = "_camera",
+    start_time: str = None,
+    end_time: str = None,
+):
+    resp = response_cache.get_or_set(
+        "heatmap",
+        (location, area_id, start_time, end_time),
+        lambda: get_heatmap(
+            location=location,
+            area_id=area_id,
+            start_time=start_time,
+            end_time=end_time,
+        ),
+        cacheable=is_cacheable,
+    )
+    if resp == SynapsisResponse.NOT_FOUND:
+        return {"status": "error", "message": "No heatmap data in range"}
+    elif resp == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Error retrieving heatmap"}
+    else:
+        return BSONJSONResponse(
+            {
+                "status": "success",
+                "message": "Heatmap retrieved successfully",
+                "data": resp,
+            }
+        )
+
+
+@app.get("/api/tracks", tags=["people"], response_model=APIResponse[list[TrackSummary]])
+def fastapi_get_tracks_in_area(
+    location: str,
+    area_id: str,
+    start_time: str = None,
+    end_time: str = None,
+    points: bool = False,
+    limit: int = 100,
+):
+    resp = get_tracks_in_area(
+        location=location,
+        area_id=area_id,
+        start_time=start_time,
+        end_time=end_time,
+        points=points,
+        limit=limit,
+    )
+    if resp == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Error retrieving tracks"}
+    return BSONJSONResponse(
+        {
             "status": "success",
-            "message": "Latest stats retrieved successfully",
+            "message": "Tracks retrieved successfully",
             "data": resp,
         }
+    )
 
 
-@app.get("/api/area", tags=["area"])
-async def fastapi_get_areas():
-    return get_areas()
+@app.get("/api/tracks/{tracker_id}", tags=["people"], response_model=APIResponse[Track])
+def fastapi_get_track(tracker_id: str, start_time: str = None, end_time: str = None):
+    resp = get_track(tracker_id, start_time=start_time, end_time=end_time)
+    if resp == SynapsisResponse.NOT_FOUND:
+        return JSONResponse(
+            status_code=404,
+            content={"status": "error", "message": "Track not found"},
+        )
+    elif resp == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Error retrieving track"}
+    return BSONJSONResponse(
+        {
+            "status": "success",
+            "message": "Track retrieved successfully",
+            "data": resp,
+        }
+    )
+
+
+@app.post("/api/alerts/push", tags=["alerts"])
+async def fastapi_push_alerts(
+    request: Request,
+    events: list[AlertEvent] = Body(..., max_length=100),
+    authorization: Optional[str] = Header(default=None),
+):
+    if not is_trusted_pusher(request, authorization):
+        return JSONResponse(
+            status_code=401,
+            content={"status": "error", "message": SynapsisResponse.UNAUTHORIZED.value},
+        )
+    # Every worker forwards the events to its own stream clients
+    shared_state.append_events([event.model_dump() for event in events])
+    return {
+        "status": "success",
+        "message": "Alerts published",
+        "data": {"events": len(events)},
+    }
+
+
+@app.get("/api/alerts/stream", tags=["alerts"])
+async def fastapi_stream_alerts(location: str = None):
+    return StreamingResponse(
+        alert_hub.stream(location=location),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/alerts", tags=["alerts"], response_model=APIResponse[list[dict]])
+def fastapi_get_alerts(
+    location: str = None,
+    area_id: str = None,
+    status: str = None,
+    start_time: str = None,
+    end_time: str = None,
+    limit: int = 100,
+):
+    resp = get_alerts(
+        location=location,
+        area_id=area_id,
+        status=status,
+        start_time=start_time,
+        end_time=end_time,
+        limit=limit,
+    )
+    if resp == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Error retrieving alerts"}
+    return BSONJSONResponse(
+        {
+            "status": "success",
+            "message": "Alerts retrieved successfully",
+            "data": resp,
+        }
+    )
+
+
+@app.get("/api/export/{dataset}", tags=["export"])
+def fastapi_export_arrow(dataset: str, start_time: str = None, end_time: str = None):
+    if dataset not in DATASETS:
+        return JSONResponse(
+            status_code=404, content={"status": "error", "message": "Unknown dataset"}
+        )
+    return StreamingResponse(
+        iter_arrow_ipc(dataset, start_time=start_time, end_time=end_time),
+        media_type="application/vnd.apache.arrow.stream",
+    )
+
+
+@app.post("/api/export/{dataset}/parquet", tags=["export"])
+async def fastapi_export_parquet(
+    dataset: str,
+    background_tasks: BackgroundTasks,
+    start_time: str = None,
+    end_time: str = None,
+):
+    if dataset not in DATASETS:
+        return JSONResponse(
+            status_code=404, content={"status": "error", "message": "Unknown dataset"}
+        )
+    job_id = create_export_job(dataset)
+    background_tasks.add_task(run_export_job, job_id, dataset, start_time, end_time)
+    return {
+        "status": "success",
+        "message": "Export job queued",
+        "data": {"job_id": job_id},
+    }
+
+
+@app.get("/api/export/jobs/{job_id}", tags=["export"])
+async def fastapi_get_export_job(job_id: str):
+    job = get_export_job(job_id)
+    if job is None:
+        return {"status": "error", "message": "Export job not found"}
+    return {"status": "success", "message": "Export job retrieved", "data": job}
+
+
+@app.get("/api/snapshot/{tracker_id}", tags=["people"])
+def fastapi_get_snapshot(tracker_id: str):
+    ref = response_cache.get_or_set(
+        "snapshot",
+        (tracker_id,),
+        lambda: get_snapshot_ref(tracker_id),
+        cacheable=is_cacheable,
+    )
+    if ref == SynapsisResponse.NOT_FOUND:
+        return JSONResponse(
+            status_code=404,
+            content={"status": "error", "message": "Snapshot not found"},
+        )
+    if ref == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Error retrieving snapshot"}
+
+    data = get_object_range_from_minio(ref["object"], ref["offset"], ref["length"])
+    if data == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Error retrieving snapshot"}
+    return Response(content=data, media_type="image/jpeg")
+
+
+@app.get("/api/area", tags=["area"], response_model=list[Area])
+async def fastapi_get_areas(request: Request, location: str = None, fields: str = None):
+    areas = response_cache.get_or_set(
+        "area",
+        ("list", location, fields),
+        lambda: get_areas(
+            location=location, fields=fields.split(",") if fields else None
+        ),
+    )
+    return etag_response(request, areas)
+
+
+@app.get("/api/cache/stats", tags=["status"])
+async def fastapi_get_cache_stats():
+    return {
+        "status": "success",
+        "message": "Cache stats retrieved successfully",
+        "data": response_cache.stats(),
+    }
+
+
+@app.get("/api/logging", tags=["status"])
+async def fastapi_get_logging():
+    return {
+        "status": "success",
+        "message": "Logging stats retrieved successfully",
+        "data": log_stats(),
+    }
+
+
+@app.put("/api/logging", tags=["status"])
+async def fastapi_set_log_level(level: str):
+    # Applied here at once, and by the other workers on their next state sync
+    try:
+        set_log_level(level)
+        shared_state.set_setting("log_level", level.upper())
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "message": str(e)},
+        )
+    return {
+        "status": "success",
+        "message": f"Log level set to {level.upper()}",
+        "data": log_stats(),
+    }
 
 
 @app.post("/api/set/area", tags=["area"])
@@ -85,6 +619,7 @@ async def fastapi_set_area(request: SetAreaRequest = Body(...)):
         area_name=request.area_name,
         polygon_zone=request.polygon_zone,
     )
+    response_cache.invalidate("area")
 
     if resp == SynapsisResponse.SUCCESS:
         return {"status": "success", "message": "Area set/updated successfully"}
@@ -94,24 +629,27 @@ async def fastapi_set_area(request: SetAreaRequest = Body(...)):
         return {"status": "error", "message": "Area set/update failed"}
 
 
-@app.post("/api/get/area", tags=["area"])
+@app.post("/api/get/area", tags=["area"], response_model=APIResponse[Area])
 async def fastapi_get_area(request: GetAreaRequest = Body(...)):
-    resp = get_area(
-        location=request.location,
-        area_name=request.area_name,
+    resp = response_cache.get_or_set(
+        "area",
+        ("one", request.location, request.area_name),
+        lambda: get_area(location=request.location, area_name=request.area_name),
+        cacheable=is_cacheable,
     )
-    resp["_id"] = str(resp["_id"])  # Cannot parse ObjectId to JSON directly
 
     if resp == SynapsisResponse.SERVER_ERROR:
         return {"status": "error", "message": "Get area failed"}
     elif resp == SynapsisResponse.NOT_FOUND:
         return {"status": "error", "message": "Area not found"}
     else:
-        return {
-            "status": "success",
-            "message": "Area retrieved successfully",
-            "data": resp,
-        }
+        return BSONJSONResponse(
+            {
+                "status": "success",
+                "message": "Area retrieved successfully",
+                "data": resp,
+            }
+        )
 
 
 @app.post("/api/update/area", tags=["area"])
@@ -121,6 +659,7 @@ async def fastapi_update_area(request: UpdateAreaRequest = Body(...)):
         area_name=request.area_name,
         polygon_zone=request.polygon_zone,
     )
+    response_cache.invalidate("area")
 
     if resp == SynapsisResponse.SUCCESS:
         return {"status": "success", "message": "Area set/updated successfully"}
@@ -133,6 +672,7 @@ async def fastapi_update_area(request: UpdateAreaRequest = Body(...)):
 @app.post("/api/delete/area", tags=["area"])
 async def fastapi_delete_area(request: DeleteAreaRequest = Body(...)):
     resp = delete_area(location=request.location, area_name=request.area_name)
+    response_cache.invalidate("area")
 
     if resp == SynapsisResponse.SUCCESS:
         return {"status": "success", "message": "Area deleted successfully"}
@@ -142,5 +682,50 @@ async def fastapi_delete_area(request: DeleteAreaRequest = Body(...)):
         return {"status": "error", "message": "Area deletion failed"}
 
 
+@app.post("/api/bulk/set/area", tags=["area"])
+async def fastapi_bulk_set_area(request: BulkSetAreaRequest = Body(...)):
+    resp = set_areas_many([area.model_dump() for area in request.areas])
+    response_cache.invalidate("area")
+
+    if resp == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Bulk area set/update failed"}
+    return {
+        "status": "success",
+        "message": "Areas set/updated successfully",
+        "data": resp,
+    }
+
+
+@app.post("/api/bulk/delete/area", tags=["area"])
+async def fastapi_bulk_delete_area(request: BulkDeleteAreaRequest = Body(...)):
+    resp = delete_areas_many([area.model_dump() for area in request.areas])
+    response_cache.invalidate("area")
+
+    if resp == SynapsisResponse.SERVER_ERROR:
+        return {"status": "error", "message": "Bulk area deletion failed"}
+    return {
+        "status": "success",
+        "message": "Areas deleted successfully",
+        "data": resp,
+    }
+
+
 if __name__ == "__main__":
-    uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+    API_RELOAD = os.getenv("API_RELOAD", "False") == "True"
+    # Alert events, export jobs and the log level of the previous run are stale
+    shared_state.reset()
+    if API_WORKERS > 1 and not API_RELOAD and not response_cache.shared_path:
+        logger.info(
+            f"Serving with {API_WORKERS} workers: the response cache is per "
+            "worker unless API_CACHE_SHARED_PATH is set"
+        )
+    uvicorn.run(
+        "api:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=1 if API_RELOAD else API_WORKERS,
+        reload=API_RELOAD,
+        access_log=os.getenv("API_ACCESS_LOG", "False") == "True",
+        timeout_keep_alive=int(os.getenv("API_KEEP_ALIVE", "5")),
+    )
@@ -0,0 +1,614 @@
+# Built-in imports
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+# Third-party imports
+import numpy as np
+import urllib3
+from bson import ObjectId
+from loguru import logger
+
+# Local imports
+from synapsis_common.clients import MONGODB_DATABASE
+from synapsis_common.utility import (
+    mo_synapsis_db,
+    mo_synapsis_areas,
+    mo_synapsis_people,
+    mo_synapsis_counts_ts,
+    mo_synapsis_count_people,
+    mo_synapsis_trajectories,
+    ensure_area_indexes,
+    ensure_count_collections,
+    ensure_trajectory_indexes,
+    encode_trajectory,
+    COUNTS_RETENTION_DAYS,
+    PEOPLE_RETENTION_DAYS,
+    TRAJECTORY_RETENTION_DAYS,
+)
+
+# ============================================================
+# SEED
+
+
+def _seed_areas(locations, areas_per_location, rng):
+    areas = []
+    for loc in range(locations):
+        for area in range(areas_per_location):
+            x, y = rng.integers(0, 1500), rng.integers(0, 800)
+            areas.append(
+                {
+                    "location": f"bench_location_{loc}",
+                    "area_name": f"area_{area}",
+                    "polygon_zone": [
+                        [int(x), int(y)],
+                        [int(x) + 400, int(y)],
+                        [int(x) + 400, int(y) + 250],
+                        [int(x), int(y) + 250],
+                    ],
+                    "updated_at": datetime.now(timezone.utc),
+                }
+            )
+    mo_synapsis_areas.delete_many({"location": {"$regex": "^bench_location_"}})
+    mo_synapsis_areas.insert_many(areas)
+    return areas
+
+
+def _trajectory_documents(
+    location, tracker_ids, boxes, areas_of, timestamp, seconds, rng
+):
+    """One segment per track over the `seconds` before a capture, one point per second."""
+    end_ms = int(timestamp.timestamp() * 1000)
+    times = end_ms - 1000 * np.arange(int(seconds), -1, -1)
+    segments, seen = [], set()
+    for tracker_id, (x1, _, x2, y2) in zip(tracker_ids, boxes):
+        if tracker_id in seen:
+            continue
+        seen.add(tracker_id)
+        steps = rng.integers(-8, 9, size=(len(times), 2))
+        steps[-1] = 0
+        # Walk backwards from the capture's anchor point
+        points = np.array([(x1 + x2) // 2, y2]) + np.cumsum(steps[::-1], axis=0)[::-1]
+        segments.append(
+            {
+                "location": location,
+                "tracker_id": tracker_id,
+                "area_ids": sorted(areas_of.get(tracker_id, ())),
+                **encode_trajectory(times, points),
+            }
+        )
+    return segments
+
+
+def _capture_documents(location, area_ids, timestamp, n_people, capture_index, rng):
+    """One capture of a location: its people and one count per area, as written by inference."""
+    # Tracks live for ~10 captures, so tracker IDs repeat like real ones
+    track_base = capture_index // 10 * 10
+    tracker_ids = [
+        f"1758507330123_{t}"
+        for t in rng.integers(track_base, track_base + 40, n_people)
+    ]
+    people_ids = [ObjectId() for _ in range(n_people)]
+    xy = rng.integers(0, [1800, 900], size=(n_people, 2))
+    wh = rng.integers([20, 60], [120, 300], size=(n_people, 2))
+    boxes = np.hstack([xy, xy + wh]).tolist()
+    conf = rng.uniform(0.45, 0.99, n_people).round(3).tolist()
+    people = [
+        {
+            "_id": people_ids[i],
+            "location": location,
+            "conf": conf[i],
+            "bbox": boxes[i],
+            "tracker_id": tracker_ids[i],
+            "snapshot": None,
+            "timestamp": timestamp,
+        }
+        for i in range(n_people)
+    ]
+    counts, refs, areas_of = [], [], {}
+    for area_id in area_ids:
+        inside = rng.random(n_people) < 0.5
+        count_id = ObjectId()
+        in_ids = [t for t, m in zip(tracker_ids, inside) if m]
+        for tracker_id in in_ids:
+            areas_of.setdefault(tracker_id, set()).add(area_id)
+        counts.append(
+            {
+                "_id": count_id,
+                "timestamp": timestamp,
+                "meta": {"location": location, "area_id": area_id},
+                "in": int(inside.sum()),
+                "out": int(n_people - inside.sum()),
+            }
+        )
+        refs.append(
+            {
+                "_id": count_id,
+                "timestamp": timestamp,
+                "in_people_id": [p for p, m in zip(people_ids, inside) if m],
+                "out_people_id": [p for p, m in zip(people_ids, inside) if not m],
+                "in_people_tracker_id": in_ids,
+                "out_people_tracker_id": [
+                    t for t, m in zip(tracker_ids, inside) if not m
+                ],
+                "in_people_occurrences": {t: int(rng.integers(1, 6)) for t in in_ids},
+            }
+        )
+    return people, counts, refs, areas_of, boxes, tracker_ids
+
+
+def seed(
+    locations=6,
+    areas_per_location=2,
+    days=365,
+    capture_interval=60,
+    people_mean=3.0,
+    batch_size=5000,
+    threads=4,
+    random_seed=0,
+):
+    """Fill the bench database with a synthetic history shaped like data-schema/*.json.
+
+    Volumes: counts = locations x areas_per_location x days x 86400 / capture_interval,
+    people ~= counts / areas_per_location x people_mean, and one trajectory
+    segment per track and capture with a point per second of `capture_interval`.
+    """
+    if MONGODB_DATABASE == "synapsis":
+        raise SystemExit("Refusing to seed `synapsis`; set MONGODB_DATABASE")
+    if (
+        min(COUNTS_RETENTION_DAYS, PEOPLE_RETENTION_DAYS, TRAJECTORY_RETENTION_DAYS)
+        <= days
+    ):
+        raise SystemExit(
+            "COUNTS_, PEOPLE_ and TRAJECTORY_RETENTION_DAYS must exceed --days, "
+            "for the seeder and the API, or the TTL monitor deletes the history"
+        )
+    ensure_area_indexes()
+    ensure_count_collections()
+    ensure_trajectory_indexes()
+    rng = np.random.default_rng(random_seed)
+    areas = _seed_areas(locations, areas_per_location, rng)
+    area_ids = {}
+    for area in areas:
+        area_ids.setdefault(area["location"], []).append(str(area["_id"]))
+
+    end = datetime.now(timezone.utc)
+    captures = int(days * 86400 / capture_interval)
+    start = end - timedelta(seconds=captures * capture_interval)
+    totals = {"people": 0, "counts": 0, "trajectories": 0}
+    in_flight = threading.BoundedSemaphore(threads * 2)
+    started = time.perf_counter()
+
+    def insert(collection, docs):
+        try:
+            if docs:
+                collection.insert_many(docs, ordered=False)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        batch = {"people": [], "counts": [], "refs": [], "trajectories": []}
+
+        def flush():
+            for key, collection in (
+                ("people", mo_synapsis_people),
+                ("counts", mo_synapsis_counts_ts),
+                ("refs", mo_synapsis_count_people),
+                ("trajectories", mo_synapsis_trajectories),
+            ):
+                in_flight.acquire()
+                executor.submit(insert, collection, batch[key])
+            totals["people"] += len(batch["people"])
+            totals["counts"] += len(batch["counts"])
+            totals["trajectories"] += len(batch["trajectories"])
+            batch.update(people=[], counts=[], refs=[], trajectories=[])
+
+        for capture_index in range(captures):
+            timestamp = start + timedelta(seconds=capture_index * capture_interval)
+            for location, ids in area_ids.items():
+                people, counts, refs, areas_of, boxes, tracker_ids = _capture_documents(
+                    location,
+                    ids,
+                    timestamp,
+                    int(rng.poisson(people_mean)),
+                    capture_index,
+                    rng,
+                )
+                batch["people"] += people
+                batch["counts"] += counts
+                batch["refs"] += refs
+                batch["trajectories"] += _trajectory_documents(
+                    location,
+                    tracker_ids,
+                    boxes,
+                    areas_of,
+                    timestamp,
+                    min(capture_interval, 120),
+                    rng,
+                )
+            if len(batch["people"]) + len(batch["counts"]) >= batch_size:
+                flush()
+            if capture_index and capture_index % 10000 == 0:
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Seeded {capture_index}/{captures} captures: {totals['counts']} counts, "
+                    f"{totals['people']} people ({totals['counts'] / elapsed:.0f} counts/s)"
+                )
+        flush()
+
+    logger.info(
+        f"Seeded {len(areas)} areas, {totals['counts']} counts and {totals['people']} "
+        f"people over {days} days in {time.perf_counter() - started:.0f}s"
+    )
+    return {"areas": len(areas), **totals, "start": start.isoformat()}
+
+
+# ============================================================
+# LOAD
+
+
+def load_context():
+    """Seeded time range and areas the request generators pick from."""
+    first = mo_synapsis_counts_ts.find_one(sort=[("timestamp", 1)])
+    last = mo_synapsis_counts_ts.find_one(sort=[("timestamp", -1)])
+    if first is None:
+        raise SystemExit("No counts in the bench database; run `seed` first")
+    areas = list(mo_synapsis_areas.find({}, {"location": 1, "area_name": 1}))
+    return {
+        "start": int(first["timestamp"].replace(tzinfo=timezone.utc).timestamp()),
+        "end": int(last["timestamp"].replace(tzinfo=timezone.utc).timestamp()),
+        "areas": [
+            {"location": a["location"], "area_name": a["area_name"]} for a in areas
+        ],
+        "area_ids": [(a["location"], str(a["_id"])) for a in areas],
+        "tracks": [
+            doc["tracker_id"]
+            for doc in mo_synapsis_trajectories.aggregate(
+                [{"$sample": {"size": 1000}}, {"$project": {"tracker_id": 1}}]
+            )
+        ],
+    }
+
+
+def _stats_range(ctx, span):
+    start = random.randint(ctx["start"], max(ctx["start"], ctx["end"] - span))
+    return start, start + span
+
+
+# Each endpoint returns (method, path, JSON body) for one randomised request
+ENDPOINTS = {
+    "stats_last_hour": lambda ctx: (
+        "GET",
+        "/api/stats?start_time={}&end_time={}&limit=10".format(
+            *_stats_range(ctx, 3600)
+        ),
+        None,
+    ),
+    "stats_one_day": lambda ctx: (
+        "GET",
+        "/api/stats?start_time={}&end_time={}&limit=100".format(
+            *_stats_range(ctx, 86400)
+        ),
+        None,
+    ),
+    "stats_deep_page": lambda ctx: (
+        "GET",
+        f"/api/stats?page={random.randint(1, 1000)}&limit=10",
+        None,
+    ),
+    "stats_limit_1000": lambda ctx: ("GET", "/api/stats?limit=1000", None),
+    "stats_live": lambda ctx: ("GET", "/api/stats/live", None),
+    "area_list": lambda ctx: ("GET", "/api/area", None),
+    "area_get": lambda ctx: ("POST", "/api/get/area", random.choice(ctx["areas"])),
+    "track_get": lambda ctx: (
+        "GET",
+        f"/api/tracks/{random.choice(ctx['tracks'])}",
+        None,
+    ),
+    "tracks_in_area": lambda ctx: (
+        "GET",
+        "/api/tracks?location={}&area_id={}&start_time={}&end_time={}&points=true".format(
+            *random.choice(ctx["area_ids"]), *_stats_range(ctx, 3600)
+        ),
+        None,
+    ),
+}
+TRACK_ENDPOINTS = ("track_get", "tracks_in_area")
+
+
+def collection_sizes():
+    """Document count and bytes of the people samples and the trajectories."""
+    sizes = {}
+    for collection in (mo_synapsis_people, mo_synapsis_trajectories):
+        stats = mo_synapsis_db.command("collStats", collection.name)
+        sizes[collection.name] = {
+            "count": stats.get("count", 0),
+            "avg_obj_bytes": stats.get("avgObjSize", 0),
+            "data_bytes": stats.get("size", 0),
+            "storage_bytes": stats.get("storageSize", 0),
+            "index_bytes": stats.get("totalIndexSize", 0),
+        }
+    return sizes
+
+
+def _request(http, base_url, method, path, body):
+    response = http.request(
+        method,
+        f"{base_url}{path}",
+        body=None if body is None else json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    return response.status == 200 and b'"status":"error"' not in response.data
+
+
+def _percentile(cuts, p):
+    return cuts[p - 1] * 1000 if cuts else None
+
+
+def run_endpoint(base_url, name, ctx, concurrency, duration):
+    """Drive one endpoint with `concurrency` clients for `duration` seconds."""
+    http = urllib3.PoolManager(maxsize=concurrency, block=True, retries=False)
+    make_request = ENDPOINTS[name]
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client():
+        local, local_errors = [], 0
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(ctx)
+            started = time.perf_counter()
+            try:
+                ok = _request(http, base_url, method, path, body)
+            except Exception:
+                ok = False
+            local.append(time.perf_counter() - started)
+            local_errors += not ok
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    result = {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(cuts, 50),
+        "p95_ms": _percentile(cuts, 95),
+        "p99_ms": _percentile(cuts, 99),
+    }
+    logger.info(
+        f"{name}: {result['rps']:.1f} req/s, p50 {result['p50_ms']:.1f} ms, "
+        f"p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+        f"{result['errors']} errors"
+    )
+    return result
+
+
+def capture_plans(base_url, name, ctx, requests=5):
+    """Profile a few requests of an endpoint and summarise the Mongo plans they used."""
+    http = urllib3.PoolManager(retries=False)
+    since = datetime.now(timezone.utc)
+    mo_synapsis_db.command("profile", 2)
+    try:
+        for _ in range(requests):
+            _request(http, base_url, *ENDPOINTS[name](ctx))
+    finally:
+        mo_synapsis_db.command("profile", 0)
+
+    plans = {}
+    for op in mo_synapsis_db["system.profile"].find({"ts": {"$gte": since}}):
+        if op["ns"].endswith(".system.profile"):
+            continue
+        key = (op["ns"].split(".", 1)[1], op["op"], op.get("planSummary", ""))
+        plan = plans.setdefault(
+            key,
+            {
+                "collection": key[0],
+                "op": key[1],
+                "plan": key[2],
+                "calls": 0,
+                "max_keys_examined": 0,
+                "max_docs_examined": 0,
+                "max_returned": 0,
+                "max_ms": 0,
+            },
+        )
+        plan["calls"] += 1
+        plan["max_keys_examined"] = max(
+            plan["max_keys_examined"], op.get("keysExamined", 0)
+        )
+        plan["max_docs_examined"] = max(
+            plan["max_docs_examined"], op.get("docsExamined", 0)
+        )
+        plan["max_returned"] = max(plan["max_returned"], op.get("nreturned", 0))
+        plan["max_ms"] = max(plan["max_ms"], op.get("millis", 0))
+    for plan in plans.values():
+        if "COLLSCAN" in plan["plan"]:
+            logger.warning(f"{name}: collection scan on {plan['collection']}")
+    return list(plans.values())
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _spawn_api(port, workers):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "api:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=os.environ.copy(),
+    )
+    http = urllib3.PoolManager(retries=False)
+    for _ in range(100):
+        try:
+            if http.request("GET", f"http://127.0.0.1:{port}/api/area").status == 200:
+                return process
+        except Exception:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("API did not start")
+
+
+def compare(results, baseline, max_regression):
+    """Endpoints whose p95 or throughput regressed beyond `max_regression`."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or not current["p95_ms"] or not previous["p95_ms"]:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms"
+            )
+        if current["rps"] < previous["rps"] / (1 + max_regression):
+            regressions.append(
+                f"{name}: {previous['rps']:.1f} -> {current['rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def run(
+    base_url,
+    endpoints,
+    concurrency,
+    duration,
+    output=None,
+    baseline=None,
+    max_regression=0.2,
+):
+    ctx = load_context()
+    results = {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": MONGODB_DATABASE,
+        "volumes": {
+            "areas": mo_synapsis_areas.estimated_document_count(),
+            "people": mo_synapsis_people.estimated_document_count(),
+            "count_people": mo_synapsis_count_people.estimated_document_count(),
+        },
+        "storage": collection_sizes(),
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "endpoints": {},
+    }
+    for name in endpoints:
+        if name in TRACK_ENDPOINTS and not ctx["tracks"]:
+            logger.warning(f"{name}: no trajectories seeded, skipping")
+            continue
+        plans = capture_plans(base_url, name, ctx)
+        result = run_endpoint(base_url, name, ctx, concurrency, duration)
+        results["endpoints"][name] = {**result, "plans": plans}
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to {output}")
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), max_regression)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+    return results
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(
+        description="Seed a bench database and load-test the API against it."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = sub.add_parser("seed", help="Insert synthetic areas/people/counts")
+    seed_parser.add_argument("--locations", type=int, default=6)
+    seed_parser.add_argument("--areas-per-location", type=int, default=2)
+    seed_parser.add_argument("--days", type=int, default=365)
+    seed_parser.add_argument("--capture-interval", type=float, default=60)
+    seed_parser.add_argument("--people-mean", type=float, default=3.0)
+    seed_parser.add_argument("--batch-size", type=int, default=5000)
+    seed_parser.add_argument("--threads", type=int, default=4)
+
+    run_parser = sub.add_parser("run", help="Drive the API and report latencies")
+    run_parser.add_argument("--base-url", default=None)
+    run_parser.add_argument(
+        "--spawn-api",
+        type=int,
+        default=0,
+        metavar="WORKERS",
+        help="Start the API on --port with this many workers",
+    )
+    run_parser.add_argument("--port", type=int, default=8765)
+    run_parser.add_argument(
+        "--endpoints", nargs="+", default=list(ENDPOINTS), choices=list(ENDPOINTS)
+    )
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--duration", type=float, default=20)
+    run_parser.add_argument("--output", default=None, help="Write results as JSON")
+    run_parser.add_argument(
+        "--baseline", default=None, help="Fail on regressions against this results JSON"
+    )
+    run_parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        seed(
+            locations=args.locations,
+            areas_per_location=args.areas_per_location,
+            days=args.days,
+            capture_interval=args.capture_interval,
+            people_mean=args.people_mean,
+            batch_size=args.batch_size,
+            threads=args.threads,
+        )
+    else:
+        api = _spawn_api(args.port, args.spawn_api) if args.spawn_api else None
+        try:
+            run(
+                args.base_url or f"http://127.0.0.1:{args.port}",
+                args.endpoints,
+                args.concurrency,
+                args.duration,
+                output=args.output,
+                baseline=args.baseline,
+                max_regression=args.max_regression,
+            )
+        finally:
+            if api is not None:
+                api.terminate()
@@ -0,0 +1,187 @@
+# Built-in imports
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+
+
+class ResponseCache:
+    """Size-bounded LRU cache with per-namespace TTLs for API responses.
+
+    Entries are grouped by namespace (one per endpoint family, e.g. "area") so
+    a mutation can invalidate everything derived from it at once.
+
+    When `shared_path` is given, entries and namespace generations are also kept
+    in a local SQLite file, so every uvicorn worker on the machine sees the
+    same entries and the same invalidations. The in-process LRU stays in front
+    of it as the first level.
+
+    Args:
+        ttls (dict): Namespace to time-to-live in seconds.
+        max_entries (int, optional): In-process LRU capacity. Defaults to 1024.
+        shared_path (str, optional): SQLite file for the shared level. Defaults to None.
+    """
+
+    def __init__(self, ttls, max_entries=1024, shared_path=None):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.shared_path = shared_path
+        self._entries = OrderedDict()
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        if shared_path:
+            self._init_shared()
+
+    # -------------------- shared level --------------------
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_shared(self):
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, expires_at REAL, value BLOB)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations "
+            "(namespace TEXT PRIMARY KEY, generation INTEGER)"
+        )
+        logger.info(f"Shared response cache at {self.shared_path}")
+
+    def _generation(self, namespace):
+        if not self.shared_path:
+            return self._generations[namespace]
+        row = (
+            self._connection()
+            .execute(
+                "SELECT generation FROM generations WHERE namespace = ?", (namespace,)
+            )
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    # -------------------- public API --------------------
+
+    def get_or_set(self, namespace, key, loader, cacheable=lambda value: True):
+        """Return the cached value for `key`, calling `loader()` on a miss.
+
+        Args:
+            namespace (str): Endpoint family, selects the TTL.
+            key (tuple): Hashable request parameters.
+            loader (callable): Produces the value on a miss.
+            cacheable (callable, optional): Predicate; values it rejects (e.g.
+                error responses) are returned but not stored.
+        """
+        now = time.monotonic()
+        full_key = repr((namespace, self._generation(namespace), key))
+
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(full_key)
+                self.hits[namespace] += 1
+                return entry[1]
+
+        if self.shared_path:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT expires_at, value FROM entries WHERE key = ?", (full_key,)
+                )
+                .fetchone()
+            )
+            if row is not None and row[0] > time.time():
+                value = pickle.loads(row[1])
+                self._store_local(full_key, now + (row[0] - time.time()), value)
+                with self._lock:
+                    self.hits[namespace] += 1
+                return value
+
+        with self._lock:
+            self.misses[namespace] += 1
+        value = loader()
+        if not cacheable(value):
+            return value
+
+        ttl = self.ttls.get(namespace, 0)
+        self._store_local(full_key, now + ttl, value)
+        if self.shared_path:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (key, expires_at, value) VALUES (?, ?, ?)",
+                (full_key, time.time() + ttl, pickle.dumps(value)),
+            )
+        return value
+
+    def _store_local(self, full_key, expires_at, value):
+        with self._lock:
+            self._entries[full_key] = (expires_at, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace):
+        """Drop every entry of a namespace (in this worker and the shared level)."""
+        with self._lock:
+            self._generations[namespace] += 1
+            prefix = repr((namespace,))[:-2]
+            for full_key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[full_key]
+        if self.shared_path:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO generations (namespace, generation) VALUES (?, 1) "
+                "ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1",
+                (namespace,),
+            )
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+        logger.debug(f"Response cache invalidated: {namespace}")
+
+    def stats(self):
+        """Hit/miss counters per namespace for this worker."""
+        with self._lock:
+            namespaces = sorted(set(self.hits) | set(self.misses))
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "shared": bool(self.shared_path),
+                "namespaces": {
+                    ns: {
+                        "ttl": self.ttls.get(ns, 0),
+                        "hits": self.hits[ns],
+                        "misses": self.misses[ns],
+                        "hit_ratio": self.hits[ns]
+                        / max(self.hits[ns] + self.misses[ns], 1),
+                    }
+                    for ns in namespaces
+                },
+            }
+
+
+response_cache = ResponseCache(
+    ttls={
+        "area": float(os.getenv("API_CACHE_TTL_AREA", "60")),
+        "stats": float(os.getenv("API_CACHE_TTL_STATS", "5")),
+        "stats_live": float(os.getenv("API_CACHE_TTL_STATS_LIVE", "1")),
+        "snapshot": float(os.getenv("API_CACHE_TTL_SNAPSHOT", "300")),
+        "heatmap": float(os.getenv("API_CACHE_TTL_HEATMAP", "60")),
+    },
+    max_entries=int(os.getenv("API_CACHE_MAX_ENTRIES", "1024")),
+    shared_path=os.getenv("API_CACHE_SHARED_PATH") or None,
+)
@@ -0,0 +1,50 @@
+# Built-in imports
+import base64
+from decimal import Decimal
+
+# Third-party imports
+import orjson
+from bson import ObjectId, Decimal128
+from fastapi.responses import JSONResponse
+
+# Local imports
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def bson_default(obj):
+    """Encode the BSON and Python types orjson does not handle natively.
+
+    datetime, numpy arrays/scalars, dataclasses and UUIDs are encoded by
+    orjson itself; datetimes keep the `isoformat()` shape of the stdlib encoder.
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return float(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        # bson.Binary is a bytes subclass
+        return base64.b64encode(obj).decode()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content, sort_keys=False):
+    """Serialise `content`, including Mongo documents as returned by pymongo, to JSON bytes."""
+    option = OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else OPTIONS
+    return orjson.dumps(content, default=bson_default, option=option)
+
+
+class BSONJSONResponse(JSONResponse):
+    """JSON response rendered with orjson and the BSON encoders above.
+
+    Returned directly from a handler, it also skips FastAPI's
+    `jsonable_encoder` pass and any `response_model` validation, so the
+    declared schemas only document the response.
+    """
+
+    def render(self, content):
+        return dumps(content)
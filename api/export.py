@@ -0,0 +1,252 @@
+# Built-in imports
+import os
+import sys
+import uuid
+import argparse
+import tempfile
+from io import BytesIO
+
+# Third-party imports
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from loguru import logger
+
+# Local imports
+from synapsis_common.utility import (
+    SynapsisResponse,
+    iter_counts,
+    iter_people,
+    get_timestamp,
+    upload_file_to_minio,
+)
+from shared_state import shared_state
+
+COUNTS_SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("location", pa.string()),
+        ("area_id", pa.string()),
+        ("in", pa.int32()),
+        ("out", pa.int32()),
+        ("count_id", pa.string()),
+    ]
+)
+
+PEOPLE_SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("location", pa.string()),
+        ("tracker_id", pa.string()),
+        ("conf", pa.float32()),
+        ("x1", pa.int32()),
+        ("y1", pa.int32()),
+        ("x2", pa.int32()),
+        ("y2", pa.int32()),
+        ("snapshot_object", pa.string()),
+        ("snapshot_offset", pa.int64()),
+        ("snapshot_length", pa.int32()),
+        ("people_id", pa.string()),
+    ]
+)
+
+
+def counts_to_batch(docs):
+    """Convert `counts_ts` documents to an Arrow record batch."""
+    return pa.RecordBatch.from_pydict(
+        {
+            "timestamp": [d["timestamp"] for d in docs],
+            "location": [d["meta"].get("location") for d in docs],
+            "area_id": [d["meta"].get("area_id") for d in docs],
+            "in": [d.get("in", 0) for d in docs],
+            "out": [d.get("out", 0) for d in docs],
+            "count_id": [str(d["_id"]) for d in docs],
+        },
+        schema=COUNTS_SCHEMA,
+    )
+
+
+def people_to_batch(docs):
+    """Convert people documents to an Arrow record batch."""
+    boxes = [d.get("bbox") or [None] * 4 for d in docs]
+    snapshots = [
+        d.get("snapshot") if isinstance(d.get("snapshot"), dict) else {} for d in docs
+    ]
+    return pa.RecordBatch.from_pydict(
+        {
+            "timestamp": [d["timestamp"] for d in docs],
+            "location": [d.get("location") for d in docs],
+            "tracker_id": [d.get("tracker_id") for d in docs],
+            "conf": [d.get("conf") for d in docs],
+            "x1": [b[0] for b in boxes],
+            "y1": [b[1] for b in boxes],
+            "x2": [b[2] for b in boxes],
+            "y2": [b[3] for b in boxes],
+            "snapshot_object": [s.get("object") for s in snapshots],
+            "snapshot_offset": [s.get("offset") for s in snapshots],
+            "snapshot_length": [s.get("length") for s in snapshots],
+            "people_id": [str(d["_id"]) for d in docs],
+        },
+        schema=PEOPLE_SCHEMA,
+    )
+
+
+DATASETS = {
+    "counts": (COUNTS_SCHEMA, iter_counts, counts_to_batch, ("location", "area_id")),
+    "people": (PEOPLE_SCHEMA, iter_people, people_to_batch, ("location",)),
+}
+
+
+def iter_record_batches(dataset, start_time=None, end_time=None, batch_size=5000):
+    """Stream a dataset as Arrow record batches; at most one batch is in memory."""
+    _, iter_docs, to_batch, _ = DATASETS[dataset]
+    for docs in iter_docs(start_time, end_time, batch_size=batch_size):
+        yield to_batch(docs)
+
+
+def iter_arrow_ipc(dataset, start_time=None, end_time=None, batch_size=5000):
+    """Stream a dataset as Arrow IPC stream bytes, one chunk per record batch."""
+    schema = DATASETS[dataset][0]
+    sink = BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield _drain(sink)
+        for batch in iter_record_batches(dataset, start_time, end_time, batch_size):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink):
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def _partition_path(batch, keys):
+    """Split a batch into (hive partition path, day, table) by keys and UTC day."""
+    table = pa.Table.from_batches([batch])
+    days = pc.strftime(table["timestamp"], format="%Y-%m-%d")
+    table = table.append_column("day", days)
+    groups = {}
+    columns = [table[k].to_pylist() for k in keys] + [days.to_pylist()]
+    for i, values in enumerate(zip(*columns)):
+        groups.setdefault(values, []).append(i)
+    names = list(keys) + ["day"]
+    for values, indices in groups.items():
+        path = "/".join(
+            f"{name}={'unknown' if v is None else v}" for name, v in zip(names, values)
+        )
+        yield path, values[-1], table.take(indices).drop_columns(["day"])
+
+
+def export_to_minio(
+    dataset, start_time=None, end_time=None, prefix="synapsis/exports", batch_size=5000
+):
+    """Write a dataset as Parquet files partitioned by location/area/day to MinIO.
+
+    Rows are streamed from Mongo in bounded batches, in timestamp order, and
+    appended to one local Parquet writer per partition. Once a batch reaches a
+    later day, the writers of the earlier days are complete: they are closed,
+    uploaded and their local files removed. Open files and writer buffers are
+    thus bounded by the partitions of one day, whatever the range.
+
+    Args:
+        dataset (str): "counts" or "people".
+        start_time (str, optional): Start timestamp (epoch seconds), inclusive.
+        end_time (str, optional): End timestamp (epoch seconds), exclusive.
+        prefix (str, optional): '<bucket>/<path>' to write under. Defaults to 'synapsis/exports'.
+        batch_size (int, optional): Documents per batch. Defaults to 5000.
+    Returns:
+        list of str: Uploaded object names, or SynapsisResponse.SERVER_ERROR
+    """
+    schema, _, _, keys = DATASETS[dataset]
+    bucket_name, base = prefix.split("/", 1)
+    run_id = f"{get_timestamp().strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    # Partition path -> (local file, writer, day)
+    writers = {}
+    objects = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+
+            def finish(path):
+                local, writer, _ = writers.pop(path)
+                writer.close()
+                object_name = f"{bucket_name}/{base}/{dataset}/{path}/{run_id}.parquet"
+                result = upload_file_to_minio(
+                    object_name, local, content_type="application/parquet"
+                )
+                os.remove(local)
+                if result == SynapsisResponse.SERVER_ERROR:
+                    raise RuntimeError(f"Upload of {object_name} failed")
+                objects.append(object_name)
+
+            for batch in iter_record_batches(dataset, start_time, end_time, batch_size):
+                last_day = None
+                for path, day, table in _partition_path(batch, keys):
+                    if path not in writers:
+                        local = os.path.join(tmp_dir, f"{uuid.uuid4().hex}.parquet")
+                        writers[path] = (
+                            local,
+                            pq.ParquetWriter(local, schema, compression="zstd"),
+                            day,
+                        )
+                    writers[path][1].write_table(table)
+                    last_day = day if last_day is None else max(last_day, day)
+                # Later batches only hold rows of `last_day` or after
+                for path in [p for p, (_, _, day) in writers.items() if day < last_day]:
+                    finish(path)
+            for path in list(writers):
+                finish(path)
+            logger.info(f"Exported {dataset} to {len(objects)} Parquet files")
+            return objects
+    except Exception as e:
+        for _, writer, _ in writers.values():
+            writer.close()
+        logger.error(f"Error exporting {dataset}: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# Finished jobs are kept EXPORT_JOB_TTL seconds, and at most EXPORT_JOB_MAX jobs
+EXPORT_JOB_TTL = float(os.getenv("EXPORT_JOB_TTL", "86400"))
+EXPORT_JOB_MAX = int(os.getenv("EXPORT_JOB_MAX", "1000"))
+
+
+def create_export_job(dataset):
+    """Record a queued export job in the state shared by the API workers.
+
+    Args:
+        dataset (str): "counts" or "people".
+    Returns:
+        str: ID of the new job.
+    """
+    return shared_state.create_job(dataset, EXPORT_JOB_TTL, EXPORT_JOB_MAX)
+
+
+def get_export_job(job_id):
+    return shared_state.get_job(job_id)
+
+
+def run_export_job(job_id, dataset, start_time=None, end_time=None):
+    """Background task wrapper around `export_to_minio` that records its status."""
+    shared_state.update_job(job_id, "running")
+    objects = export_to_minio(dataset, start_time, end_time)
+    if objects == SynapsisResponse.SERVER_ERROR:
+        shared_state.update_job(job_id, "error")
+    else:
+        shared_state.update_job(job_id, "done", objects=objects)
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(description="Export counts/people to Parquet.")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--start-time", type=int, default=None)
+    parser.add_argument("--end-time", type=int, default=None)
+    parser.add_argument("--prefix", default="synapsis/exports")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    export_to_minio(
+        args.dataset, args.start_time, args.end_time, args.prefix, args.batch_size
+    )
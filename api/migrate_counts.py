@@ -0,0 +1,106 @@
+# Built-in imports
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+from synapsis_common.utility import (
+    mo_synapsis_db,
+    mo_synapsis_counts,
+    get_count,
+    migrate_counts_to_timeseries,
+)
+
+
+def storage_per_day(collection_names, time_collection):
+    """Storage size (bytes) of the given collections divided by the days they span."""
+    db = mo_synapsis_db
+    storage = 0
+    for name in collection_names:
+        stats = db.command("collStats", name)
+        storage += stats.get("storageSize", 0) + stats.get("totalIndexSize", 0)
+
+    first = db[time_collection].find_one(sort=[("timestamp", 1)])
+    last = db[time_collection].find_one(sort=[("timestamp", -1)])
+    if first is None or last is None:
+        return storage, 0.0
+    days = max((last["timestamp"] - first["timestamp"]).total_seconds() / 86400, 1.0)
+    return storage, storage / days
+
+
+def legacy_get_count(query, limit):
+    data = list(mo_synapsis_counts.find(query).sort("timestamp", -1).limit(limit))
+    mo_synapsis_counts.count_documents(query)
+    return data
+
+
+def measure_range_queries(start_time, end_time, limit, repeat):
+    """p50/p95 latency (ms) of the same range query on both layouts."""
+    query = {
+        "timestamp": {
+            "$gte": datetime.fromtimestamp(start_time),
+            "$lte": datetime.fromtimestamp(end_time),
+        }
+    }
+    results = {}
+    for name, run in (
+        ("legacy", lambda: legacy_get_count(query, limit)),
+        (
+            "timeseries",
+            lambda: get_count(start_time=start_time, end_time=end_time, limit=limit),
+        ),
+    ):
+        latencies = []
+        for _ in range(repeat):
+            st_ = time.perf_counter()
+            run()
+            latencies.append((time.perf_counter() - st_) * 1000)
+        percentiles = statistics.quantiles(latencies, n=100)
+        results[name] = {"p50_ms": percentiles[49], "p95_ms": percentiles[94]}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrate `counts` to the time-series layout and compare both."
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--skip-migration", action="store_true")
+    parser.add_argument("--range-hours", type=int, default=24)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    if not args.skip_migration:
+        migrate_counts_to_timeseries(batch_size=args.batch_size)
+
+    legacy_total, legacy_per_day = storage_per_day(["counts"], "counts")
+    ts_total, ts_per_day = storage_per_day(
+        ["counts_ts", "count_people"], "count_people"
+    )
+    logger.info(
+        f"Storage legacy: {legacy_total / 1e6:.2f} MB ({legacy_per_day / 1e6:.2f} MB/day)"
+    )
+    logger.info(
+        f"Storage time-series: {ts_total / 1e6:.2f} MB ({ts_per_day / 1e6:.2f} MB/day)"
+    )
+
+    end_time = int(time.time())
+    start_time = end_time - args.range_hours * 3600
+    for name, stats in measure_range_queries(
+        start_time, end_time, args.limit, args.repeat
+    ).items():
+        logger.info(
+            f"Range query {name}: p50={stats['p50_ms']:.2f} ms, p95={stats['p95_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    main()
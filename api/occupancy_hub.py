@@ -0,0 +1,145 @@
+# Built-in imports
+import os
+import glob
+import json
+import time
+import socket
+import asyncio
+from collections import deque
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+
+
+class OccupancyHub:
+    """Keep the recent per-area occupancy streamed by the local cameras.
+
+    Every camera publishes on `<feed_dir>/<location>.sock` (see the inference
+    OccupancyPublisher). The hub scans the directory every `rescan` seconds,
+    connects to new sockets and keeps the last `ring_size` messages of each
+    location in memory. Every API worker subscribes on its own, so all of them
+    serve the same values.
+
+    Args:
+        feed_dir (str, optional): Socket directory; empty disables the hub.
+            Defaults to OCCUPANCY_FEED_DIR.
+        ring_size (int, optional): Messages kept per location. Defaults to
+            OCCUPANCY_RING_SIZE (600, one minute at 10 messages per second).
+        rescan (float, optional): Seconds between directory scans. Defaults to 2.
+    """
+
+    def __init__(self, feed_dir=None, ring_size=None, rescan=2.0):
+        self.feed_dir = (
+            os.getenv("OCCUPANCY_FEED_DIR", "/tmp/synapsis/occupancy")
+            if feed_dir is None
+            else feed_dir
+        )
+        self.ring_size = (
+            int(os.getenv("OCCUPANCY_RING_SIZE", "600"))
+            if ring_size is None
+            else ring_size
+        )
+        self.rescan = rescan
+        self.rings = {}
+        self.readers = {}
+        self._task = None
+
+    def start(self):
+        if self.feed_dir and self._task is None:
+            self._task = asyncio.create_task(self._scan_loop())
+
+    async def stop(self):
+        tasks = [t for t in [self._task, *self.readers.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self.readers = {}
+
+    async def _scan_loop(self):
+        while True:
+            for path in glob.glob(os.path.join(self.feed_dir, "*.sock")):
+                reader = self.readers.get(path)
+                if reader is None or reader.done():
+                    self.readers[path] = asyncio.create_task(self._read(path))
+            await asyncio.sleep(self.rescan)
+
+    async def _read(self, path):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, path)
+            logger.info(f"Subscribed to occupancy feed {path}")
+            while True:
+                data = await loop.sock_recv(sock, 65536)
+                if not data:
+                    break
+                message = json.loads(data)
+                ring = self.rings.get(message["location"])
+                if ring is None:
+                    ring = self.rings[message["location"]] = deque(
+                        maxlen=self.ring_size
+                    )
+                ring.append(message)
+        except (OSError, ValueError, KeyError) as e:
+            # A stale socket of a stopped camera; retried on the next scan
+            logger.debug("Occupancy feed {} unavailable: {}", path, e)
+        finally:
+            sock.close()
+
+    def live(self, location=None, area_id=None, seconds=None, now=None):
+        """Latest occupancy per location, with the history of the last `seconds`.
+
+        Args:
+            location (str, optional): Only this location.
+            area_id (str, optional): Only this area.
+            seconds (float, optional): History to include; none by default.
+            now (float, optional): Reference time. Defaults to now.
+        Returns:
+            list of dict: Per location 'location', 'captured_at', 'age_seconds',
+                'total' and 'areas', plus 'history' if `seconds` is given.
+        """
+        now = time.time() if now is None else now
+        results = []
+        for name, ring in self.rings.items():
+            if (location is not None and name != location) or not ring:
+                continue
+            latest = ring[-1]
+            result = {
+                "location": name,
+                "captured_at": latest["captured_at"],
+                "age_seconds": round(now - latest["captured_at"], 3),
+                "total": latest["total"],
+                "areas": _select(latest["areas"], area_id),
+            }
+            if seconds is not None:
+                since = now - seconds
+                result["history"] = [
+                    {
+                        "captured_at": message["captured_at"],
+                        "total": message["total"],
+                        "areas": _select(message["areas"], area_id),
+                    }
+                    for message in ring
+                    if message["captured_at"] >= since
+                ]
+            results.append(result)
+        return results
+
+    def stats(self):
+        return {
+            "feeds": sum(not reader.done() for reader in self.readers.values()),
+            "locations": {name: len(ring) for name, ring in self.rings.items()},
+        }
+
+
+def _select(areas, area_id):
+    if area_id is None:
+        return areas
+    return [area for area in areas if area["area_id"] == area_id]
+
+
+occupancy_hub = OccupancyHub()
@@ -0,0 +1,194 @@
+# Built-in imports
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+
+
+class SharedState:
+    """State every uvicorn worker of the API has to agree on, in a local SQLite file.
+
+    Export job statuses, the alert events pushed by inference and runtime
+    settings (the log level) are kept here instead of in one worker's memory.
+    Any worker answers for any job, and every worker polls the file for new
+    alert events and setting changes (see `sync`), so a push or a
+    `PUT /api/logging` reaches all of them.
+
+    Args:
+        path (str): SQLite file, shared by the workers of one machine.
+        event_ttl (float, optional): Seconds alert events are kept for workers
+            to pick up. Defaults to 60.
+    """
+
+    def __init__(self, path, event_ttl=60.0):
+        self.path = path
+        self.event_ttl = event_ttl
+        self._local = threading.local()
+        self._schema = False
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema:
+                conn.executescript(
+                    "CREATE TABLE IF NOT EXISTS export_jobs (job_id TEXT PRIMARY KEY, "
+                    "dataset TEXT, status TEXT, objects TEXT, updated_at REAL);"
+                    "CREATE TABLE IF NOT EXISTS alert_events (id INTEGER PRIMARY KEY "
+                    "AUTOINCREMENT, created_at REAL, event TEXT);"
+                    "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, "
+                    "value TEXT);"
+                )
+                self._schema = True
+            self._local.conn = conn
+        return conn
+
+    def reset(self):
+        """Start a server run: drop the previous run's events and settings.
+
+        Jobs of the previous run that never finished are marked as failed.
+        """
+        conn = self._connection()
+        conn.execute("DELETE FROM alert_events")
+        conn.execute("DELETE FROM settings")
+        conn.execute(
+            "UPDATE export_jobs SET status = 'error', updated_at = ? "
+            "WHERE status IN ('queued', 'running')",
+            (time.time(),),
+        )
+        logger.info(f"Shared API state at {self.path}")
+
+    # -------------------- export jobs --------------------
+
+    def create_job(self, dataset, ttl, max_jobs, now=None):
+        """Record a queued job, evicting finished jobs past `ttl` or over `max_jobs`.
+
+        Returns:
+            str: ID of the new job.
+        """
+        now = time.time() if now is None else now
+        job_id = uuid.uuid4().hex
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM export_jobs WHERE status IN ('done', 'error') "
+                "AND updated_at < ?",
+                (now - ttl,),
+            )
+            excess = (
+                conn.execute("SELECT COUNT(*) FROM export_jobs").fetchone()[0]
+                + 1
+                - max_jobs
+            )
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM export_jobs WHERE job_id IN (SELECT job_id FROM "
+                    "export_jobs WHERE status IN ('done', 'error') "
+                    "ORDER BY updated_at LIMIT ?)",
+                    (excess,),
+                )
+            conn.execute(
+                "INSERT INTO export_jobs VALUES (?, ?, 'queued', '[]', ?)",
+                (job_id, dataset, now),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return job_id
+
+    def update_job(self, job_id, status, objects=None):
+        if objects is None:
+            self._connection().execute(
+                "UPDATE export_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (status, time.time(), job_id),
+            )
+        else:
+            self._connection().execute(
+                "UPDATE export_jobs SET status = ?, objects = ?, updated_at = ? "
+                "WHERE job_id = ?",
+                (status, json.dumps(objects), time.time(), job_id),
+            )
+
+    def get_job(self, job_id):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT dataset, status, objects FROM export_jobs WHERE job_id = ?",
+                (job_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return {"status": row[1], "dataset": row[0], "objects": json.loads(row[2])}
+
+    # -------------------- alert events --------------------
+
+    def append_events(self, events, now=None):
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO alert_events (created_at, event) VALUES (?, ?)",
+                [(now, json.dumps(event)) for event in events],
+            )
+            conn.execute(
+                "DELETE FROM alert_events WHERE created_at < ?", (now - self.event_ttl,)
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def last_event_id(self):
+        row = self._connection().execute("SELECT MAX(id) FROM alert_events").fetchone()
+        return row[0] or 0
+
+    def events_after(self, last_id, limit=1000):
+        """Alert events appended after `last_id`, and the ID to continue from."""
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT id, event FROM alert_events WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, limit),
+            )
+            .fetchall()
+        )
+        if not rows:
+            return last_id, []
+        return rows[-1][0], [json.loads(event) for _, event in rows]
+
+    # -------------------- settings --------------------
+
+    def set_setting(self, key, value):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def get_setting(self, key):
+        row = (
+            self._connection()
+            .execute("SELECT value FROM settings WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+
+shared_state = SharedState(
+    os.getenv("API_STATE_PATH", "/tmp/synapsis/api_state.db"),
+    event_ttl=float(os.getenv("API_STATE_EVENT_TTL", "60")),
+)
@@ -0,0 +1,127 @@
+# Built-in imports
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Third-party imports
+from loguru import logger
+from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
+
+# Local imports
+from synapsis_common.clients import MONGODB_URI
+
+COMPRESSORS = {"none": None, "snappy": "snappy", "zstd": "zstd"}
+WRITE_CONCERNS = {
+    "w0": WriteConcern(w=0),
+    "w1": WriteConcern(w=1),
+    "w1_j": WriteConcern(w=1, j=True),
+    "majority": WriteConcern(w="majority"),
+}
+
+
+def synthetic_people(n):
+    """People documents shaped like the ones the capture path writes."""
+    now = datetime.now(timezone.utc)
+    docs = []
+    for _ in range(n):
+        x1, y1 = random.randint(0, 1800), random.randint(0, 1000)
+        docs.append(
+            {
+                "location": "kepatihan",
+                "conf": random.uniform(0.45, 0.99),
+                "bbox": [
+                    x1,
+                    y1,
+                    x1 + random.randint(20, 120),
+                    y1 + random.randint(40, 300),
+                ],
+                "tracker_id": f"1758507330123_{random.randint(1, 5000)}",
+                "snapshot": None,
+                "timestamp": now,
+            }
+        )
+    return docs
+
+
+def run_setting(compressor, write_concern, batches, batch_size, threads, pool_size):
+    client = MongoClient(
+        MONGODB_URI,
+        maxPoolSize=pool_size,
+        compressors=compressor,
+    )
+    collection = client["synapsis_bench"].get_collection(
+        "people", write_concern=write_concern
+    )
+    collection.drop()
+    payloads = [synthetic_people(batch_size) for _ in range(batches)]
+
+    def insert(docs):
+        st_ = time.perf_counter()
+        collection.insert_many(docs, ordered=False)
+        return time.perf_counter() - st_
+
+    st_ = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(insert, payloads))
+    elapsed = time.perf_counter() - st_
+    # w=0 returns before the server applied anything; wait so the next run is clean
+    collection.with_options(write_concern=WriteConcern(w=1)).count_documents({})
+    collection.drop()
+    client.close()
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    percentiles = statistics.quantiles(latencies_ms, n=100)
+    return {
+        "docs_per_s": batches * batch_size / elapsed,
+        "p50_ms": percentiles[49],
+        "p95_ms": percentiles[94],
+        "p99_ms": percentiles[98],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Insert throughput/latency per compressor and write concern."
+    )
+    parser.add_argument("--batches", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for (c_name, compressor), (w_name, write_concern) in itertools.product(
+        COMPRESSORS.items(), WRITE_CONCERNS.items()
+    ):
+        stats = run_setting(
+            compressor,
+            write_concern,
+            args.batches,
+            args.batch_size,
+            args.threads,
+            args.pool_size,
+        )
+        results.append({"compressor": c_name, "write_concern": w_name, **stats})
+        logger.info(
+            f"{c_name:>6} {w_name:>8}: {stats['docs_per_s']:9.0f} docs/s, "
+            f"p50={stats['p50_ms']:.2f} ms, p95={stats['p95_ms']:.2f} ms, "
+            f"p99={stats['p99_ms']:.2f} ms"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    main()
@@ -0,0 +1,158 @@
+# Built-in imports
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party imports
+from loguru import logger
+
+# Both backends write to scratch stores; set before synapsis_common reads the environment
+os.environ["STORAGE_BACKEND"] = "mongo"
+os.environ["MONGODB_DATABASE"] = os.getenv("BENCH_MONGODB_DATABASE", "synapsis_bench")
+os.environ["EMBEDDED_DIR"] = tempfile.mkdtemp(prefix="synapsis_bench_")
+
+# Local imports
+from synapsis_common import utility, embedded
+from synapsis_common.clients import mo_client, minio_client, MONGODB_DATABASE
+
+BUCKET = "synapsis"
+PREFIX = "bench/storage"
+
+
+def capture(backend, camera, index, people, areas, pack_every, pack_bytes):
+    """The records one capture of the camera loop writes, through `backend`."""
+    captured_at = time.time()
+    trace_id = f"{camera}_{index}"
+    tracker_ids = [f"{camera}_{random.randint(1, 200)}" for _ in range(people)]
+    ids = backend.set_people_columns(
+        camera,
+        [random.uniform(0.45, 0.99) for _ in range(people)],
+        [[x, x, x + 60, x + 180] for x in random.sample(range(1800), people)],
+        tracker_ids,
+        [None] * people,
+        captured_at=captured_at,
+        trace_id=trace_id,
+    )
+    if ids == utility.SynapsisResponse.SERVER_ERROR:
+        raise RuntimeError("set_people_columns failed")
+    for area in range(areas):
+        inside = slice(area, None, areas)
+        backend.set_counts(
+            f"{camera}_area_{area}",
+            len(ids[inside]),
+            0,
+            ids[inside],
+            [],
+            tracker_ids[inside],
+            [],
+            location=camera,
+            captured_at=captured_at,
+            trace_id=trace_id,
+        )
+    if pack_every and index % pack_every == pack_every - 1:
+        backend.upload_bytes_to_minio(
+            f"{BUCKET}/{PREFIX}/{camera}/{index}.bin", os.urandom(pack_bytes)
+        )
+
+
+def run_backend(name, backend, args):
+    backend.ensure_count_collections()
+
+    def camera_loop(camera):
+        latencies = []
+        for index in range(args.captures):
+            st_ = time.perf_counter()
+            capture(
+                backend,
+                f"bench_camera_{camera}",
+                index,
+                args.people,
+                args.areas,
+                args.pack_every,
+                args.pack_bytes,
+            )
+            latencies.append(time.perf_counter() - st_)
+        return latencies
+
+    st_ = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.cameras) as executor:
+        latencies = [
+            latency
+            for camera in executor.map(camera_loop, range(args.cameras))
+            for latency in camera
+        ]
+    elapsed = time.perf_counter() - st_
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    percentiles = statistics.quantiles(latencies_ms, n=100)
+    captures = args.cameras * args.captures
+    return {
+        "backend": name,
+        "captures_per_s": captures / elapsed,
+        "records_per_s": captures * (args.people + args.areas) / elapsed,
+        "p50_ms": percentiles[49],
+        "p95_ms": percentiles[94],
+        "p99_ms": percentiles[98],
+    }
+
+
+def cleanup(names):
+    if "mongo" in names:
+        mo_client.drop_database(MONGODB_DATABASE)
+        for obj in minio_client.list_objects(
+            BUCKET, prefix=f"{PREFIX}/", recursive=True
+        ):
+            minio_client.remove_object(BUCKET, obj.object_name)
+    shutil.rmtree(os.environ["EMBEDDED_DIR"], ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Capture write throughput/latency of the Mongo/MinIO and embedded backends."
+    )
+    parser.add_argument("--captures", type=int, default=500, help="Per camera")
+    parser.add_argument("--cameras", type=int, default=1, help="Concurrent cameras")
+    parser.add_argument("--people", type=int, default=20, help="Records per capture")
+    parser.add_argument("--areas", type=int, default=4, help="Counts per capture")
+    parser.add_argument(
+        "--pack-every", type=int, default=12, help="Captures per snapshot pack upload"
+    )
+    parser.add_argument("--pack-bytes", type=int, default=64 * 1024)
+    parser.add_argument(
+        "--backend", choices=["mongo", "embedded"], action="append", default=None
+    )
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    backends = {"mongo": utility, "embedded": embedded}
+    names = args.backend or list(backends)
+    results = []
+    try:
+        for name in names:
+            stats = run_backend(name, backends[name], args)
+            results.append(stats)
+            logger.info(
+                f"{name:>8}: {stats['captures_per_s']:8.1f} captures/s, "
+                f"{stats['records_per_s']:9.0f} records/s, "
+                f"p50={stats['p50_ms']:.2f} ms, p95={stats['p95_ms']:.2f} ms, "
+                f"p99={stats['p99_ms']:.2f} ms"
+            )
+    finally:
+        cleanup(names)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    main()
@@ -0,0 +1 @@
+"""Data access shared by the API and inference services (MongoDB and MinIO, or embedded SQLite and local files)."""
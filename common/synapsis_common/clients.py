@@ -0,0 +1,154 @@
+# Built-in imports
+import os
+import time
+import functools
+
+# Third-party imports
+import certifi
+import urllib3
+from minio import Minio
+from loguru import logger
+from dotenv import load_dotenv, find_dotenv
+from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
+from pymongo.errors import AutoReconnect, NetworkTimeout, ServerSelectionTimeoutError
+
+# Local imports
+
+
+# The .env lives next to the service that imports this package, not next to it
+load_dotenv(find_dotenv(usecwd=True))
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+# "mongo" (MongoDB + MinIO) or "embedded" (SQLite + local files, see embedded.py)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+EMBEDDED_DIR = os.path.expanduser(os.getenv("EMBEDDED_DIR", "~/.synapsis"))
+
+
+def _write_concern(prefix, default_w, default_j):
+    """Build a WriteConcern from <prefix>_W / <prefix>_J environment variables."""
+    w = os.getenv(f"{prefix}_W", default_w)
+    w = int(w) if w.isdigit() else w
+    j = os.getenv(f"{prefix}_J", default_j) == "True"
+    # Unacknowledged writes cannot request journaling
+    return WriteConcern(w=w, j=j if w != 0 else None)
+
+
+# ============================================================
+# MONGODB
+
+MONGODB_URI = os.getenv("MONGODB_URI")
+MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "synapsis")
+MONGODB_MAX_POOL_SIZE = _env_int("MONGODB_MAX_POOL_SIZE", "50")
+MONGODB_MIN_POOL_SIZE = _env_int("MONGODB_MIN_POOL_SIZE", "2")
+MONGODB_CONNECT_TIMEOUT_MS = _env_int("MONGODB_CONNECT_TIMEOUT_MS", "5000")
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = _env_int(
+    "MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"
+)
+MONGODB_SOCKET_TIMEOUT_MS = _env_int("MONGODB_SOCKET_TIMEOUT_MS", "10000")
+# Wire compression, negotiated with the server in order of preference
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zstd,snappy")
+MONGODB_READ_RETRIES = _env_int("MONGODB_READ_RETRIES", "3")
+
+# Areas are small, rare, operator-driven writes: acknowledged and journaled.
+AREAS_WRITE_CONCERN = _write_concern("MONGODB_AREAS", "1", "True")
+# People/counts/heatmaps are high-volume telemetry: acknowledged, not journaled
+# by default; set MONGODB_TELEMETRY_W=0 for fire-and-forget.
+TELEMETRY_WRITE_CONCERN = _write_concern("MONGODB_TELEMETRY", "1", "False")
+# Camera leases decide who processes a stream: majority, so a fail-over cannot
+# hand the same camera to two workers.
+LEASES_WRITE_CONCERN = _write_concern("MONGODB_LEASES", "majority", "True")
+
+mo_client = MongoClient(
+    MONGODB_URI,
+    maxPoolSize=MONGODB_MAX_POOL_SIZE,
+    minPoolSize=MONGODB_MIN_POOL_SIZE,
+    connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+    serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+    compressors=MONGODB_COMPRESSORS or None,
+    retryWrites=True,
+    retryReads=True,
+    # The embedded backend never talks to Mongo; do not start monitor threads
+    connect=STORAGE_BACKEND != "embedded",
+)
+mo_synapsis_db = mo_client[MONGODB_DATABASE]
+
+
+def areas_collection(name):
+    return mo_synapsis_db.get_collection(name, write_concern=AREAS_WRITE_CONCERN)
+
+
+def telemetry_collection(name):
+    return mo_synapsis_db.get_collection(name, write_concern=TELEMETRY_WRITE_CONCERN)
+
+
+def leases_collection(name):
+    return mo_synapsis_db.get_collection(name, write_concern=LEASES_WRITE_CONCERN)
+
+
+def retry_read(func):
+    """Retry an idempotent read on transient connection errors.
+
+    The driver already retries a read once (retryReads); this adds a bounded
+    number of further attempts with exponential backoff for fail-overs.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MONGODB_READ_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except (AutoReconnect, NetworkTimeout, ServerSelectionTimeoutError) as e:
+                if attempt == MONGODB_READ_RETRIES - 1:
+                    raise
+                delay = 0.1 * 2**attempt
+                logger.warning(f"{func.__name__} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+
+    return wrapper
+
+
+# ============================================================
+# MINIO
+
+MINIO_URI = os.getenv("MINIO_URI")
+MINIO_SECURE = os.getenv("MINIO_SECURE") == "True"
+MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
+MINIO_SECRET = os.getenv("MINIO_SECRET")
+# Upload threads per process; the HTTP pool is sized so none of them waits
+MINIO_UPLOAD_WORKERS = _env_int("MINIO_UPLOAD_WORKERS", "4")
+MINIO_POOL_SIZE = _env_int("MINIO_POOL_SIZE", str(MINIO_UPLOAD_WORKERS + 2))
+MINIO_CONNECT_TIMEOUT = float(os.getenv("MINIO_CONNECT_TIMEOUT", "5"))
+MINIO_READ_TIMEOUT = float(os.getenv("MINIO_READ_TIMEOUT", "30"))
+MINIO_MAX_RETRIES = _env_int("MINIO_MAX_RETRIES", "3")
+
+minio_http_client = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=MINIO_POOL_SIZE,
+    block=True,
+    cert_reqs="CERT_REQUIRED",
+    ca_certs=os.getenv("SSL_CERT_FILE") or certifi.where(),
+    timeout=urllib3.Timeout(connect=MINIO_CONNECT_TIMEOUT, read=MINIO_READ_TIMEOUT),
+    retries=urllib3.Retry(
+        total=MINIO_MAX_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=[500, 502, 503, 504],
+    ),
+)
+# The embedded backend keeps objects on disk and has no MINIO_URI to connect to
+minio_client = (
+    Minio(
+        MINIO_URI,
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET,
+        secure=MINIO_SECURE,
+        http_client=minio_http_client,
+    )
+    if STORAGE_BACKEND != "embedded"
+    else None
+)
@@ -0,0 +1,1264 @@
+# Built-in imports
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import threading
+from io import BytesIO
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Third-party imports
+from PIL import Image
+from bson import ObjectId
+from loguru import logger
+
+# Local imports
+from synapsis_common.clients import EMBEDDED_DIR
+from synapsis_common.utility import (
+    SynapsisResponse,
+    COUNTS_RETENTION_DAYS,
+    PEOPLE_RETENTION_DAYS,
+    HEATMAP_RETENTION_DAYS,
+    ALERT_RETENTION_DAYS,
+    TRAJECTORY_RETENTION_DAYS,
+    get_timestamp,
+    _capture_timestamp,
+    _merge_heatmap,
+    _track_document,
+    _track_summaries,
+    decode_trajectory,
+)
+
+# Embedded storage for single-machine deployments: one SQLite database in WAL
+# mode for the records and a directory tree for the objects, both under
+# EMBEDDED_DIR. With STORAGE_BACKEND=embedded, `utility` exposes the functions
+# in __all__ instead of its MongoDB/MinIO ones, with the same arguments and
+# return values (documents come back shaped like pymongo's: ObjectId `_id`s
+# and naive UTC datetimes). Every call is one transaction, so a capture's
+# records are written with a single commit; WAL lets the API read meanwhile.
+
+__all__ = [
+    "ensure_area_indexes",
+    "get_area_names_based_on_location",
+    "check_area_exists",
+    "delete_area",
+    "update_area",
+    "set_area",
+    "get_area",
+    "get_areas",
+    "set_areas_many",
+    "delete_areas_many",
+    "ensure_count_collections",
+    "get_count_live",
+    "get_count",
+    "get_count_by_tracker_id",
+    "get_count_by_tracker_ids",
+    "set_counts",
+    "set_people",
+    "set_people_many",
+    "set_people_columns",
+    "set_people_bulk_write",
+    "set_people_snapshots",
+    "get_snapshot_ref",
+    "iter_counts",
+    "iter_people",
+    "ensure_heatmap_indexes",
+    "set_heatmaps",
+    "get_heatmap",
+    "ensure_trajectory_indexes",
+    "set_trajectories",
+    "get_track",
+    "get_tracks_in_area",
+    "set_freshness",
+    "get_freshness",
+    "ensure_alert_indexes",
+    "set_alert_events",
+    "get_alerts",
+    "upload_ndarray_to_minio",
+    "upload_bytes_to_minio",
+    "upload_file_to_minio",
+    "get_object_range_from_minio",
+]
+
+EMBEDDED_DB = os.path.join(EMBEDDED_DIR, "synapsis.db")
+EMBEDDED_OBJECTS = os.path.join(EMBEDDED_DIR, "objects")
+# Seconds a writer waits for another process's transaction to commit
+EMBEDDED_BUSY_TIMEOUT = float(os.getenv("EMBEDDED_BUSY_TIMEOUT", "10"))
+# Seconds between retention passes, per process; the first runs PRUNE_DELAY after start
+PRUNE_INTERVAL = 3600
+PRUNE_DELAY = 60
+# Rows deleted per retention transaction, so writers wait one short batch at most
+PRUNE_BATCH = int(os.getenv("EMBEDDED_PRUNE_BATCH", "1000"))
+# Days objects other than snapshot packs (exports) are kept; packs follow PEOPLE_RETENTION_DAYS
+OBJECT_RETENTION_DAYS = int(
+    os.getenv("EMBEDDED_OBJECT_RETENTION_DAYS", str(COUNTS_RETENTION_DAYS))
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS areas (
+    id TEXT PRIMARY KEY,
+    location TEXT NOT NULL,
+    area_name TEXT NOT NULL,
+    polygon_zone TEXT NOT NULL,
+    updated_at REAL,
+    UNIQUE (location, area_name)
+);
+CREATE TABLE IF NOT EXISTS people (
+    id TEXT PRIMARY KEY,
+    location TEXT,
+    conf REAL,
+    bbox TEXT,
+    tracker_id TEXT,
+    snapshot TEXT,
+    timestamp REAL NOT NULL,
+    written_at REAL,
+    trace_id TEXT
+);
+CREATE INDEX IF NOT EXISTS people_tracker_id ON people (tracker_id, timestamp);
+CREATE INDEX IF NOT EXISTS people_timestamp ON people (timestamp);
+CREATE TABLE IF NOT EXISTS counts (
+    id TEXT PRIMARY KEY,
+    location TEXT,
+    area_id TEXT NOT NULL,
+    "in" INTEGER NOT NULL,
+    "out" INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    written_at REAL,
+    trace_id TEXT,
+    refs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS counts_timestamp ON counts (timestamp);
+CREATE INDEX IF NOT EXISTS counts_area ON counts (area_id, timestamp);
+CREATE TABLE IF NOT EXISTS heatmaps (
+    location TEXT NOT NULL,
+    area_id TEXT NOT NULL,
+    bucket_start REAL NOT NULL,
+    bucket_seconds INTEGER,
+    cell INTEGER NOT NULL,
+    shape TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    frames INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS heatmaps_range ON heatmaps (location, area_id, bucket_start);
+CREATE TABLE IF NOT EXISTS trajectories (
+    id TEXT PRIMARY KEY,
+    location TEXT,
+    tracker_id TEXT NOT NULL,
+    area_ids TEXT NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    x0 INTEGER NOT NULL,
+    y0 INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    box TEXT,
+    encoding TEXT,
+    dt BLOB NOT NULL,
+    dxy BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trajectories_track ON trajectories (tracker_id, start);
+CREATE INDEX IF NOT EXISTS trajectories_end ON trajectories ("end");
+CREATE TABLE IF NOT EXISTS trajectory_areas (
+    segment_id TEXT NOT NULL,
+    location TEXT,
+    area_id TEXT NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trajectory_areas_range
+    ON trajectory_areas (location, area_id, start);
+CREATE INDEX IF NOT EXISTS trajectory_areas_end ON trajectory_areas ("end");
+CREATE TABLE IF NOT EXISTS alerts (
+    location TEXT,
+    area_id TEXT,
+    status TEXT,
+    timestamp REAL NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_listing ON alerts (location, area_id, timestamp);
+CREATE INDEX IF NOT EXISTS alerts_timestamp ON alerts (timestamp);
+CREATE TABLE IF NOT EXISTS freshness (
+    location TEXT PRIMARY KEY,
+    report TEXT NOT NULL,
+    updated_at REAL
+);
+"""
+
+# Tables, time column and retention in days
+RETENTION = (
+    ("people", "timestamp", PEOPLE_RETENTION_DAYS),
+    ("counts", "timestamp", COUNTS_RETENTION_DAYS),
+    ("heatmaps", "bucket_start", HEATMAP_RETENTION_DAYS),
+    ("trajectories", '"end"', TRAJECTORY_RETENTION_DAYS),
+    ("trajectory_areas", '"end"', TRAJECTORY_RETENTION_DAYS),
+    ("alerts", "timestamp", ALERT_RETENTION_DAYS),
+)
+
+_local = threading.local()
+_state = {"schema": False}
+_state_lock = threading.Lock()
+
+
+def _connection():
+    """The calling thread's connection; creates the database on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(EMBEDDED_DIR, exist_ok=True)
+        conn = sqlite3.connect(
+            EMBEDDED_DB, timeout=EMBEDDED_BUSY_TIMEOUT, isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints, not at every commit: fine for telemetry
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with _state_lock:
+            if not _state["schema"]:
+                conn.executescript(SCHEMA)
+                _state["schema"] = True
+                threading.Thread(target=_prune_loop, daemon=True).start()
+                logger.info(f"Embedded storage at {EMBEDDED_DIR}")
+        _local.conn = conn
+    return conn
+
+
+@contextmanager
+def _transaction():
+    """Write transaction; takes the write lock up front so it never has to upgrade."""
+    conn = _connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _prune_loop():
+    """Background thread applying retention every PRUNE_INTERVAL, off the writing threads."""
+    time.sleep(PRUNE_DELAY)
+    while True:
+        try:
+            _prune()
+        except Exception as e:
+            logger.error(f"Error applying embedded retention: {str(e)}")
+        time.sleep(PRUNE_INTERVAL)
+
+
+def _prune(now=None):
+    """Delete records and objects past their retention, the counterpart of the TTL indexes.
+
+    Records go in batches of PRUNE_BATCH rows, each its own transaction, so a
+    capture write waits for one batch at most.
+    """
+    now = time.time() if now is None else now
+    deleted = 0
+    for table, column, days in RETENTION:
+        while True:
+            with _transaction() as conn:
+                batch = conn.execute(
+                    f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} "
+                    f"WHERE {column} < ? LIMIT ?)",
+                    (now - days * 86400, PRUNE_BATCH),
+                ).rowcount
+            deleted += batch
+            if batch < PRUNE_BATCH:
+                break
+            # Let waiting writers take the lock between batches
+            time.sleep(0.01)
+    removed = _prune_objects(now)
+    if deleted or removed:
+        logger.info(
+            f"Embedded retention removed {deleted} records and {removed} objects"
+        )
+
+
+def _prune_objects(now):
+    """Remove object files older than their retention.
+
+    Snapshot packs (under a 'packs' directory) are kept PEOPLE_RETENTION_DAYS,
+    like the people records pointing into them; other objects, such as
+    exports, OBJECT_RETENTION_DAYS. Directories stay: a writer may be about
+    to create a file in one.
+    """
+    removed = 0
+    for root, _, files in os.walk(EMBEDDED_OBJECTS):
+        days = (
+            PEOPLE_RETENTION_DAYS
+            if "packs" in Path(root).relative_to(EMBEDDED_OBJECTS).parts
+            else OBJECT_RETENTION_DAYS
+        )
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime < now - days * 86400:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def _ensure_schema():
+    """Tables and indexes are created with the first connection."""
+    _connection()
+
+
+ensure_area_indexes = _ensure_schema
+ensure_count_collections = _ensure_schema
+ensure_heatmap_indexes = _ensure_schema
+ensure_trajectory_indexes = _ensure_schema
+ensure_alert_indexes = _ensure_schema
+
+
+def _epoch(value):
+    """Datetime (naive means UTC, as pymongo returns them) to epoch seconds."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _datetime(seconds):
+    """Epoch seconds to a naive UTC datetime, as pymongo returns them."""
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _dumps(value):
+    return None if value is None else json.dumps(value)
+
+
+def _loads(value):
+    return None if value is None else json.loads(value)
+
+
+def _range(column, start_time, end_time, end_inclusive=False):
+    """SQL condition and parameters of a [start_time, end_time) epoch range."""
+    clauses, params = [], []
+    if start_time is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(int(start_time))
+    if end_time is not None:
+        clauses.append(f"{column} {'<=' if end_inclusive else '<'} ?")
+        params.append(int(end_time))
+    return clauses, params
+
+
+def _where(clauses):
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+# ============================================================
+# AREAS
+
+
+def _area(row):
+    return {
+        "_id": ObjectId(row["id"]),
+        "location": row["location"],
+        "area_name": row["area_name"],
+        "polygon_zone": json.loads(row["polygon_zone"]),
+        "updated_at": _datetime(row["updated_at"]),
+    }
+
+
+def get_area_names_based_on_location(location):
+    rows = _connection().execute(
+        "SELECT area_name FROM areas WHERE location = ?", (location,)
+    )
+    return [row["area_name"] for row in rows]
+
+
+def check_area_exists(location, area_name):
+    row = (
+        _connection()
+        .execute(
+            "SELECT 1 FROM areas WHERE location = ? AND area_name = ?",
+            (location, area_name),
+        )
+        .fetchone()
+    )
+    return row is not None
+
+
+def delete_area(location, area_name):
+    """Delete an area; see `utility.delete_area`."""
+    try:
+        with _transaction() as conn:
+            deleted = conn.execute(
+                "DELETE FROM areas WHERE location = ? AND area_name = ?",
+                (location, area_name),
+            ).rowcount
+        if deleted == 0:
+            logger.warning(f"Area not found: `{area_name}` at location `{location}`")
+            return SynapsisResponse.NOT_FOUND
+        logger.info(f"Area deleted: `{area_name}` at location `{location}`")
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error deleting area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def update_area(location, area_name, polygon_zone):
+    """Update the polygon of an area; see `utility.update_area`."""
+    try:
+        with _transaction() as conn:
+            matched = conn.execute(
+                "UPDATE areas SET polygon_zone = ?, updated_at = ? "
+                "WHERE location = ? AND area_name = ?",
+                (json.dumps(polygon_zone), time.time(), location, area_name),
+            ).rowcount
+        if matched == 0:
+            logger.warning(f"Area not found: `{area_name}` at location `{location}`")
+            return SynapsisResponse.NOT_FOUND
+        logger.info(f"Area updated: `{area_name}` at location `{location}`")
+        logger.debug("Updated polygon_zone: {}", polygon_zone)
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error updating area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_area(location, area_name, polygon_zone):
+    """Insert an area; see `utility.set_area`."""
+    try:
+        with _transaction() as conn:
+            conn.execute(
+                "INSERT INTO areas (id, location, area_name, polygon_zone, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    str(ObjectId()),
+                    location,
+                    area_name,
+                    json.dumps(polygon_zone),
+                    time.time(),
+                ),
+            )
+        logger.info(f"Area set: `{area_name}` at location `{location}`")
+        logger.debug("Polygon_zone: {}", polygon_zone)
+        return SynapsisResponse.SUCCESS
+    except sqlite3.IntegrityError:
+        logger.warning(f"Area already exists: `{area_name}` at location `{location}`")
+        return SynapsisResponse.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error inserting area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_area(location, area_name):
+    """Get an area; see `utility.get_area`."""
+    try:
+        row = (
+            _connection()
+            .execute(
+                "SELECT * FROM areas WHERE location = ? AND area_name = ?",
+                (location, area_name),
+            )
+            .fetchone()
+        )
+        logger.debug("Retrieved area `{}` at location `{}`", area_name, location)
+        if row is None:
+            logger.warning(f"Area not found: `{area_name}` at location `{location}`")
+            return SynapsisResponse.NOT_FOUND
+        return _area(row)
+    except Exception as e:
+        logger.error(f"Error retrieving area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_areas(location=None, fields=None):
+    """Get areas without `_id`; see `utility.get_areas`."""
+    query = "SELECT * FROM areas"
+    params = ()
+    if location is not None:
+        query, params = query + " WHERE location = ?", (location,)
+    areas = []
+    for row in _connection().execute(query, params):
+        area = _area(row)
+        del area["_id"]
+        if fields:
+            area = {field: area[field] for field in fields if field in area}
+        areas.append(area)
+    return areas
+
+
+def set_areas_many(areas):
+    """Upsert many areas in one transaction; see `utility.set_areas_many`."""
+    if not areas:
+        return {"upserted": 0, "modified": 0}
+    now = time.time()
+    try:
+        with _transaction() as conn:
+            before = conn.execute("SELECT COUNT(*) FROM areas").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO areas (id, location, area_name, polygon_zone, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (location, area_name) DO UPDATE "
+                "SET polygon_zone = excluded.polygon_zone, "
+                "updated_at = excluded.updated_at",
+                [
+                    (
+                        str(ObjectId()),
+                        area["location"],
+                        area["area_name"],
+                        json.dumps(area["polygon_zone"]),
+                        now,
+                    )
+                    for area in areas
+                ],
+            )
+            upserted = conn.execute("SELECT COUNT(*) FROM areas").fetchone()[0] - before
+        modified = len(areas) - upserted
+        logger.info(f"Areas bulk upserted: {upserted} inserted, {modified} modified")
+        return {"upserted": upserted, "modified": modified}
+    except Exception as e:
+        logger.error(f"Error bulk upserting areas: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def delete_areas_many(areas):
+    """Delete many areas in one transaction; see `utility.delete_areas_many`."""
+    if not areas:
+        return {"deleted": 0}
+    try:
+        with _transaction() as conn:
+            deleted = conn.executemany(
+                "DELETE FROM areas WHERE location = ? AND area_name = ?",
+                [(area["location"], area["area_name"]) for area in areas],
+            ).rowcount
+        logger.info(f"Areas bulk deleted: {deleted}")
+        return {"deleted": deleted}
+    except Exception as e:
+        logger.error(f"Error bulk deleting areas: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# COUNTS
+#
+# One row per measurement; the per-person references that Mongo keeps in
+# `count_people` are a JSON column of the same row.
+
+
+def _count(row):
+    """A count row in the shape of `utility._count_document`."""
+    refs = json.loads(row["refs"])
+    return {
+        "_id": ObjectId(row["id"]),
+        "location": row["location"],
+        "area_id": row["area_id"],
+        "in": row["in"],
+        "out": row["out"],
+        "in_people_id": [ObjectId(i) for i in refs["in_people_id"]],
+        "out_people_id": [ObjectId(i) for i in refs["out_people_id"]],
+        "in_people_tracker_id": refs["in_people_tracker_id"],
+        "out_people_tracker_id": refs["out_people_tracker_id"],
+        "in_people_occurrences": refs["in_people_occurrences"],
+        "timestamp": _datetime(row["timestamp"]),
+        "written_at": _datetime(row["written_at"]),
+        "trace_id": row["trace_id"],
+    }
+
+
+def get_count_live():
+    """Get the latest count; see `utility.get_count_live`."""
+    try:
+        row = (
+            _connection()
+            .execute("SELECT * FROM counts ORDER BY timestamp DESC LIMIT 1")
+            .fetchone()
+        )
+        if row is not None:
+            return _count(row)
+    except Exception as e:
+        logger.error(f"Error retrieving latest counts: {str(e)}")
+        return SynapsisResponse.NOT_FOUND
+
+
+def get_count(
+    start_time: str = None, end_time: str = None, page: int = 1, limit: int = 10
+):
+    """Get a page of counts, newest first; see `utility.get_count`."""
+    page = int(page)
+    limit = int(limit)
+    clauses, params = _range("timestamp", start_time, end_time, end_inclusive=True)
+    where = _where(clauses)
+    try:
+        conn = _connection()
+        rows = conn.execute(
+            f"SELECT * FROM counts{where} ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            (*params, limit, (page - 1) * limit),
+        ).fetchall()
+        data = [_count(row) for row in rows]
+        total_records = conn.execute(
+            f"SELECT COUNT(*) FROM counts{where}", params
+        ).fetchone()[0]
+        logger.debug(
+            "Retrieved counts: page={}, limit={}, total_records={}",
+            page,
+            limit,
+            total_records,
+        )
+        return {
+            "page": page,
+            "limit": limit,
+            "total_in": sum(d["in"] for d in data),
+            "total_out": sum(d["out"] for d in data),
+            "total_records": total_records,
+            "data": data,
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving counts: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_count_by_tracker_id(tracker_id):
+    """Number of people records of a tracker ID."""
+    return get_count_by_tracker_ids([tracker_id])[f"{tracker_id}"]
+
+
+def get_count_by_tracker_ids(tracker_ids):
+    """Number of people records per tracker ID; see `utility.get_count_by_tracker_ids`."""
+    counts = {f"{tracker_id}": 0 for tracker_id in tracker_ids}
+    if not counts:
+        return counts
+    rows = _connection().execute(
+        "SELECT tracker_id, COUNT(*) AS n FROM people "
+        f"WHERE tracker_id IN ({','.join('?' * len(counts))}) GROUP BY tracker_id",
+        list(counts),
+    )
+    for row in rows:
+        counts[row["tracker_id"]] = row["n"]
+    return counts
+
+
+def set_counts(
+    area_id,
+    in_num,
+    out_num,
+    in_people_id,
+    out_people_id,
+    in_people_tracker_id,
+    out_people_tracker_id,
+    location=None,
+    captured_at=None,
+    trace_id=None,
+):
+    """Insert a count record; see `utility.set_counts`."""
+    try:
+        counts_by_tracker_id = get_count_by_tracker_ids(in_people_tracker_id)
+        refs = {
+            "in_people_id": [str(i) for i in in_people_id],
+            "out_people_id": [str(i) for i in out_people_id],
+            "in_people_tracker_id": in_people_tracker_id,
+            "out_people_tracker_id": out_people_tracker_id,
+            "in_people_occurrences": counts_by_tracker_id,
+        }
+        with _transaction() as conn:
+            conn.execute(
+                'INSERT INTO counts (id, location, area_id, "in", "out", timestamp, '
+                "written_at, trace_id, refs) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(ObjectId()),
+                    location,
+                    area_id,
+                    in_num,
+                    out_num,
+                    _capture_timestamp(captured_at).timestamp(),
+                    time.time(),
+                    trace_id,
+                    json.dumps(refs),
+                ),
+            )
+        logger.debug("Counts updated for area_id: {}", area_id)
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error updating counts: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# PEOPLE
+
+PEOPLE_INSERT = (
+    "INSERT INTO people (id, location, conf, bbox, tracker_id, snapshot, "
+    "timestamp, written_at, trace_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _person(row):
+    return {
+        "_id": ObjectId(row["id"]),
+        "location": row["location"],
+        "conf": row["conf"],
+        "bbox": _loads(row["bbox"]),
+        "tracker_id": row["tracker_id"],
+        "snapshot": _loads(row["snapshot"]),
+        "timestamp": _datetime(row["timestamp"]),
+        "written_at": _datetime(row["written_at"]),
+        "trace_id": row["trace_id"],
+    }
+
+
+def _insert_people(people_list):
+    """Insert people dicts in one transaction, adding `_id` and `timestamp` like pymongo."""
+    timestamp = get_timestamp()
+    rows = []
+    for person in people_list:
+        person["timestamp"] = timestamp
+        person.setdefault("_id", ObjectId())
+        rows.append(
+            (
+                str(person["_id"]),
+                person.get("location"),
+                person.get("conf"),
+                _dumps(person.get("bbox")),
+                person.get("tracker_id"),
+                _dumps(person.get("snapshot")),
+                timestamp.timestamp(),
+                None,
+                None,
+            )
+        )
+    with _transaction() as conn:
+        conn.executemany(PEOPLE_INSERT, rows)
+    return [person["_id"] for person in people_list]
+
+
+def set_people(conf, bbox, tracker_id, snapshot):
+    """Insert a single person record; see `utility.set_people`."""
+    try:
+        inserted_id = _insert_people(
+            [
+                {
+                    "conf": conf,
+                    "bbox": bbox,
+                    "tracker_id": tracker_id,
+                    "snapshot": snapshot,
+                }
+            ]
+        )[0]
+        logger.debug("People inserted with id: {}", inserted_id)
+        return inserted_id
+    except Exception as e:
+        logger.error(f"Error inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_many(people_list):
+    """Insert multiple people records; see `utility.set_people_many`."""
+    try:
+        inserted_ids = _insert_people(people_list)
+        logger.debug("People inserted: {} records", len(inserted_ids))
+        return inserted_ids
+    except Exception as e:
+        logger.error(f"Error inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_bulk_write(people_list, ordered=False):
+    """Insert multiple people records; see `utility.set_people_bulk_write`."""
+    try:
+        _insert_people(people_list)
+        logger.debug("People bulk inserted: {} records", len(people_list))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error in bulk inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_columns(
+    location, conf, bbox, tracker_id, snapshot, captured_at=None, trace_id=None
+):
+    """Insert people records given as columns; see `utility.set_people_columns`."""
+    try:
+        timestamp = _capture_timestamp(captured_at).timestamp()
+        written_at = time.time()
+        ids = [ObjectId() for _ in range(len(tracker_id))]
+        with _transaction() as conn:
+            conn.executemany(
+                PEOPLE_INSERT,
+                [
+                    (
+                        str(_id),
+                        location,
+                        c,
+                        json.dumps(b),
+                        t,
+                        _dumps(s),
+                        timestamp,
+                        written_at,
+                        trace_id,
+                    )
+                    for _id, c, b, t, s in zip(ids, conf, bbox, tracker_id, snapshot)
+                ],
+            )
+        logger.debug("People inserted: {} records", len(ids))
+        return ids
+    except Exception as e:
+        logger.error(f"Error inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_snapshots(refs):
+    """Point the people records of tracks at their packed snapshot; see `utility.set_people_snapshots`."""
+    if not refs:
+        return SynapsisResponse.SUCCESS
+    try:
+        with _transaction() as conn:
+            conn.executemany(
+                "UPDATE people SET snapshot = ? WHERE tracker_id = ?",
+                [(json.dumps(ref), tracker_id) for tracker_id, ref in refs.items()],
+            )
+        logger.debug("Snapshot references set for {} tracks", len(refs))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error setting snapshot references: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_snapshot_ref(tracker_id):
+    """Get the packed snapshot reference of a track; see `utility.get_snapshot_ref`."""
+    try:
+        row = (
+            _connection()
+            .execute(
+                "SELECT snapshot FROM people WHERE tracker_id = ? "
+                "AND json_extract(snapshot, '$.object') IS NOT NULL "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (tracker_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return SynapsisResponse.NOT_FOUND
+        return json.loads(row["snapshot"])
+    except Exception as e:
+        logger.error(f"Error retrieving snapshot reference: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# EXPORT
+
+
+def _iter_batches(table, to_document, start_time, end_time, batch_size):
+    clauses, params = _range("timestamp", start_time, end_time)
+    cursor = _connection().execute(
+        f"SELECT * FROM {table}{_where(clauses)} ORDER BY timestamp", params
+    )
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [to_document(row) for row in rows]
+    finally:
+        cursor.close()
+
+
+def _count_measurement(row):
+    """A count row in the shape of a `counts_ts` document."""
+    return {
+        "_id": ObjectId(row["id"]),
+        "timestamp": _datetime(row["timestamp"]),
+        "meta": {"location": row["location"], "area_id": row["area_id"]},
+        "in": row["in"],
+        "out": row["out"],
+        "written_at": _datetime(row["written_at"]),
+        "trace_id": row["trace_id"],
+    }
+
+
+def iter_counts(start_time=None, end_time=None, batch_size=5000):
+    """Stream count measurements of a time range; see `utility.iter_counts`."""
+    yield from _iter_batches(
+        "counts", _count_measurement, start_time, end_time, batch_size
+    )
+
+
+def iter_people(start_time=None, end_time=None, batch_size=5000):
+    """Stream people records of a time range; see `utility.iter_people`."""
+    yield from _iter_batches("people", _person, start_time, end_time, batch_size)
+
+
+# ============================================================
+# HEATMAPS
+
+
+def set_heatmaps(heatmaps):
+    """Insert flushed heatmap buckets; see `utility.set_heatmaps`."""
+    try:
+        with _transaction() as conn:
+            conn.executemany(
+                "INSERT INTO heatmaps (location, area_id, bucket_start, "
+                "bucket_seconds, cell, shape, dtype, frames, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        h["location"],
+                        h["area_id"],
+                        _epoch(h["bucket_start"]),
+                        h["bucket_seconds"],
+                        h["cell"],
+                        json.dumps(h["shape"]),
+                        h["dtype"],
+                        h["frames"],
+                        h["data"],
+                    )
+                    for h in heatmaps
+                ],
+            )
+        logger.debug("Heatmap buckets inserted: {}", len(heatmaps))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error inserting heatmaps: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_heatmap(location, area_id="_camera", start_time=None, end_time=None):
+    """Merge the heatmap buckets of a camera or area; see `utility.get_heatmap`."""
+    clauses, params = _range("bucket_start", start_time, end_time, end_inclusive=True)
+    try:
+        rows = _connection().execute(
+            "SELECT * FROM heatmaps"
+            + _where(["location = ?", "area_id = ?", *clauses])
+            + " ORDER BY bucket_start",
+            (location, area_id, *params),
+        )
+        return _merge_heatmap(
+            location,
+            area_id,
+            (
+                {
+                    "bucket_start": _datetime(row["bucket_start"]),
+                    "cell": row["cell"],
+                    "shape": json.loads(row["shape"]),
+                    "dtype": row["dtype"],
+                    "frames": row["frames"],
+                    "data": row["data"],
+                }
+                for row in rows
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving heatmap: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# TRAJECTORIES
+#
+# Segments are stored as Mongo stores them; `trajectory_areas` has one row per
+# (segment, area) so the tracks of an area are an index range scan.
+
+
+def _overlap(prefix, start_time, end_time):
+    """SQL condition of segments overlapping [start_time, end_time)."""
+    clauses, params = [], []
+    if start_time is not None:
+        clauses.append(f'{prefix}"end" >= ?')
+        params.append(int(start_time))
+    if end_time is not None:
+        clauses.append(f"{prefix}start < ?")
+        params.append(int(end_time))
+    return clauses, params
+
+
+def _segment(row):
+    return {
+        "location": row["location"],
+        "tracker_id": row["tracker_id"],
+        "area_ids": json.loads(row["area_ids"]),
+        "start": _datetime(row["start"]),
+        "end": _datetime(row["end"]),
+        "x0": row["x0"],
+        "y0": row["y0"],
+        "n": row["n"],
+        "dt": row["dt"],
+        "dxy": row["dxy"],
+    }
+
+
+def set_trajectories(segments):
+    """Insert closed track segments; see `utility.set_trajectories`."""
+    try:
+        rows, areas = [], []
+        for s in segments:
+            segment_id = str(ObjectId())
+            start, end = _epoch(s["start"]), _epoch(s["end"])
+            rows.append(
+                (
+                    segment_id,
+                    s["location"],
+                    s["tracker_id"],
+                    json.dumps(s["area_ids"]),
+                    start,
+                    end,
+                    s["x0"],
+                    s["y0"],
+                    s["n"],
+                    json.dumps(s["box"]),
+                    s["encoding"],
+                    s["dt"],
+                    s["dxy"],
+                )
+            )
+            areas += [(segment_id, s["location"], a, start, end) for a in s["area_ids"]]
+        with _transaction() as conn:
+            conn.executemany(
+                "INSERT INTO trajectories (id, location, tracker_id, area_ids, start, "
+                '"end", x0, y0, n, box, encoding, dt, dxy) '
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT INTO trajectory_areas (segment_id, location, area_id, start, "
+                '"end") VALUES (?, ?, ?, ?, ?)',
+                areas,
+            )
+        logger.debug("Trajectory segments inserted: {}", len(segments))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error inserting trajectories: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_track(tracker_id, start_time=None, end_time=None):
+    """Get the path of one track; see `utility.get_track`."""
+    clauses, params = _overlap("", start_time, end_time)
+    try:
+        rows = _connection().execute(
+            "SELECT * FROM trajectories"
+            + _where(["tracker_id = ?", *clauses])
+            + " ORDER BY start",
+            (tracker_id, *params),
+        )
+        segments = [_segment(row) for row in rows]
+    except Exception as e:
+        logger.error(f"Error retrieving track: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+    return _track_document(tracker_id, segments)
+
+
+def get_tracks_in_area(
+    location, area_id, start_time=None, end_time=None, points=False, limit=100
+):
+    """Get the tracks that were inside an area; see `utility.get_tracks_in_area`."""
+    clauses, params = _overlap("a.", start_time, end_time)
+    try:
+        conn = _connection()
+        tracks = [
+            {
+                "_id": row["tracker_id"],
+                "start": _datetime(row["start"]),
+                "end": _datetime(row["end"]),
+                "segments": row["segments"],
+                "n": row["n"],
+            }
+            for row in conn.execute(
+                'SELECT s.tracker_id, MIN(s.start) AS start, MAX(s."end") AS "end", '
+                "COUNT(*) AS segments, SUM(s.n) AS n FROM trajectory_areas a "
+                "JOIN trajectories s ON s.id = a.segment_id"
+                + _where(["a.location = ?", "a.area_id = ?", *clauses])
+                + " GROUP BY s.tracker_id ORDER BY start LIMIT ?",
+                (location, area_id, *params, limit),
+            )
+        ]
+        paths = {}
+        if points and tracks:
+            window, window_params = _overlap("", start_time, end_time)
+            ids = [t["_id"] for t in tracks]
+            for row in conn.execute(
+                "SELECT * FROM trajectories"
+                + _where([f"tracker_id IN ({','.join('?' * len(ids))})", *window])
+                + " ORDER BY start",
+                (*ids, *window_params),
+            ):
+                paths.setdefault(row["tracker_id"], []).extend(
+                    decode_trajectory(_segment(row))
+                )
+    except Exception as e:
+        logger.error(f"Error retrieving tracks in area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+    return _track_summaries(tracks, paths, points)
+
+
+# ============================================================
+# FRESHNESS
+
+
+def set_freshness(location, report):
+    """Store the latest lag report of a camera; see `utility.set_freshness`."""
+    try:
+        with _transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO freshness (location, report, updated_at) "
+                "VALUES (?, ?, ?)",
+                (location, json.dumps(report), time.time()),
+            )
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error storing freshness of {location}: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_freshness(location=None):
+    """Latest lag reports, of one location or all; see `utility.get_freshness`."""
+    query, params = "SELECT * FROM freshness", ()
+    if location is not None:
+        query, params = query + " WHERE location = ?", (location,)
+    try:
+        return [
+            {
+                **json.loads(row["report"]),
+                "location": row["location"],
+                "updated_at": _datetime(row["updated_at"]),
+            }
+            for row in _connection().execute(query, params)
+        ]
+    except Exception as e:
+        logger.error(f"Error retrieving freshness: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# ALERTS
+
+
+def set_alert_events(events):
+    """Insert alert events; see `utility.set_alert_events`."""
+    try:
+        with _transaction() as conn:
+            conn.executemany(
+                "INSERT INTO alerts (location, area_id, status, timestamp, event) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        event["location"],
+                        event["area_id"],
+                        event["status"],
+                        event["epoch_ms"] / 1000,
+                        json.dumps(event),
+                    )
+                    for event in events
+                ],
+            )
+        logger.debug("Alert events inserted: {}", len(events))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error inserting alert events: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_alerts(
+    location=None, area_id=None, status=None, start_time=None, end_time=None, limit=100
+):
+    """Get the latest alert events, newest first; see `utility.get_alerts`."""
+    clauses, params = _range("timestamp", start_time, end_time)
+    for field, value in (
+        ("location", location),
+        ("area_id", area_id),
+        ("status", status),
+    ):
+        if value is not None:
+            clauses.append(f"{field} = ?")
+            params.append(value)
+    try:
+        rows = _connection().execute(
+            f"SELECT event FROM alerts{_where(clauses)} "
+            "ORDER BY timestamp DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [json.loads(row["event"]) for row in rows]
+    except Exception as e:
+        logger.error(f"Error retrieving alerts: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# OBJECTS
+#
+# Objects keep their MinIO names, '<bucket>/<path>', as files under
+# EMBEDDED_DIR/objects; the function names stay those of the MinIO backend.
+
+
+def _object_path(object_name):
+    if "/" not in object_name:
+        raise ValueError("object_name must be in format '<bucket>/<path/to/object>'")
+    path = os.path.normpath(os.path.join(EMBEDDED_OBJECTS, object_name))
+    if not path.startswith(EMBEDDED_OBJECTS + os.sep):
+        raise ValueError(f"object_name escapes the object store: {object_name}")
+    return path
+
+
+def _write_object(object_name, write):
+    """Write an object through a temporary file, so readers never see a partial one."""
+    path = _object_path(object_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def upload_ndarray_to_minio(object_name, ndarray_image, expire_days=7, fmt="JPEG"):
+    """Store a NumPy ndarray image as a local file.
+
+    Args:
+        object_name (str): '<bucket>/<path>' of the object.
+        ndarray_image (np.ndarray): The image as a NumPy ndarray.
+        expire_days (int, optional): Unused; local files do not expire.
+        fmt (str, optional): Image format (e.g., 'JPEG', 'PNG'). Defaults to 'JPEG'.
+    Returns:
+        str: file:// URL of the stored image or SynapsisResponse.SERVER_ERROR on failure
+    """
+    try:
+        image_bytes = BytesIO()
+        Image.fromarray(ndarray_image).save(image_bytes, format=fmt)
+        path = _write_object(object_name, lambda f: f.write(image_bytes.getbuffer()))
+        return Path(path).as_uri()
+    except Exception as e:
+        logger.error(f"Failed to store image: {e}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def upload_bytes_to_minio(object_name, data, content_type="application/octet-stream"):
+    """Store raw bytes as a local file; see `utility.upload_bytes_to_minio`."""
+    try:
+        _write_object(object_name, lambda f: f.write(data))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Failed to store object: {e}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def upload_file_to_minio(object_name, path, content_type="application/octet-stream"):
+    """Copy a local file into the object store; see `utility.upload_file_to_minio`."""
+    try:
+        with open(path, "rb") as src:
+            _write_object(object_name, lambda f: shutil.copyfileobj(src, f))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Failed to store file: {e}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_object_range_from_minio(object_name, offset, length):
+    """Read a byte range of a stored object; see `utility.get_object_range_from_minio`."""
+    try:
+        with open(_object_path(object_name), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+    except Exception as e:
+        logger.error(f"Failed to read object range: {e}")
+        return SynapsisResponse.SERVER_ERROR
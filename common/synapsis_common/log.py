@@ -0,0 +1,231 @@
+# Built-in imports
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import signal
+import threading
+import traceback
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+
+LEVELS = ("TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL")
+TEXT_LINE = "{time} | {level: <8} | {name}:{function}:{line} - {message}{extra}"
+
+
+class BackgroundSink:
+    """Loguru sink that formats and writes records on its own thread.
+
+    The logging thread only queues the record; text or JSON formatting and
+    the write happen in the background. When the queue is full records are
+    dropped and counted instead of blocking the caller.
+
+    Args:
+        stream (file, optional): Output stream. Defaults to sys.stdout.
+        json_output (bool, optional): One JSON object per line. Defaults to False.
+        max_queue (int, optional): Records buffered before dropping. Defaults to 10000.
+    """
+
+    def __init__(self, stream=None, json_output=False, max_queue=10000):
+        self.stream = stream or sys.stdout
+        self.json_output = json_output
+        self.records = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def write(self, message):
+        try:
+            self.records.put_nowait(message.record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _loop(self):
+        while True:
+            record = self.records.get()
+            if record is None:
+                break
+            try:
+                self.stream.write(self.format(record))
+                if self.records.empty():
+                    self.stream.flush()
+            except Exception:
+                # A broken stream must not take the logging thread down
+                pass
+
+    def format(self, record):
+        extra = {
+            k: v for k, v in record["extra"].items() if k not in ("sample", "rate")
+        }
+        exception = record["exception"]
+        error = (
+            "".join(traceback.format_exception(*exception))
+            if exception is not None
+            else None
+        )
+        if self.json_output:
+            document = {
+                "time": record["time"].isoformat(),
+                "level": record["level"].name,
+                "message": record["message"],
+                "logger": record["name"],
+                "function": record["function"],
+                "line": record["line"],
+                "process": record["process"].id,
+                "thread": record["thread"].name,
+            }
+            if extra:
+                document["extra"] = extra
+            if error:
+                document["exception"] = error
+            return json.dumps(document, default=str) + "\n"
+        line = TEXT_LINE.format(
+            time=record["time"].strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            level=record["level"].name,
+            name=record["name"],
+            function=record["function"],
+            line=record["line"],
+            message=record["message"],
+            extra=f" {extra}" if extra else "",
+        )
+        return line + "\n" + (error or "")
+
+    def stop(self, timeout=5.0):
+        try:
+            self.records.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+
+class LogGate:
+    """Per call-site rate limit and sampling, applied as a loguru filter.
+
+    Records below INFO are sampled (`sample` is the kept fraction, spread
+    evenly rather than at random). Every call site may then emit at most
+    `rate` records per second with bursts of `burst`; the next record that
+    passes carries the number suppressed in between. Calls can override
+    both with `logger.bind(sample=..., rate=...)`.
+
+    Args:
+        rate (float, optional): Records per second per call site; 0 disables. Defaults to 10.
+        burst (int, optional): Records a call site may emit at once. Defaults to 20.
+        sample (float, optional): Fraction of DEBUG/TRACE records kept. Defaults to 1.
+    """
+
+    def __init__(self, rate=10.0, burst=20, sample=1.0):
+        self.rate = rate
+        self.burst = burst
+        self.sample = sample
+        self.sites = {}
+        self.suppressed = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, record):
+        extra = record["extra"]
+        sample = extra.get("sample", self.sample if record["level"].no < 20 else 1.0)
+        rate = extra.get("rate", self.rate)
+        now = time.monotonic()
+        key = (record["name"], record["line"])
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None:
+                # [tokens, last refill, calls, suppressed]
+                site = self.sites[key] = [float(self.burst), now, 0, 0]
+            site[2] += 1
+            if sample < 1.0 and int(site[2] * sample) == int((site[2] - 1) * sample):
+                return False
+            if rate:
+                site[0] = min(self.burst, site[0] + (now - site[1]) * rate)
+                site[1] = now
+                if site[0] < 1.0:
+                    site[3] += 1
+                    self.suppressed += 1
+                    return False
+                site[0] -= 1.0
+            if site[3]:
+                extra["suppressed"], site[3] = site[3], 0
+        return True
+
+
+_state = {"sink": None, "gate": None, "handler": None, "level": "INFO", "base": "INFO"}
+
+
+def configure_logging(level=None, json_output=None, stream=None):
+    """Send loguru records through a background sink with rate limiting.
+
+    Settings default to LOG_LEVEL (INFO), LOG_JSON (False), LOG_RATE_LIMIT
+    (records/second per call site, 10), LOG_BURST (20) and LOG_SAMPLE (kept
+    fraction of DEBUG/TRACE records, 1). Replaces any existing sinks.
+    """
+    logger.remove()
+    if _state["sink"] is not None:
+        _state["sink"].stop()
+    _state["sink"] = BackgroundSink(
+        stream=stream,
+        json_output=(
+            os.getenv("LOG_JSON", "False") == "True"
+            if json_output is None
+            else json_output
+        ),
+    )
+    _state["gate"] = LogGate(
+        rate=float(os.getenv("LOG_RATE_LIMIT", "10")),
+        burst=int(os.getenv("LOG_BURST", "20")),
+        sample=float(os.getenv("LOG_SAMPLE", "1")),
+    )
+    _state["base"] = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    _state["handler"] = None
+    set_log_level(_state["base"])
+    atexit.register(_state["sink"].stop)
+    return _state["sink"]
+
+
+def set_log_level(level):
+    """Change the level of the configured sink at runtime.
+
+    The handler is re-added, so records under the level are discarded by
+    loguru before their message is formatted.
+    """
+    level = level.upper()
+    if level not in LEVELS:
+        raise ValueError(f"Unknown log level {level}, expected one of {LEVELS}")
+    if _state["handler"] is not None:
+        logger.remove(_state["handler"])
+    # A plain function sink: loguru does not stop the shared background thread
+    _state["handler"] = logger.add(
+        _state["sink"].write, level=level, format="{message}", filter=_state["gate"]
+    )
+    _state["level"] = level
+    logger.info(f"Log level set to {level}")
+
+
+def get_log_level():
+    return _state["level"]
+
+
+def log_stats():
+    sink, gate = _state["sink"], _state["gate"]
+    return {
+        "level": _state["level"],
+        "queued": sink.records.qsize() if sink else 0,
+        "dropped": sink.dropped if sink else 0,
+        "suppressed": gate.suppressed if gate else 0,
+    }
+
+
+def install_level_toggle(debug_level="DEBUG"):
+    """Switch between the configured level and `debug_level` on SIGUSR2."""
+
+    def toggle(*_):
+        # Not from the signal handler: re-adding a sink takes loguru's lock
+        target = debug_level if _state["level"] == _state["base"] else _state["base"]
+        threading.Thread(target=set_log_level, args=(target,), daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR2, toggle)
@@ -0,0 +1,1646 @@
+# Built-in imports
+import re
+import os
+import time
+import zlib
+from enum import Enum
+from io import BytesIO
+from bson import ObjectId
+from dateutil import parser as _dateutil_parser
+from datetime import datetime, timezone, timedelta
+
+# Third-party imports
+import numpy as np
+from PIL import Image
+from loguru import logger
+from pymongo import (
+    ReadPreference,
+    ASCENDING,
+    DESCENDING,
+    UpdateOne,
+    UpdateMany,
+    DeleteOne,
+    ReturnDocument,
+)
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+from minio.error import S3Error
+from minio.commonconfig import CopySource
+
+# Local imports
+from synapsis_common.clients import (
+    mo_client,
+    mo_synapsis_db,
+    minio_client,
+    areas_collection,
+    telemetry_collection,
+    leases_collection,
+    retry_read,
+    STORAGE_BACKEND,
+)
+
+
+class SynapsisResponse(Enum):
+    NOT_FOUND = "Resource not found"
+    UNAUTHORIZED = "Unauthorized access"
+    BAD_REQUEST = "Bad request"
+    INVALID_INPUT = "Invalid input"
+    SERVER_ERROR = "Internal server error"
+    FORBIDDEN = "Forbidden"
+    SUCCESS = "Operation completed successfully"
+
+
+# MongoDB collections, each with the write concern of its traffic class
+mo_synapsis_areas = areas_collection("areas")
+mo_synapsis_people = telemetry_collection("people")
+mo_synapsis_counts = telemetry_collection("counts")  # legacy layout
+mo_synapsis_counts_ts = telemetry_collection("counts_ts")
+mo_synapsis_count_people = telemetry_collection("count_people")
+mo_synapsis_heatmaps = telemetry_collection("heatmaps")
+mo_synapsis_alerts = telemetry_collection("alerts")
+mo_synapsis_trajectories = telemetry_collection("trajectories")
+mo_synapsis_freshness = telemetry_collection("freshness")
+mo_synapsis_cameras = areas_collection("cameras")
+mo_synapsis_camera_leases = leases_collection("camera_leases")
+mo_synapsis_workers = leases_collection("workers")
+
+# Retention (days) for the time-series counts, their people references and people
+COUNTS_RETENTION_DAYS = int(os.getenv("COUNTS_RETENTION_DAYS", "30"))
+PEOPLE_RETENTION_DAYS = int(os.getenv("PEOPLE_RETENTION_DAYS", "30"))
+HEATMAP_RETENTION_DAYS = int(os.getenv("HEATMAP_RETENTION_DAYS", "90"))
+ALERT_RETENTION_DAYS = int(os.getenv("ALERT_RETENTION_DAYS", "30"))
+TRAJECTORY_RETENTION_DAYS = int(
+    os.getenv("TRAJECTORY_RETENTION_DAYS", str(PEOPLE_RETENTION_DAYS))
+)
+# Target age (seconds) of live data, from frame capture to the API
+FRESHNESS_SLO_SECONDS = float(os.getenv("FRESHNESS_SLO_SECONDS", "10"))
+
+
+def get_epoch_ms_iso_utc():
+    # Epoch timestamp (milliseconds)
+    epoch_ms = int(time.time() * 1000)
+    # ISO 8601 UTC timestamp
+    iso_utc = get_timestamp()
+    return epoch_ms, iso_utc
+
+
+def get_timestamp():
+    now_utc = datetime.now(timezone.utc)
+    return now_utc
+
+
+def _capture_timestamp(captured_at):
+    """Frame capture time (epoch seconds) as a UTC datetime; now if unknown."""
+    if captured_at is None:
+        return get_timestamp()
+    return datetime.fromtimestamp(captured_at, tz=timezone.utc)
+
+
+def get_timestamp_for_filename():
+    # WIB timezone (UTC+7) Indonesia Western Standard Time
+    WIB = timezone(timedelta(hours=7))
+    now_wib = datetime.now(WIB).strftime("%Y%m%d_%H%M%S")
+    return now_wib
+
+
+# ============================================================
+# AREAS
+
+
+def ensure_area_indexes():
+    """Create the unique (location, area_name) index the area CRUD relies on."""
+    mo_synapsis_areas.create_index(
+        [("location", ASCENDING), ("area_name", ASCENDING)], unique=True
+    )
+
+
+@retry_read
+def get_area_names_based_on_location(location):
+    areas = mo_synapsis_areas.find({"location": location}, {"_id": 0, "area_name": 1})
+    return [area["area_name"] for area in areas]
+
+
+def check_area_exists(location, area_name):
+    query_filter = {"location": location, "area_name": area_name}
+    return mo_synapsis_areas.count_documents(query_filter, limit=1) > 0
+
+
+def delete_area(location, area_name):
+    """Delete an area from the database.
+
+    Args:
+        location (str): The location of the area.
+        area_name (str): The name of the area to delete.
+    """
+    query_filter = {"location": location, "area_name": area_name}
+    try:
+        result = mo_synapsis_areas.delete_one(query_filter)
+        if result.deleted_count == 0:
+            logger.warning(f"Area not found: `{area_name}` at location `{location}`")
+            return SynapsisResponse.NOT_FOUND
+        logger.info(f"Area deleted: `{area_name}` at location `{location}`")
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error deleting area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def update_area(location, area_name, polygon_zone):
+    """Set or update an area in the database.
+
+    Args:
+        location (str): The location of the area.
+        area_name (str): The name of the area to update.
+        polygon_zone (list): The polygon zone coordinates.
+            example:
+            location = "kepatihan"
+            area_name = "depan_gedung"
+            polygon_zone = [[735, 721], [1389, 682], [1757, 804], [891, 902]]
+    """
+    query_filter = {"location": location, "area_name": area_name}
+    update_operation = {
+        "$set": {"polygon_zone": polygon_zone, "updated_at": get_timestamp()}
+    }
+    try:
+        result = mo_synapsis_areas.update_one(query_filter, update_operation)
+        if result.matched_count == 0:
+            logger.warning(f"Area not found: `{area_name}` at location `{location}`")
+            return SynapsisResponse.NOT_FOUND
+        logger.info(f"Area updated: `{area_name}` at location `{location}`")
+        logger.debug(f"Updated polygon_zone: {polygon_zone}")
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error updating area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_area(location, area_name, polygon_zone):
+    """Set or update an area in the database.
+
+    Args:
+        location (str): The location of the area.
+        area_name (str): The name of the area to set.
+        polygon_zone (list): The polygon zone coordinates.
+            example:
+            location = "kepatihan"
+            area_name = "depan_gedung"
+            polygon_zone = [[735, 721], [1389, 682], [1757, 804], [891, 902]]
+    Returns:
+        SynapsisResponse: SUCCESS, BAD_REQUEST, or SERVER_ERROR
+    """
+    try:
+        mo_synapsis_areas.insert_one(
+            {
+                "location": location,
+                "area_name": area_name,
+                "polygon_zone": polygon_zone,
+                "updated_at": get_timestamp(),
+            }
+        )
+        logger.info(f"Area set: `{area_name}` at location `{location}`")
+        logger.debug(f"Polygon_zone: {polygon_zone}")
+        return SynapsisResponse.SUCCESS
+    except DuplicateKeyError:
+        logger.warning(f"Area already exists: `{area_name}` at location `{location}`")
+        return SynapsisResponse.BAD_REQUEST
+    except Exception as e:
+        logger.error(f"Error inserting area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_area(location, area_name):
+    """Get an area from the database.
+
+    Args:
+        location (str): The location of the area.
+        area_name (str): The name of the area.
+    Returns:
+        dict: The area details or an error response.
+    """
+    try:
+        area = retry_read(mo_synapsis_areas.find_one)(
+            {"location": location, "area_name": area_name}
+        )
+        logger.debug("Retrieved area `{}` at location `{}`", area_name, location)
+        if area is None:
+            logger.warning(f"Area not found: `{area_name}` at location `{location}`")
+            return SynapsisResponse.NOT_FOUND
+        return area
+    except Exception as e:
+        logger.error(f"Error retrieving area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+@retry_read
+def get_areas(location=None, fields=None):
+    """Get areas from the database.
+
+    Args:
+        location (str, optional): Only return areas of this location.
+        fields (list of str, optional): Only return these fields. Defaults to all.
+    Returns:
+        list of dict: The areas, without `_id`.
+    """
+    query_filter = {} if location is None else {"location": location}
+    projection = {"_id": 0}
+    if fields:
+        projection.update({field: 1 for field in fields})
+    return list(mo_synapsis_areas.find(query_filter, projection))
+
+
+def set_areas_many(areas):
+    """Upsert many areas in a single bulk write.
+
+    Args:
+        areas (list of dict): Each dict should contain keys:
+            'location', 'area_name', 'polygon_zone'.
+    Returns:
+        dict: Number of inserted (`upserted`) and `modified` areas, or
+            SynapsisResponse.SERVER_ERROR on failure
+    """
+    timestamp = get_timestamp()
+    requests = [
+        UpdateOne(
+            {"location": area["location"], "area_name": area["area_name"]},
+            {"$set": {"polygon_zone": area["polygon_zone"], "updated_at": timestamp}},
+            upsert=True,
+        )
+        for area in areas
+    ]
+    if not requests:
+        return {"upserted": 0, "modified": 0}
+    try:
+        result = mo_synapsis_areas.bulk_write(requests, ordered=False)
+        logger.info(
+            f"Areas bulk upserted: {result.upserted_count} inserted, "
+            f"{result.modified_count} modified"
+        )
+        return {"upserted": result.upserted_count, "modified": result.modified_count}
+    except Exception as e:
+        logger.error(f"Error bulk upserting areas: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def delete_areas_many(areas):
+    """Delete many areas in a single bulk write.
+
+    Args:
+        areas (list of dict): Each dict should contain keys: 'location', 'area_name'.
+    Returns:
+        dict: Number of `deleted` areas, or SynapsisResponse.SERVER_ERROR on failure
+    """
+    requests = [
+        DeleteOne({"location": area["location"], "area_name": area["area_name"]})
+        for area in areas
+    ]
+    if not requests:
+        return {"deleted": 0}
+    try:
+        result = mo_synapsis_areas.bulk_write(requests, ordered=False)
+        logger.info(f"Areas bulk deleted: {result.deleted_count}")
+        return {"deleted": result.deleted_count}
+    except Exception as e:
+        logger.error(f"Error bulk deleting areas: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# COUNTS
+#
+# Counts live in the `counts_ts` time-series collection, one measurement per
+# capture with metaField `meta` = {location, area_id}. The per-person references
+# (people ObjectIds, tracker ids, occurrences) go to `count_people`, keyed by the
+# same `_id`, so the time-series buckets only hold small fixed-size documents.
+# `count_people` keeps those arrays as the legacy `counts` documents had them;
+# only the measurements are compacted.
+
+
+def ensure_count_collections():
+    """Create the time-series counts layout and retention indexes if missing.
+
+    Safe to call on every start-up; retention is re-applied from the environment.
+    """
+    db = mo_synapsis_db
+    counts_expire = COUNTS_RETENTION_DAYS * 86400
+    try:
+        db.create_collection(
+            "counts_ts",
+            timeseries={
+                "timeField": "timestamp",
+                "metaField": "meta",
+                "granularity": "seconds",
+            },
+            expireAfterSeconds=counts_expire,
+        )
+        logger.info("Created time-series collection `counts_ts`")
+    except CollectionInvalid:
+        db.command("collMod", "counts_ts", expireAfterSeconds=counts_expire)
+
+    mo_synapsis_counts_ts.create_index([("timestamp", DESCENDING)])
+    mo_synapsis_counts_ts.create_index(
+        [("meta.area_id", ASCENDING), ("timestamp", DESCENDING)]
+    )
+    _ensure_ttl_index(mo_synapsis_count_people, "timestamp", counts_expire)
+    _ensure_ttl_index(mo_synapsis_people, "timestamp", PEOPLE_RETENTION_DAYS * 86400)
+    mo_synapsis_people.create_index([("tracker_id", ASCENDING)])
+
+
+def _ensure_ttl_index(collection, field, expire_after_seconds):
+    index_name = f"{field}_ttl"
+    existing = collection.index_information().get(index_name)
+    if existing and existing.get("expireAfterSeconds") != expire_after_seconds:
+        collection.database.command(
+            "collMod",
+            collection.name,
+            index={"name": index_name, "expireAfterSeconds": expire_after_seconds},
+        )
+    elif not existing:
+        collection.create_index(
+            [(field, ASCENDING)],
+            name=index_name,
+            expireAfterSeconds=expire_after_seconds,
+        )
+
+
+def _count_document(count, refs):
+    """Join a `counts_ts` measurement with its `count_people` references.
+
+    The result keeps the shape of the legacy `counts` documents. ObjectIds are
+    left as they are; the API's response encoder turns them into strings.
+    """
+    refs = refs or {}
+    return {
+        "_id": count["_id"],
+        "location": count["meta"].get("location"),
+        "area_id": count["meta"]["area_id"],
+        "in": count["in"],
+        "out": count["out"],
+        "in_people_id": refs.get("in_people_id", []),
+        "out_people_id": refs.get("out_people_id", []),
+        "in_people_tracker_id": refs.get("in_people_tracker_id", []),
+        "out_people_tracker_id": refs.get("out_people_tracker_id", []),
+        "in_people_occurrences": refs.get("in_people_occurrences", {}),
+        "timestamp": count["timestamp"],
+        "written_at": count.get("written_at"),
+        "trace_id": count.get("trace_id"),
+    }
+
+
+def get_count_live():
+    """Get the latest count from the database.
+
+    Returns:
+        dict: The latest count data
+    """
+    try:
+        doc = retry_read(mo_synapsis_counts_ts.find_one)(sort=[("timestamp", -1)])
+        if doc:
+            refs = mo_synapsis_count_people.find_one({"_id": doc["_id"]})
+            return _count_document(doc, refs)
+    except Exception as e:
+        logger.error(f"Error retrieving latest counts: {str(e)}")
+        return SynapsisResponse.NOT_FOUND
+
+
+# Then reuse the get_count from earlier but keep the improved normalization:
+def get_count(
+    start_time: str = None, end_time: str = None, page: int = 1, limit: int = 10
+):
+    # Converted to int
+    page = int(page)
+    limit = int(limit)
+
+    query = {}
+    ts_query = {}
+    if start_time is not None:
+        start_time = int(start_time)
+        ts_query["$gte"] = datetime.fromtimestamp(start_time)
+    if end_time is not None:
+        end_time = int(end_time)
+        ts_query["$lte"] = datetime.fromtimestamp(end_time)
+    if ts_query:
+        query["timestamp"] = ts_query
+
+    skip = (page - 1) * limit
+
+    try:
+        counts = list(
+            mo_synapsis_counts_ts.find(query)
+            .sort("timestamp", -1)
+            .skip(skip)
+            .limit(limit)
+        )
+        refs = {
+            r["_id"]: r
+            for r in mo_synapsis_count_people.find(
+                {"_id": {"$in": [c["_id"] for c in counts]}}
+            )
+        }
+        data = [_count_document(c, refs.get(c["_id"])) for c in counts]
+        total_in = sum(d["in"] for d in data)
+        total_out = sum(d["out"] for d in data)
+
+        total_records = mo_synapsis_counts_ts.count_documents(query)
+        logger.debug(
+            "Retrieved counts: page={}, limit={}, total_records={}, query={}",
+            page,
+            limit,
+            total_records,
+            query,
+        )
+        return {
+            "page": page,
+            "limit": limit,
+            "total_in": total_in,
+            "total_out": total_out,
+            "total_records": total_records,
+            "data": data,
+        }
+    except Exception as e:
+        logger.error(f"Error retrieving counts: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_count_by_tracker_id(tracker_id):
+    """Get count data for a specific tracker ID.
+
+    Args:
+        tracker_id (str): The ID of the tracker.
+    Returns:
+        int: The count of occurrences for the given tracker ID.
+    """
+    logger.debug("Getting count for tracker_id: {}", tracker_id)
+    count = mo_synapsis_people.count_documents({"tracker_id": tracker_id})
+    return count
+
+
+@retry_read
+def get_count_by_tracker_ids(tracker_ids):
+    """Get the number of people records for several tracker IDs in one query.
+
+    Args:
+        tracker_ids (list of str): The tracker IDs.
+    Returns:
+        dict: Tracker ID to number of occurrences (0 for unseen IDs).
+    """
+    counts = {f"{tracker_id}": 0 for tracker_id in tracker_ids}
+    if not counts:
+        return counts
+    pipeline = [
+        {"$match": {"tracker_id": {"$in": list(counts)}}},
+        {"$group": {"_id": "$tracker_id", "n": {"$sum": 1}}},
+    ]
+    for row in mo_synapsis_people.aggregate(pipeline):
+        counts[row["_id"]] = row["n"]
+    return counts
+
+
+def set_counts(
+    area_id,
+    in_num,
+    out_num,
+    in_people_id,
+    out_people_id,
+    in_people_tracker_id,
+    out_people_tracker_id,
+    location=None,
+    captured_at=None,
+    trace_id=None,
+):
+    """
+    Insert a count record into the database.
+    Args:
+        area_id (str): The ID of the area.
+        in_num (int): Number of people detected entering the area.
+        out_num (int): Number of people detected exiting the area.
+        in_people_id (list of str or ObjectId): List of IDs of people who entered.
+        out_people_id (list of str or ObjectId): List of IDs of people who exited.
+        in_people_tracker_id (list of str): List of tracker IDs for people who entered.
+        out_people_tracker_id (list of str): List of tracker IDs for people who exited.
+        location (str, optional): The location of the area, stored in the metaField.
+        captured_at (float, optional): Capture time (epoch seconds) of the counted
+            frame, stored as `timestamp`. Defaults to now.
+        trace_id (str, optional): ID shared by the records of one capture.
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    try:
+        counts_by_tracker_id = get_count_by_tracker_ids(in_people_tracker_id)
+        count_id = ObjectId()
+        timestamp = _capture_timestamp(captured_at)
+        mo_synapsis_counts_ts.insert_one(
+            {
+                "_id": count_id,
+                "timestamp": timestamp,
+                "meta": {"location": location, "area_id": area_id},
+                "in": in_num,
+                "out": out_num,
+                "written_at": get_timestamp(),
+                "trace_id": trace_id,
+            }
+        )
+        mo_synapsis_count_people.insert_one(
+            {
+                "_id": count_id,
+                "timestamp": timestamp,
+                "in_people_id": [ObjectId(i) for i in in_people_id],
+                "out_people_id": [ObjectId(i) for i in out_people_id],
+                "in_people_tracker_id": in_people_tracker_id,
+                "out_people_tracker_id": out_people_tracker_id,
+                "in_people_occurrences": counts_by_tracker_id,
+            }
+        )
+        logger.debug("Counts updated for area_id: {}", area_id)
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error updating counts: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def migrate_counts_to_timeseries(batch_size=1000):
+    """Copy legacy `counts` documents into `counts_ts` + `count_people`.
+
+    Documents keep their `_id`, so re-running the migration skips what was
+    already copied to each collection; time-series collections don't enforce
+    unique `_id`s, so `counts_ts` is checked too. The legacy collection is left
+    untouched and can be dropped once the new layout is verified.
+
+    Args:
+        batch_size (int, optional): Documents per insert batch. Defaults to 1000.
+    Returns:
+        int: Number of migrated count documents.
+    """
+    ensure_count_collections()
+    area_locations = {
+        str(a["_id"]): a["location"]
+        for a in mo_synapsis_areas.find({}, {"location": 1})
+    }
+    migrated = 0
+    counts_batch, refs_batch = [], []
+
+    def flush():
+        nonlocal migrated
+        if not counts_batch:
+            return
+        ids = [c["_id"] for c in counts_batch]
+        # The time bounds let the time-series query skip unrelated buckets
+        in_range = {
+            "$gte": counts_batch[0]["timestamp"],
+            "$lte": counts_batch[-1]["timestamp"],
+        }
+        existing_counts = {
+            c["_id"]
+            for c in mo_synapsis_counts_ts.find(
+                {"_id": {"$in": ids}, "timestamp": in_range}, {"_id": 1}
+            )
+        }
+        existing_refs = {
+            r["_id"]
+            for r in mo_synapsis_count_people.find({"_id": {"$in": ids}}, {"_id": 1})
+        }
+        new_counts = [c for c in counts_batch if c["_id"] not in existing_counts]
+        new_refs = [r for r in refs_batch if r["_id"] not in existing_refs]
+        if new_counts:
+            mo_synapsis_counts_ts.insert_many(new_counts, ordered=False)
+        if new_refs:
+            mo_synapsis_count_people.insert_many(new_refs, ordered=False)
+        migrated += len(new_counts)
+        counts_batch.clear()
+        refs_batch.clear()
+
+    for doc in mo_synapsis_counts.find({}).sort("timestamp", 1).batch_size(batch_size):
+        area_id = str(doc["area_id"])
+        counts_batch.append(
+            {
+                "_id": doc["_id"],
+                "timestamp": doc["timestamp"],
+                "meta": {"location": area_locations.get(area_id), "area_id": area_id},
+                "in": doc.get("in", 0),
+                "out": doc.get("out", 0),
+            }
+        )
+        refs_batch.append(
+            {
+                "_id": doc["_id"],
+                "timestamp": doc["timestamp"],
+                "in_people_id": [ObjectId(i) for i in doc.get("in_people_id", [])],
+                "out_people_id": [ObjectId(i) for i in doc.get("out_people_id", [])],
+                "in_people_tracker_id": doc.get("in_people_tracker_id", []),
+                "out_people_tracker_id": doc.get("out_people_tracker_id", []),
+                "in_people_occurrences": doc.get("in_people_occurrences", {}),
+            }
+        )
+        if len(counts_batch) >= batch_size:
+            flush()
+            logger.info(f"Migrated {migrated} counts documents")
+    flush()
+    logger.info(f"Counts migration done: {migrated} documents")
+    return migrated
+
+
+# ============================================================
+# PEOPLE
+
+
+def set_people(conf, bbox, tracker_id, snapshot):
+    """Insert a single person record into the database.
+    Args:
+        conf (float): Confidence score of the detection.
+        bbox (list): Bounding box coordinates [x1, y1, x2, y2].
+        tracker_id (str): Unique tracker ID for the person.
+        snapshot (str): URL to the snapshot image.
+
+    Returns:
+        ObjectId: The ID of the inserted record or SynapsisResponse.SERVER_ERROR on failure
+    """
+    try:
+        result = mo_synapsis_people.insert_one(
+            {
+                "conf": conf,
+                "bbox": bbox,
+                "timestamp": get_timestamp(),
+                "tracker_id": tracker_id,
+                "snapshot": snapshot,
+            }
+        )
+        logger.debug("People inserted with id: {}", result.inserted_id)
+        return result.inserted_id
+    except Exception as e:
+        logger.error(f"Error inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_many(people_list):
+    """
+    Insert multiple people records into the database.
+
+    Args:
+        people_list (list of dict): Each dict should contain keys:
+            'conf', 'bbox', 'tracker_id', 'snapshot'.
+            Example:
+            [
+                {
+                    "conf": 0.98,
+                    "bbox": [100, 200, 300, 400],
+                    "tracker_id": "abc123",
+                    "snapshot": "http://example.com/snapshot1.jpg"
+                },
+                ...
+            ]
+    """
+    try:
+        # Add timestamp to each record
+        timestamp = get_timestamp()
+        for person in people_list:
+            person["timestamp"] = timestamp
+        result = mo_synapsis_people.insert_many(people_list)
+        logger.debug("People inserted: {} records", len(result.inserted_ids))
+        return result.inserted_ids
+    except Exception as e:
+        logger.error(f"Error inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_columns(
+    location, conf, bbox, tracker_id, snapshot, captured_at=None, trace_id=None
+):
+    """Insert people records given as columns, one entry per person.
+
+    IDs are generated client-side, so callers get them back without a
+    conversion pass over the driver's result.
+
+    Args:
+        location (str): Camera/location shared by every record.
+        conf (list of float): Detection confidences.
+        bbox (list of list): Bounding boxes [x1, y1, x2, y2].
+        tracker_id (list of str): Tracker IDs.
+        snapshot (list): Snapshot references (or None) per person.
+        captured_at (float, optional): Capture time (epoch seconds) of the frame,
+            stored as `timestamp`. Defaults to now.
+        trace_id (str, optional): ID shared by the records of one capture.
+    Returns:
+        list of ObjectId: The inserted IDs, in column order, or SynapsisResponse.SERVER_ERROR
+    """
+    try:
+        timestamp = _capture_timestamp(captured_at)
+        written_at = get_timestamp()
+        ids = [ObjectId() for _ in range(len(tracker_id))]
+        mo_synapsis_people.insert_many(
+            [
+                {
+                    "_id": _id,
+                    "location": location,
+                    "conf": c,
+                    "bbox": b,
+                    "timestamp": timestamp,
+                    "written_at": written_at,
+                    "trace_id": trace_id,
+                    "tracker_id": t,
+                    "snapshot": s,
+                }
+                for _id, c, b, t, s in zip(ids, conf, bbox, tracker_id, snapshot)
+            ]
+        )
+        logger.debug("People inserted: {} records", len(ids))
+        return ids
+    except Exception as e:
+        logger.error(f"Error inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_bulk_write(people_list, ordered=False):
+    """Insert multiple people records into the database.
+
+    Args:
+        people_list (list of dict): Each dict should contain keys:
+            'conf', 'bbox', 'tracker_id', 'snapshot'.
+            Example:
+            [
+                {
+                    "conf": 0.98,
+                    "bbox": [100, 200, 300, 400],
+                    "tracker_id": "abc123",
+                    "snapshot": "http://example.com/snapshot1.jpg"
+                },
+                ...
+            ]
+        ordered (bool): Whether the inserts should be ordered. Defaults to False.
+    """
+    try:
+        # Add timestamp to each record
+        timestamp = get_timestamp()
+        for person in people_list:
+            person["timestamp"] = timestamp
+        requests = [mo_synapsis_people.insert_one(i) for i in people_list]
+        mo_synapsis_people.bulk_write(requests, ordered=ordered)
+        logger.debug("People bulk inserted: {} records", len(people_list))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error in bulk inserting people: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def set_people_snapshots(refs):
+    """Point every people record of the given tracks at their packed snapshot.
+
+    Args:
+        refs (dict): Tracker ID to snapshot reference
+            {"object": "<bucket>/<path>", "offset": int, "length": int}.
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    if not refs:
+        return SynapsisResponse.SUCCESS
+    requests = [
+        UpdateMany({"tracker_id": tracker_id}, {"$set": {"snapshot": ref}})
+        for tracker_id, ref in refs.items()
+    ]
+    try:
+        mo_synapsis_people.bulk_write(requests, ordered=False)
+        logger.debug("Snapshot references set for {} tracks", len(refs))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error setting snapshot references: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_snapshot_ref(tracker_id):
+    """Get the packed snapshot reference of a track.
+
+    Args:
+        tracker_id (str): The tracker ID, e.g. "1758507330123_12".
+    Returns:
+        dict: {"object", "offset", "length"} or SynapsisResponse.NOT_FOUND
+    """
+    try:
+        person = retry_read(mo_synapsis_people.find_one)(
+            {"tracker_id": tracker_id, "snapshot.object": {"$exists": True}},
+            {"_id": 0, "snapshot": 1},
+            sort=[("timestamp", -1)],
+        )
+        if person is None:
+            return SynapsisResponse.NOT_FOUND
+        return person["snapshot"]
+    except Exception as e:
+        logger.error(f"Error retrieving snapshot reference: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# EXPORT
+
+
+def _epoch_range_query(field, start_time, end_time):
+    query = {}
+    if start_time is not None:
+        query["$gte"] = datetime.fromtimestamp(int(start_time), tz=timezone.utc)
+    if end_time is not None:
+        query["$lt"] = datetime.fromtimestamp(int(end_time), tz=timezone.utc)
+    return {field: query} if query else {}
+
+
+def _iter_batches(collection, query, projection, batch_size):
+    # Exports read from a secondary when there is one, so they stay off the
+    # primary that serves the inference writes and the live endpoints.
+    cursor = (
+        collection.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
+        .find(query, projection)
+        .sort("timestamp", ASCENDING)
+        .batch_size(batch_size)
+    )
+    batch = []
+    try:
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        cursor.close()
+
+
+def iter_counts(start_time=None, end_time=None, batch_size=5000):
+    """Stream `counts_ts` measurements of a time range in bounded batches.
+
+    Args:
+        start_time (str, optional): Start timestamp (epoch seconds), inclusive.
+        end_time (str, optional): End timestamp (epoch seconds), exclusive.
+        batch_size (int, optional): Documents per yielded batch. Defaults to 5000.
+    Yields:
+        list of dict: Count documents sorted by timestamp.
+    """
+    query = _epoch_range_query("timestamp", start_time, end_time)
+    yield from _iter_batches(mo_synapsis_counts_ts, query, None, batch_size)
+
+
+def iter_people(start_time=None, end_time=None, batch_size=5000):
+    """Stream people records of a time range in bounded batches.
+
+    Args:
+        start_time (str, optional): Start timestamp (epoch seconds), inclusive.
+        end_time (str, optional): End timestamp (epoch seconds), exclusive.
+        batch_size (int, optional): Documents per yielded batch. Defaults to 5000.
+    Yields:
+        list of dict: People documents sorted by timestamp.
+    """
+    query = _epoch_range_query("timestamp", start_time, end_time)
+    yield from _iter_batches(mo_synapsis_people, query, None, batch_size)
+
+
+# ============================================================
+# HEATMAPS
+
+
+def ensure_heatmap_indexes():
+    """Create the heatmap range-query index and retention TTL if missing."""
+    mo_synapsis_heatmaps.create_index(
+        [("location", ASCENDING), ("area_id", ASCENDING), ("bucket_start", ASCENDING)]
+    )
+    _ensure_ttl_index(
+        mo_synapsis_heatmaps, "bucket_start", HEATMAP_RETENTION_DAYS * 86400
+    )
+
+
+def set_heatmaps(heatmaps):
+    """Insert flushed heatmap buckets into the database.
+
+    Args:
+        heatmaps (list of dict): Each dict should contain keys: 'location',
+            'area_id', 'bucket_start', 'bucket_seconds', 'cell', 'shape',
+            'dtype', 'frames' and 'data' (zlib-compressed raster bytes).
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    try:
+        mo_synapsis_heatmaps.insert_many(heatmaps, ordered=False)
+        logger.debug("Heatmap buckets inserted: {}", len(heatmaps))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error inserting heatmaps: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def _merge_heatmap(location, area_id, docs):
+    """Sum heatmap buckets (in time order) into one raster, or NOT_FOUND."""
+    merged, cell, frames, buckets = None, None, 0, 0
+    for doc in docs:
+        raster = np.frombuffer(
+            zlib.decompress(doc["data"]), dtype=doc["dtype"]
+        ).reshape(doc["shape"])
+        if merged is None:
+            merged, cell = raster.astype(np.uint64), doc["cell"]
+        elif raster.shape != merged.shape or doc["cell"] != cell:
+            logger.warning(
+                f"Skipping heatmap bucket with another grid: {doc['bucket_start']}"
+            )
+            continue
+        else:
+            merged += raster
+        frames += doc["frames"]
+        buckets += 1
+    if merged is None:
+        return SynapsisResponse.NOT_FOUND
+    return {
+        "location": location,
+        "area_id": area_id,
+        "cell": cell,
+        "shape": list(merged.shape),
+        "frames": frames,
+        "buckets": buckets,
+        "max": int(merged.max()),
+        "data": merged.tolist(),
+    }
+
+
+def get_heatmap(location, area_id="_camera", start_time=None, end_time=None):
+    """Merge the heatmap buckets of a camera or area over a time range.
+
+    Args:
+        location (str): The location of the camera.
+        area_id (str, optional): The area ID, or "_camera" for the whole frame.
+        start_time (str, optional): Start timestamp (epoch seconds).
+        end_time (str, optional): End timestamp (epoch seconds).
+    Returns:
+        dict: Merged raster and its metadata, or SynapsisResponse.NOT_FOUND /
+            SynapsisResponse.SERVER_ERROR
+    """
+    query = {"location": location, "area_id": area_id}
+    ts_query = {}
+    if start_time is not None:
+        ts_query["$gte"] = datetime.fromtimestamp(int(start_time), tz=timezone.utc)
+    if end_time is not None:
+        ts_query["$lte"] = datetime.fromtimestamp(int(end_time), tz=timezone.utc)
+    if ts_query:
+        query["bucket_start"] = ts_query
+
+    try:
+        return _merge_heatmap(
+            location,
+            area_id,
+            mo_synapsis_heatmaps.find(query, {"_id": 0}).sort("bucket_start", 1),
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving heatmap: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# TRAJECTORIES
+
+# A track is stored as segments of up to a few minutes: the first point, then
+# per point the time step (uint16 ms) and the x/y step (int16 source pixels),
+# little-endian. Points are the bottom-centre of the box, downsampled by the
+# inference service; `area_ids` are the areas the track was in on any frame.
+TRAJECTORY_ENCODING = "delta16-v1"
+
+
+def _epoch_ms(value):
+    return round(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def encode_trajectory(times_ms, points):
+    """Pack a track segment's points into the stored document fields.
+
+    Args:
+        times_ms (list of int): Epoch ms per point, increasing, steps below 65536 ms.
+        points (list of tuple): (x, y) per point in source pixels.
+    Returns:
+        dict: 'start', 'end', 'x0', 'y0', 'n', 'box', 'encoding', 'dt' and 'dxy'.
+    """
+    times_ms = np.asarray(times_ms, dtype=np.int64)
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    return {
+        "start": datetime.fromtimestamp(times_ms[0] / 1000, tz=timezone.utc),
+        "end": datetime.fromtimestamp(times_ms[-1] / 1000, tz=timezone.utc),
+        "x0": int(points[0, 0]),
+        "y0": int(points[0, 1]),
+        "n": len(points),
+        "box": points.min(axis=0).tolist() + points.max(axis=0).tolist(),
+        "encoding": TRAJECTORY_ENCODING,
+        "dt": np.diff(times_ms).astype("<u2").tobytes(),
+        "dxy": np.diff(points, axis=0).astype("<i2").tobytes(),
+    }
+
+
+def decode_trajectory(doc):
+    """Points of a stored segment as [[epoch_ms, x, y], ...]."""
+    start_ms = _epoch_ms(doc["start"])
+    dt = np.frombuffer(doc["dt"], dtype="<u2").astype(np.int64)
+    dxy = np.frombuffer(doc["dxy"], dtype="<i2").astype(np.int64).reshape(-1, 2)
+    points = np.empty((len(dt) + 1, 3), dtype=np.int64)
+    points[0] = (start_ms, doc["x0"], doc["y0"])
+    points[1:, 0] = start_ms + np.cumsum(dt)
+    points[1:, 1:] = (doc["x0"], doc["y0"]) + np.cumsum(dxy, axis=0)
+    return points.tolist()
+
+
+def ensure_trajectory_indexes():
+    """Create the trajectory lookup indexes and retention TTL if missing."""
+    mo_synapsis_trajectories.create_index(
+        [("tracker_id", ASCENDING), ("start", ASCENDING)]
+    )
+    mo_synapsis_trajectories.create_index(
+        [("location", ASCENDING), ("area_ids", ASCENDING), ("start", ASCENDING)]
+    )
+    _ensure_ttl_index(
+        mo_synapsis_trajectories, "end", TRAJECTORY_RETENTION_DAYS * 86400
+    )
+
+
+def set_trajectories(segments):
+    """Insert closed track segments.
+
+    Args:
+        segments (list of dict): Each dict should contain keys: 'location',
+            'tracker_id', 'area_ids' and the fields of `encode_trajectory`.
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    try:
+        mo_synapsis_trajectories.insert_many(segments, ordered=False)
+        logger.debug("Trajectory segments inserted: {}", len(segments))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error inserting trajectories: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def _overlap_query(start_time, end_time):
+    """Segments overlapping [start_time, end_time) (epoch seconds)."""
+    query = {}
+    if start_time is not None:
+        query["end"] = {
+            "$gte": datetime.fromtimestamp(int(start_time), tz=timezone.utc)
+        }
+    if end_time is not None:
+        query["start"] = {"$lt": datetime.fromtimestamp(int(end_time), tz=timezone.utc)}
+    return query
+
+
+def get_track(tracker_id, start_time=None, end_time=None):
+    """Get the path of one track.
+
+    Args:
+        tracker_id (str): The tracker ID, e.g. '1758507330123_12'.
+        start_time (str, optional): Start timestamp (epoch seconds).
+        end_time (str, optional): End timestamp (epoch seconds).
+    Returns:
+        dict: 'tracker_id', 'location', 'start' and 'end' (epoch ms), 'area_ids'
+            and 'points' ([epoch_ms, x, y]), or SynapsisResponse.NOT_FOUND /
+            SynapsisResponse.SERVER_ERROR
+    """
+    query = {"tracker_id": tracker_id, **_overlap_query(start_time, end_time)}
+    try:
+        segments = retry_read(
+            lambda: list(
+                mo_synapsis_trajectories.find(query, {"_id": 0}).sort("start", 1)
+            )
+        )()
+    except Exception as e:
+        logger.error(f"Error retrieving track: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+    return _track_document(tracker_id, segments)
+
+
+def _track_document(tracker_id, segments):
+    """One track from its segments in time order, or NOT_FOUND."""
+    if not segments:
+        return SynapsisResponse.NOT_FOUND
+    area_ids = []
+    for segment in segments:
+        area_ids += [a for a in segment["area_ids"] if a not in area_ids]
+    return {
+        "tracker_id": tracker_id,
+        "location": segments[0]["location"],
+        "start": _epoch_ms(segments[0]["start"]),
+        "end": _epoch_ms(segments[-1]["end"]),
+        "area_ids": area_ids,
+        "points": [p for segment in segments for p in decode_trajectory(segment)],
+    }
+
+
+def get_tracks_in_area(
+    location, area_id, start_time=None, end_time=None, points=False, limit=100
+):
+    """Get the tracks that were inside an area during a time range.
+
+    Args:
+        location (str): The location of the area.
+        area_id (str): The area ID.
+        start_time (str, optional): Start timestamp (epoch seconds).
+        end_time (str, optional): End timestamp (epoch seconds).
+        points (bool, optional): Include each track's path within the range. Defaults to False.
+        limit (int, optional): Maximum number of tracks, earliest first. Defaults to 100.
+    Returns:
+        list of dict: Per track 'tracker_id', 'start', 'end' (epoch ms), 'segments'
+            and 'n', plus 'points' if requested, or SynapsisResponse.SERVER_ERROR
+    """
+    window = _overlap_query(start_time, end_time)
+    pipeline = [
+        {"$match": {"location": location, "area_ids": area_id, **window}},
+        {
+            "$group": {
+                "_id": "$tracker_id",
+                "start": {"$min": "$start"},
+                "end": {"$max": "$end"},
+                "segments": {"$sum": 1},
+                "n": {"$sum": "$n"},
+            }
+        },
+        {"$sort": {"start": 1}},
+        {"$limit": limit},
+    ]
+    try:
+        tracks = retry_read(
+            lambda: list(mo_synapsis_trajectories.aggregate(pipeline))
+        )()
+        paths = {}
+        if points and tracks:
+            query = {"tracker_id": {"$in": [t["_id"] for t in tracks]}, **window}
+            for segment in retry_read(
+                lambda: list(
+                    mo_synapsis_trajectories.find(
+                        query, {"_id": 0, "area_ids": 0, "box": 0}
+                    ).sort("start", 1)
+                )
+            )():
+                paths.setdefault(segment["tracker_id"], []).extend(
+                    decode_trajectory(segment)
+                )
+    except Exception as e:
+        logger.error(f"Error retrieving tracks in area: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+    return _track_summaries(tracks, paths, points)
+
+
+def _track_summaries(tracks, paths, points):
+    """Per-track results of get_tracks_in_area from its grouped rows."""
+    results = []
+    for track in tracks:
+        result = {
+            "tracker_id": track["_id"],
+            "start": _epoch_ms(track["start"]),
+            "end": _epoch_ms(track["end"]),
+            "segments": track["segments"],
+            "n": track["n"],
+        }
+        if points:
+            result["points"] = paths.get(track["_id"], [])
+        results.append(result)
+    return results
+
+
+# ============================================================
+# FRESHNESS
+
+# One document per location, replaced by its camera loop: lag histograms per
+# pipeline stage, measured from frame capture.
+
+
+def set_freshness(location, report):
+    """Store the latest lag report of a camera (see the inference FreshnessTracer).
+
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    try:
+        mo_synapsis_freshness.replace_one(
+            {"_id": location},
+            {**report, "location": location, "updated_at": get_timestamp()},
+            upsert=True,
+        )
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error storing freshness of {location}: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_freshness(location=None):
+    """Latest lag reports, of one location or all.
+
+    Returns:
+        list of dict: The reports, or SynapsisResponse.SERVER_ERROR
+    """
+    query_filter = {} if location is None else {"_id": location}
+    try:
+        return retry_read(
+            lambda: list(mo_synapsis_freshness.find(query_filter, {"_id": 0}))
+        )()
+    except Exception as e:
+        logger.error(f"Error retrieving freshness: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def describe_freshness(count, now=None):
+    """Age of a count record, from the capture of its frame, against the SLO.
+
+    Args:
+        count (dict): A count as returned by get_count_live.
+        now (datetime, optional): Reference time. Defaults to now.
+    Returns:
+        dict: 'captured_at', 'trace_id', 'data_age_seconds', 'write_lag_seconds'
+            (capture to database, None for records written before tracing),
+            'slo_seconds' and 'within_slo'.
+    """
+    now = now or get_timestamp()
+    captured_at = _as_utc(count["timestamp"])
+    written_at = count.get("written_at")
+    age = (now - captured_at).total_seconds()
+    return {
+        "captured_at": captured_at,
+        "trace_id": count.get("trace_id"),
+        "data_age_seconds": round(age, 3),
+        "write_lag_seconds": (
+            round((_as_utc(written_at) - captured_at).total_seconds(), 3)
+            if written_at is not None
+            else None
+        ),
+        "slo_seconds": FRESHNESS_SLO_SECONDS,
+        "within_slo": age <= FRESHNESS_SLO_SECONDS,
+    }
+
+
+# ============================================================
+# ALERTS
+
+
+def ensure_alert_indexes():
+    """Create the alert listing index and retention TTL if missing."""
+    mo_synapsis_alerts.create_index(
+        [("location", ASCENDING), ("area_id", ASCENDING), ("timestamp", DESCENDING)]
+    )
+    _ensure_ttl_index(mo_synapsis_alerts, "timestamp", ALERT_RETENTION_DAYS * 86400)
+
+
+def set_alert_events(events):
+    """Insert alert events raised by the inference alert engine.
+
+    Args:
+        events (list of dict): Each dict should contain keys: 'location',
+            'area_id', 'area_name', 'rule', 'status', 'metric', 'op',
+            'threshold', 'value', 'metrics' and 'epoch_ms'.
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    try:
+        docs = [
+            {
+                **event,
+                "timestamp": datetime.fromtimestamp(
+                    event["epoch_ms"] / 1000, tz=timezone.utc
+                ),
+            }
+            for event in events
+        ]
+        mo_synapsis_alerts.insert_many(docs, ordered=False)
+        logger.debug("Alert events inserted: {}", len(docs))
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error inserting alert events: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_alerts(
+    location=None, area_id=None, status=None, start_time=None, end_time=None, limit=100
+):
+    """Get the latest alert events, newest first.
+
+    Args:
+        location (str, optional): Only alerts of this location.
+        area_id (str, optional): Only alerts of this area.
+        status (str, optional): 'firing' or 'resolved'.
+        start_time (str, optional): Start timestamp (epoch seconds), inclusive.
+        end_time (str, optional): End timestamp (epoch seconds), exclusive.
+        limit (int, optional): Maximum number of events. Defaults to 100.
+    Returns:
+        list of dict: Alert events without `_id`, or SynapsisResponse.SERVER_ERROR
+    """
+    query = _epoch_range_query("timestamp", start_time, end_time)
+    for field, value in (
+        ("location", location),
+        ("area_id", area_id),
+        ("status", status),
+    ):
+        if value is not None:
+            query[field] = value
+    try:
+        return retry_read(
+            lambda: list(
+                mo_synapsis_alerts.find(query, {"_id": 0, "timestamp": 0})
+                .sort("timestamp", DESCENDING)
+                .limit(limit)
+            )
+        )()
+    except Exception as e:
+        logger.error(f"Error retrieving alerts: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+# ============================================================
+# CAMERA LEASES
+#
+# `cameras` is the registry of streams to process. An inference worker only
+# processes a camera while it holds the camera's document in `camera_leases`;
+# leases expire unless renewed, so the cameras of a dead worker are claimed by
+# the others. Workers also heartbeat into `workers` with their total load.
+
+
+def _as_utc(value):
+    # The client is not tz-aware, so stored datetimes come back naive UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def ensure_lease_indexes():
+    """Create the lease lookup index and the TTL that clears dead workers."""
+    mo_synapsis_camera_leases.create_index([("worker_id", ASCENDING)])
+    mo_synapsis_workers.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+
+def register_cameras(sources, overwrite=False):
+    """Add cameras to the registry.
+
+    Args:
+        sources (dict): Camera/location name to stream URL or file path.
+        overwrite (bool, optional): Replace the source of existing cameras.
+            Defaults to False, which keeps operator edits.
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    if not sources:
+        return SynapsisResponse.SUCCESS
+    op = "$set" if overwrite else "$setOnInsert"
+    requests = [
+        UpdateOne({"_id": name}, {op: {"source": source, "enabled": True}}, upsert=True)
+        for name, source in sources.items()
+    ]
+    try:
+        mo_synapsis_cameras.bulk_write(requests, ordered=False)
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error registering cameras: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+@retry_read
+def get_cameras():
+    """Enabled cameras as a {name: source} dict."""
+    return {
+        c["_id"]: c["source"]
+        for c in mo_synapsis_cameras.find({"enabled": True}, {"source": 1})
+    }
+
+
+def acquire_camera_lease(camera, worker_id, ttl):
+    """Take the lease of a camera that is free, expired or already ours.
+
+    Args:
+        camera (str): Camera/location name.
+        worker_id (str): ID of the claiming worker.
+        ttl (float): Lease duration in seconds.
+    Returns:
+        dict: The lease, or None when another worker holds it.
+    """
+    now = get_timestamp()
+    try:
+        lease = mo_synapsis_camera_leases.find_one_and_update(
+            {
+                "_id": camera,
+                "$or": [{"worker_id": worker_id}, {"expires_at": {"$lte": now}}],
+            },
+            {
+                "$set": {
+                    "worker_id": worker_id,
+                    "acquired_at": now,
+                    "expires_at": now + timedelta(seconds=ttl),
+                },
+                "$inc": {"generation": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        lease["expires_at"] = _as_utc(lease["expires_at"])
+        return lease
+    except DuplicateKeyError:
+        # The upsert lost to a live lease of another worker
+        return None
+    except Exception as e:
+        logger.error(f"Error acquiring lease of {camera}: {str(e)}")
+        return None
+
+
+def renew_camera_lease(camera, worker_id, ttl, load=None):
+    """Extend a lease we hold and record the camera's measured load.
+
+    Returns:
+        datetime: The new expiry, or None when the lease was lost.
+    """
+    now = get_timestamp()
+    expires_at = now + timedelta(seconds=ttl)
+    try:
+        result = mo_synapsis_camera_leases.update_one(
+            {"_id": camera, "worker_id": worker_id, "expires_at": {"$gt": now}},
+            {"$set": {"expires_at": expires_at, "load": load, "renewed_at": now}},
+        )
+        return expires_at if result.matched_count else None
+    except Exception as e:
+        logger.error(f"Error renewing lease of {camera}: {str(e)}")
+        return None
+
+
+def release_camera_lease(camera, worker_id):
+    """Give up a lease; the camera's last load is kept for the next owner."""
+    try:
+        mo_synapsis_camera_leases.update_one(
+            {"_id": camera, "worker_id": worker_id},
+            {"$set": {"expires_at": get_timestamp()}, "$unset": {"worker_id": ""}},
+        )
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error releasing lease of {camera}: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+@retry_read
+def get_camera_leases():
+    """All lease documents, keyed by camera, with tz-aware expiries."""
+    leases = {}
+    for lease in mo_synapsis_camera_leases.find({}):
+        lease["expires_at"] = _as_utc(lease["expires_at"])
+        leases[lease["_id"]] = lease
+    return leases
+
+
+def heartbeat_worker(worker_id, ttl, cameras, load):
+    """Record that a worker is alive, what it runs and its total load.
+
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    now = get_timestamp()
+    try:
+        mo_synapsis_workers.update_one(
+            {"_id": worker_id},
+            {
+                "$set": {
+                    "cameras": cameras,
+                    "load": load,
+                    "heartbeat_at": now,
+                    "expires_at": now + timedelta(seconds=ttl),
+                }
+            },
+            upsert=True,
+        )
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Error sending heartbeat of {worker_id}: {str(e)}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+@retry_read
+def get_live_workers():
+    """Workers whose heartbeat has not expired, keyed by worker ID."""
+    return {
+        w["_id"]: w
+        for w in mo_synapsis_workers.find({"expires_at": {"$gt": get_timestamp()}})
+    }
+
+
+def remove_worker(worker_id):
+    mo_synapsis_workers.delete_one({"_id": worker_id})
+
+
+# ============================================================
+# MINIO
+
+
+def upload_ndarray_to_minio(object_name, ndarray_image, expire_days=7, fmt="JPEG"):
+    """Upload a NumPy ndarray image to MinIO.
+    Args:
+        object_name (str): The object name in MinIO, including bucket and path.
+        ndarray_image (np.ndarray): The image as a NumPy ndarray.
+        expire_days (int, optional): URL expiration in days. Defaults to 7.
+        fmt (str, optional): Image format (e.g., 'JPEG', 'PNG'). Defaults to 'JPEG'.
+    Returns:
+        str: Presigned URL of the uploaded image or SynapsisResponse.SERVER_ERROR on failure
+    """
+    try:
+        if "/" not in object_name:
+            raise ValueError(
+                "object_name must be in format '<bucket>/<path/to/object>'"
+            )
+
+        bucket_name, object_name = object_name.split("/", 1)
+
+        # Convert ndarray to bytes
+        image_bytes = BytesIO()
+        Image.fromarray(ndarray_image).save(image_bytes, format=fmt)
+        image_bytes.seek(0)
+        size = image_bytes.getbuffer().nbytes
+
+        # Upload image to MinIO
+        minio_client.put_object(
+            bucket_name,
+            object_name,
+            image_bytes,
+            size,
+            content_type=f"image/{fmt.lower()}",
+        )
+
+        presigned_url = minio_client.presigned_get_object(
+            bucket_name, object_name, expires=timedelta(days=expire_days)
+        )
+
+        return presigned_url
+
+    except S3Error as e:
+        logger.error(f"Failed to upload image to MinIO: {e}", exc_info=True)
+        return SynapsisResponse.SERVER_ERROR
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}", exc_info=True)
+        return SynapsisResponse.SERVER_ERROR
+
+
+def upload_bytes_to_minio(object_name, data, content_type="application/octet-stream"):
+    """Upload raw bytes to MinIO.
+
+    Args:
+        object_name (str): The object name in MinIO, including bucket and path.
+        data (bytes): The object content.
+        content_type (str, optional): Defaults to 'application/octet-stream'.
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    try:
+        bucket_name, object_name = object_name.split("/", 1)
+        minio_client.put_object(
+            bucket_name,
+            object_name,
+            BytesIO(data),
+            len(data),
+            content_type=content_type,
+        )
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Failed to upload object to MinIO: {e}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def upload_file_to_minio(object_name, path, content_type="application/octet-stream"):
+    """Upload a local file to MinIO.
+
+    Args:
+        object_name (str): The object name in MinIO, including bucket and path.
+        path (str): The local file.
+        content_type (str, optional): Defaults to 'application/octet-stream'.
+    Returns:
+        SynapsisResponse: SUCCESS or SERVER_ERROR
+    """
+    try:
+        bucket_name, object_name = object_name.split("/", 1)
+        minio_client.fput_object(
+            bucket_name, object_name, path, content_type=content_type
+        )
+        return SynapsisResponse.SUCCESS
+    except Exception as e:
+        logger.error(f"Failed to upload file to MinIO: {e}")
+        return SynapsisResponse.SERVER_ERROR
+
+
+def get_object_range_from_minio(object_name, offset, length):
+    """Read a byte range of a MinIO object (HTTP Range request).
+
+    Args:
+        object_name (str): The object name in MinIO, including bucket and path.
+        offset (int): First byte to read.
+        length (int): Number of bytes to read.
+    Returns:
+        bytes: The requested bytes or SynapsisResponse.SERVER_ERROR on failure
+    """
+    response = None
+    try:
+        bucket_name, object_name = object_name.split("/", 1)
+        response = minio_client.get_object(
+            bucket_name, object_name, offset=offset, length=length
+        )
+        return response.read()
+    except Exception as e:
+        logger.error(f"Failed to read object range from MinIO: {e}")
+        return SynapsisResponse.SERVER_ERROR
+    finally:
+        if response is not None:
+            response.close()
+            response.release_conn()
+
+
+# ============================================================
+# STORAGE BACKEND
+#
+# With STORAGE_BACKEND=embedded the data functions above are replaced by their
+# SQLite/local-file versions, so the services import the same names either way.
+# Camera leases and the Mongo maintenance helpers have no embedded version.
+
+if STORAGE_BACKEND == "embedded":
+    from synapsis_common import embedded as _embedded
+
+    globals().update({name: getattr(_embedded, name) for name in _embedded.__all__})
@@ -0,0 +1,276 @@
+# Built-in imports
+import os
+import json
+import time
+import queue
+import operator
+import threading
+import urllib.request
+from collections import deque
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+from synapsis_common.utility import SynapsisResponse, set_alert_events
+
+OPERATORS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt}
+
+DEFAULT_ALERT_RULES = [
+    {"name": "crowded", "metric": "occupancy_mean", "op": ">=", "threshold": 15},
+    {"name": "crowd_surge", "metric": "rate", "op": ">=", "threshold": 20},
+    {"name": "loitering", "metric": "dwell_max", "op": ">=", "threshold": 120},
+]
+
+
+class SlidingWindow:
+    """Time-based window of samples with O(1) amortised updates.
+
+    Keeps a running sum for the mean and a monotonic deque for the maximum, so
+    neither is recomputed over the window on a new sample.
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()
+        self.maxima = deque()
+        self.total = 0.0
+
+    def add(self, now, value):
+        self.samples.append((now, value))
+        self.total += value
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        self.maxima.append((now, value))
+        horizon = now - self.seconds
+        while self.samples[0][0] < horizon:
+            self.total -= self.samples.popleft()[1]
+        while self.maxima[0][0] < horizon:
+            self.maxima.popleft()
+
+    @property
+    def mean(self):
+        return self.total / len(self.samples) if self.samples else 0.0
+
+    @property
+    def max(self):
+        return self.maxima[0][1] if self.maxima else 0.0
+
+    @property
+    def rate(self):
+        """Change per minute between the oldest and newest sample.
+
+        0 until the samples span half the window: over a few frames, one
+        person entering would read as hundreds per minute.
+        """
+        if len(self.samples) < 2:
+            return 0.0
+        (t0, v0), (t1, v1) = self.samples[0], self.samples[-1]
+        if t1 - t0 < self.seconds / 2:
+            return 0.0
+        return (v1 - v0) * 60.0 / (t1 - t0)
+
+
+class AreaStats:
+    """Sliding-window occupancy and dwell of one area.
+
+    Entry times are kept in insertion order, so the longest dwell is always the
+    first entry and needs no scan.
+    """
+
+    def __init__(self, window_seconds):
+        self.occupancy = SlidingWindow(window_seconds)
+        self.entered_at = {}
+        self.current = 0
+
+    def update(self, now, tracker_ids):
+        inside = set(tracker_ids)
+        for tracker_id in [t for t in self.entered_at if t not in inside]:
+            del self.entered_at[tracker_id]
+        for tracker_id in inside:
+            self.entered_at.setdefault(tracker_id, now)
+        self.current = len(inside)
+        self.occupancy.add(now, self.current)
+
+    def metrics(self, now):
+        oldest = next(iter(self.entered_at.values()), now)
+        return {
+            "occupancy": self.current,
+            "occupancy_mean": self.occupancy.mean,
+            "occupancy_max": self.occupancy.max,
+            "rate": self.occupancy.rate,
+            "dwell_max": now - oldest,
+        }
+
+
+class AlertRule:
+    """Threshold on one area metric, debounced and with a cooldown.
+
+    The condition has to hold for `for_seconds` before the alert fires, and has
+    to clear past `hysteresis` (a fraction of the threshold) before it can
+    resolve and fire again, at most once per `cooldown` seconds.
+
+    Args:
+        name (str): Alert name.
+        metric (str): 'occupancy', 'occupancy_mean', 'occupancy_max', 'rate'
+            (people per minute) or 'dwell_max' (seconds).
+        threshold (float): Value to compare with.
+        op (str, optional): '>=', '>', '<=' or '<'. Defaults to '>='.
+        for_seconds (float, optional): Time the condition must hold. Defaults to 1.
+        cooldown (float, optional): Seconds between two firings. Defaults to 60.
+        hysteresis (float, optional): Clearing margin. Defaults to 0.1.
+        areas (list of str, optional): Area names the rule applies to. Defaults to all.
+    """
+
+    def __init__(
+        self,
+        name,
+        metric,
+        threshold,
+        op=">=",
+        for_seconds=1.0,
+        cooldown=60.0,
+        hysteresis=0.1,
+        areas=None,
+    ):
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.op = op
+        self.compare = OPERATORS[op]
+        margin = abs(threshold) * hysteresis
+        self.clear_threshold = (
+            threshold - margin if op in (">=", ">") else threshold + margin
+        )
+        self.for_seconds = for_seconds
+        self.cooldown = cooldown
+        self.areas = set(areas) if areas else None
+
+    def applies_to(self, area_name):
+        return self.areas is None or area_name in self.areas
+
+
+class AlertEngine:
+    """Evaluate alert rules on per-area sliding-window statistics every frame.
+
+    Events ("firing" and "resolved") are written to Mongo and POSTed to the API
+    push endpoint from a background thread, so the frame loop never waits on I/O.
+
+    Args:
+        location (str): Camera/location name.
+        rules (list of dict, optional): AlertRule arguments. Defaults to
+            ALERT_RULES (JSON) from the environment, else DEFAULT_ALERT_RULES.
+        window_seconds (float, optional): Statistics window. Defaults to 30.
+        push_url (str, optional): API push endpoint. Defaults to ALERTS_PUSH_URL;
+            empty disables pushing. Pushes carry ALERTS_PUSH_TOKEN, when set, as
+            a bearer token.
+    """
+
+    def __init__(self, location, rules=None, window_seconds=30.0, push_url=None):
+        self.location = location
+        if rules is None:
+            rules = json.loads(os.getenv("ALERT_RULES", "null")) or DEFAULT_ALERT_RULES
+        self.rules = [AlertRule(**rule) for rule in rules]
+        self.window_seconds = window_seconds
+        self.push_url = (
+            os.getenv("ALERTS_PUSH_URL", "http://localhost:8000/api/alerts/push")
+            if push_url is None
+            else push_url
+        )
+        self.push_token = os.getenv("ALERTS_PUSH_TOKEN", "")
+        self.areas = {}
+        self.states = {}
+        self.events = queue.Queue(maxsize=1000)
+        self._sender = threading.Thread(target=self._send_loop, daemon=True)
+        self._sender.start()
+
+    def update(self, area_id, area_name, tracker_ids, now=None):
+        """Add an analysed frame's tracks inside an area and evaluate its rules."""
+        now = time.time() if now is None else now
+        stats = self.areas.get(area_id)
+        if stats is None:
+            stats = self.areas[area_id] = AreaStats(self.window_seconds)
+        stats.update(now, tracker_ids)
+        metrics = stats.metrics(now)
+        for rule in self.rules:
+            if rule.applies_to(area_name):
+                self._evaluate(rule, area_id, area_name, metrics, now)
+
+    def retain(self, area_ids):
+        """Drop statistics and rule states of areas no longer configured."""
+        keep = set(area_ids)
+        for area_id in [a for a in self.areas if a not in keep]:
+            del self.areas[area_id]
+        for key in [k for k in self.states if k[1] not in keep]:
+            del self.states[key]
+
+    def _evaluate(self, rule, area_id, area_name, metrics, now):
+        state = self.states.setdefault(
+            (rule.name, area_id),
+            {"pending_since": None, "firing": False, "fired_at": 0.0},
+        )
+        value = metrics[rule.metric]
+        if rule.compare(value, rule.threshold):
+            if state["pending_since"] is None:
+                state["pending_since"] = now
+            if (
+                not state["firing"]
+                and now - state["pending_since"] >= rule.for_seconds
+                and now - state["fired_at"] >= rule.cooldown
+            ):
+                state["firing"], state["fired_at"] = True, now
+                self._emit("firing", rule, area_id, area_name, value, metrics, now)
+        elif not rule.compare(value, rule.clear_threshold):
+            state["pending_since"] = None
+            if state["firing"]:
+                state["firing"] = False
+                self._emit("resolved", rule, area_id, area_name, value, metrics, now)
+
+    def _emit(self, status, rule, area_id, area_name, value, metrics, now):
+        event = {
+            "location": self.location,
+            "area_id": area_id,
+            "area_name": area_name,
+            "rule": rule.name,
+            "status": status,
+            "metric": rule.metric,
+            "op": rule.op,
+            "threshold": rule.threshold,
+            "value": round(float(value), 3),
+            "metrics": {k: round(float(v), 3) for k, v in metrics.items()},
+            "epoch_ms": int(now * 1000),
+        }
+        logger.warning(
+            f"Alert {rule.name} {status} in {area_name}: "
+            f"{rule.metric}={event['value']} ({rule.op} {rule.threshold})"
+        )
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            logger.error(f"Alert queue full, dropping {rule.name} for {area_name}")
+
+    def _send_loop(self):
+        while True:
+            events = [self.events.get()]
+            while not self.events.empty() and len(events) < 100:
+                events.append(self.events.get_nowait())
+            if self.push_url:
+                self._push(events)
+            # Mongo adds `_id` to the documents, so push them first
+            if set_alert_events(events) == SynapsisResponse.SERVER_ERROR:
+                logger.error(f"Error storing {len(events)} alert events")
+
+    def _push(self, events):
+        headers = {"Content-Type": "application/json"}
+        if self.push_token:
+            headers["Authorization"] = f"Bearer {self.push_token}"
+        request = urllib.request.Request(
+            self.push_url,
+            data=json.dumps(events).encode(),
+            headers=headers,
+            method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=2).close()
+        except Exception as e:
+            logger.error(f"Error pushing alerts to {self.push_url}: {str(e)}")
@@ -0,0 +1,217 @@
+# Built-in imports
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+from dash_output import DashOutput, parse_ladder, directory_size, prune_sessions
+
+STAMP_BITS = 24
+STAMP_BLOCK = 16
+SEGMENT_PATTERN = re.compile(r"chunk-stream0-(\d+)\.m4s$")
+
+
+def stamp(frame, index):
+    """Write `index` into the top-left corner as black/white blocks."""
+    for bit in range(STAMP_BITS):
+        x = bit * STAMP_BLOCK
+        frame[:STAMP_BLOCK, x : x + STAMP_BLOCK] = 255 if index >> bit & 1 else 0
+
+
+def read_stamp(gray):
+    centre = STAMP_BLOCK // 2
+    bits = gray[centre, centre : STAMP_BITS * STAMP_BLOCK : STAMP_BLOCK] > 128
+    return int(sum(1 << i for i, bit in enumerate(bits) if bit))
+
+
+def decode_stamps(folder, number, width, height):
+    """Frame stamps of one complete segment of the first rendition."""
+    try:
+        with open(os.path.join(folder, "init-stream0.m4s"), "rb") as f:
+            data = f.read()
+        with open(os.path.join(folder, f"chunk-stream0-{number:05d}.m4s"), "rb") as f:
+            data += f.read()
+    except OSError:
+        return []
+    output = subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "mp4", "-i", "pipe:0"]
+        + ["-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"],
+        input=data,
+        capture_output=True,
+    ).stdout
+    frames = np.frombuffer(output, dtype=np.uint8)
+    frames = frames[: len(frames) // (width * height) * width * height]
+    return [read_stamp(gray) for gray in frames.reshape(-1, height, width)]
+
+
+class SegmentWatcher(threading.Thread):
+    """Record when each segment is complete and how old its frames are by then.
+
+    A segment counts as complete when the next one appears, which is an upper
+    bound on when a low-latency player can have all of it.
+    """
+
+    def __init__(self, folder, width, height, written_at, root):
+        super().__init__(daemon=True)
+        self.folder = folder
+        self.width = width
+        self.height = height
+        self.written_at = written_at
+        self.root = root
+        self.latencies = []
+        self.disk = []
+        self.running = True
+
+    def run(self):
+        seen, next_disk = set(), 0.0
+        while self.running:
+            now = time.time()
+            if now >= next_disk:
+                self.disk.append(directory_size(self.root))
+                next_disk = now + 1.0
+            try:
+                names = os.listdir(self.folder)
+            except OSError:
+                names = []
+            numbers = sorted(
+                int(m.group(1)) for m in map(SEGMENT_PATTERN.search, names) if m
+            )
+            for number in numbers[:-1]:
+                if number in seen:
+                    continue
+                seen.add(number)
+                stamps = decode_stamps(self.folder, number, self.width, self.height)
+                stamps = [s for s in stamps if s in self.written_at]
+                if stamps:
+                    self.latencies.append(
+                        (
+                            now - self.written_at[stamps[0]],
+                            now - self.written_at[stamps[-1]],
+                        )
+                    )
+            time.sleep(0.05)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(
+        description="Measure DASH output latency and disk usage over restarts."
+    )
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=25)
+    parser.add_argument(
+        "--duration", type=float, default=30, help="Seconds per session"
+    )
+    parser.add_argument("--sessions", type=int, default=3, help="Simulated restarts")
+    parser.add_argument("--preset", default="veryfast")
+    parser.add_argument("--ladder", default="source:2000k")
+    parser.add_argument("--segment-seconds", type=float, default=1.0)
+    parser.add_argument("--window-size", type=int, default=4)
+    parser.add_argument("--extra-window-size", type=int, default=2)
+    parser.add_argument("--keep-sessions", type=int, default=2)
+    parser.add_argument(
+        "--root", default=None, help="Output root (temporary by default)"
+    )
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    root = args.root or tempfile.mkdtemp(prefix="bench_dash_")
+    # Segments on disk per session, plus the one being written and a margin
+    segments = args.window_size + args.extra_window_size + 2
+    bits_per_second = sum(
+        float(bitrate.rstrip("kK")) * 1000
+        for _, _, bitrate in parse_ladder(args.ladder)
+    )
+    bound = bits_per_second / 8 * args.segment_seconds * segments * args.keep_sessions
+
+    frame = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+    frame[:] = np.linspace(0, 255, args.width, dtype=np.uint8)[None, :, None]
+    results = {"config": vars(args), "bound_bytes": bound, "sessions": []}
+    index = 0
+    for session in range(args.sessions):
+        folder = os.path.join(root, f"session_{session:03d}")
+        os.makedirs(folder)
+        # Distinct mtimes, as timestamped folders of real restarts have
+        time.sleep(0.01)
+        prune_sessions(root, keep=args.keep_sessions, protect=folder)
+        output = DashOutput(
+            folder,
+            framerate=args.fps,
+            preset=args.preset,
+            ladder=args.ladder,
+            segment_seconds=args.segment_seconds,
+            window_size=args.window_size,
+            extra_window_size=args.extra_window_size,
+        )
+        written_at = {}
+        # Stamps are read from the first rendition
+        width, height, _ = parse_ladder(args.ladder)[0]
+        watcher = SegmentWatcher(
+            folder, width or args.width, height or args.height, written_at, root
+        )
+        watcher.start()
+
+        interval = 1.0 / args.fps
+        start = next_frame = time.time()
+        write_seconds = []
+        while time.time() - start < args.duration:
+            image = frame.copy()
+            x = int(index * 8) % (args.width - 64)
+            image[args.height // 2 :, x : x + 64] = (0, 0, 255)
+            stamp(image, index)
+            written_at[index] = time.time()
+            output.write(image)
+            write_seconds.append(time.time() - written_at[index])
+            index += 1
+            next_frame += interval
+            time.sleep(max(0.0, next_frame - time.time()))
+        time.sleep(args.segment_seconds * 2)
+        watcher.running = False
+        watcher.join()
+        output.close()
+
+        first = [latency[0] for latency in watcher.latencies]
+        last = [latency[1] for latency in watcher.latencies]
+        row = {
+            "session": session,
+            "segments": len(watcher.latencies),
+            "latency_first_frame_p50": percentile(first, 50),
+            "latency_first_frame_p95": percentile(first, 95),
+            "latency_last_frame_p50": percentile(last, 50),
+            "write_ms_p95": percentile(write_seconds, 95) * 1000,
+            "session_bytes": directory_size(folder),
+            "root_bytes_max": max(watcher.disk, default=0),
+            "encoder_restarts": output.restarts,
+        }
+        results["sessions"].append(row)
+        logger.info(
+            f"session {session}: {row['segments']} segments, glass-to-glass "
+            f"p50 {row['latency_first_frame_p50']} s / p95 "
+            f"{row['latency_first_frame_p95']} s, write p95 "
+            f"{row['write_ms_p95']:.2f} ms, disk max {row['root_bytes_max']} bytes"
+        )
+    results["root_bytes_max"] = max(r["root_bytes_max"] for r in results["sessions"])
+    results["within_bound"] = results["root_bytes_max"] <= bound
+    logger.info(
+        f"disk max {results['root_bytes_max']} bytes, bound {bound:.0f} bytes "
+        f"({'ok' if results['within_bound'] else 'exceeded'})"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,118 @@
+# Built-in imports
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import threading
+import urllib.request
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+from ultralytics import YOLO
+
+# Local imports
+from warmup import warmup_model
+from detect_service import DetectionService, create_server
+
+
+def post_image(url, data):
+    request = urllib.request.Request(
+        url, data=data, headers={"Content-Type": "image/jpeg"}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.status
+
+
+def load_test(url, images, concurrency, requests):
+    """Send `requests` single-image calls from `concurrency` clients."""
+    latencies, errors, lock = [], [0], threading.Lock()
+    counter = iter(range(requests))
+
+    def client():
+        for i in counter:
+            st_ = time.perf_counter()
+            try:
+                post_image(url, images[i % len(images)])
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - st_)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "images_per_second": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        "p95_ms": float(np.percentile(latencies_ms, 95)) if len(latencies) else None,
+        "errors": errors[0],
+    }
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(
+        description="Compare single-image and dynamically batched detection calls."
+    )
+    parser.add_argument("--images", default="../scene-for-annotation/*.jpg")
+    parser.add_argument("--model", default="yolo11l.pt")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--device", default="0")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    images = []
+    for path in sorted(glob.glob(args.images)):
+        with open(path, "rb") as f:
+            images.append(f.read())
+    if not images:
+        logger.error(f"No images match {args.images}")
+        sys.exit(1)
+
+    device = int(args.device) if args.device.isdigit() else args.device
+    model = YOLO(os.path.join("models", args.model))
+    warmup_model(model, imgsz=args.imgsz, batch=args.max_batch, device=device)
+
+    results = []
+    for mode, max_batch in (("single", 1), ("batched", args.max_batch)):
+        service = DetectionService(
+            model,
+            imgsz=args.imgsz,
+            device=device,
+            max_batch=max_batch,
+            max_wait_ms=args.max_wait_ms,
+        )
+        server = create_server(service, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/detect"
+        for concurrency in args.concurrency:
+            service.batcher.batches = service.batcher.frames = 0
+            row = {"mode": mode, "max_batch": max_batch, "concurrency": concurrency}
+            row.update(load_test(url, images, concurrency, args.requests))
+            row["mean_batch"] = service.batcher.mean_batch
+            results.append(row)
+            logger.info(
+                f"{mode:>7} x{concurrency:<3}: {row['images_per_second']:.1f} img/s, "
+                f"p50 {row['p50_ms']:.1f} ms, p95 {row['p95_ms']:.1f} ms, "
+                f"mean batch {row['mean_batch']:.2f}, errors {row['errors']}"
+            )
+        server.shutdown()
+        server.server_close()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
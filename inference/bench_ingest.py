@@ -0,0 +1,82 @@
+# Built-in imports
+import sys
+import json
+import time
+import argparse
+import resource
+
+# Third-party imports
+from loguru import logger
+from vidgear.gears import CamGear
+
+# Local imports
+from ingest import FFmpegSource
+
+
+def _cpu_seconds():
+    """User+system CPU of this process and its finished children (ffmpeg)."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def bench(name, stream, max_frames):
+    """Read frames as fast as the source delivers them and report throughput."""
+    cpu_start, start = _cpu_seconds(), time.perf_counter()
+    frames, frame_bytes = 0, 0
+    while frames < max_frames:
+        frame = stream.read()
+        if frame is None:
+            break
+        frames += 1
+        frame_bytes = frame.nbytes
+    elapsed = time.perf_counter() - start
+    stream.stop()
+    cpu = _cpu_seconds() - cpu_start
+    result = {
+        "backend": name,
+        "frames": frames,
+        "fps": frames / elapsed if elapsed else 0.0,
+        "cpu_seconds_per_frame": cpu / frames if frames else 0.0,
+        "bytes_per_frame": frame_bytes,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    logger.info(
+        f"{name}: {result['frames']} frames, {result['fps']:.1f} fps, "
+        f"{result['cpu_seconds_per_frame'] * 1000:.2f} ms CPU/frame, "
+        f"{result['bytes_per_frame'] / 1e6:.2f} MB/frame"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(
+        description="Compare CamGear and ffmpeg ingestion on a local video file."
+    )
+    parser.add_argument("source", help="Local video file (or stream URL)")
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--decode-threads", type=int, default=2)
+    parser.add_argument("--full-res-interval", type=float, default=None)
+    parser.add_argument("--max-frames", type=int, default=1000)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = [
+        bench("camgear", CamGear(source=args.source).start(), args.max_frames),
+        bench(
+            f"ffmpeg_{args.width}",
+            FFmpegSource(
+                args.source,
+                width=args.width,
+                decode_threads=args.decode_threads,
+                full_res_interval=args.full_res_interval,
+                drop_frames=False,
+            ).start(),
+            args.max_frames,
+        ),
+    ]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
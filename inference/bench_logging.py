@@ -0,0 +1,104 @@
+# Built-in imports
+import os
+import sys
+import json
+import time
+import argparse
+
+# Third-party imports
+import numpy as np
+from bson import ObjectId
+from loguru import logger
+
+# Local imports
+from synapsis_common.log import configure_logging
+
+AREA = {
+    "_id": ObjectId(),
+    "location": "kepatihan",
+    "area_name": "depan_gerbang_masuk",
+    "polygon_zone": [[x, x + 7] for x in range(0, 1200, 60)],
+}
+
+
+def frame_eager(frame_index, people_ids):
+    """The camera loop's logging before: eager f-strings, whole documents."""
+    st_ = time.time()
+    if frame_index % 250 == 0:
+        logger.debug(f"Area response: {AREA}")
+        logger.info(f"Refreshing areas at {10} second interval")
+    if frame_index % 125 == 0:
+        logger.info(f"Triggered event at {5} second interval")
+        logger.debug(f"People inserted with ids: {people_ids}")
+        logger.debug(f"Set people time: {time.time() - st_} seconds")
+        logger.debug(f"Counts updated for area_id: {AREA['_id']}")
+        logger.debug(f"Set counts time: {time.time() - st_} seconds")
+
+
+def frame_lazy(frame_index, people_ids):
+    """The camera loop's logging after: deferred formatting, counts not lists."""
+    st_ = time.time()
+    if frame_index % 250 == 0:
+        logger.debug("Area {} loaded for {}", AREA["area_name"], AREA["location"])
+        logger.debug("Refreshing areas at {} second interval", 10)
+    if frame_index % 125 == 0:
+        logger.debug("Triggered event at {} second interval", 5)
+        logger.debug("People inserted: {} records", len(people_ids))
+        logger.debug("Set people time: {:.4f} seconds", time.time() - st_)
+        logger.debug("Counts updated for area_id: {}", AREA["_id"])
+        logger.debug("Set counts time: {:.4f} seconds", time.time() - st_)
+
+
+def run(frame_logging, frames, people):
+    people_ids = [ObjectId() for _ in range(people)]
+    costs = np.empty(frames)
+    for frame_index in range(frames):
+        st_ = time.perf_counter()
+        frame_logging(frame_index, people_ids)
+        costs[frame_index] = time.perf_counter() - st_
+    return costs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure per-frame logging cost of the camera loop."
+    )
+    parser.add_argument("--frames", type=int, default=25 * 600)
+    parser.add_argument("--people", type=int, default=50, help="Records per capture")
+    parser.add_argument("--sink", default=os.devnull, help="File the logs go to")
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with open(args.sink, "w") as stream:
+        modes = [
+            ("before: TRACE, stdout sink, eager", None, frame_eager),
+            ("after: INFO", {"level": "INFO"}, frame_lazy),
+            ("after: DEBUG", {"level": "DEBUG"}, frame_lazy),
+            ("after: DEBUG, JSON", {"level": "DEBUG", "json_output": True}, frame_lazy),
+        ]
+        for name, settings, frame_logging in modes:
+            if settings is None:
+                logger.remove()
+                logger.add(stream, level="TRACE")
+            else:
+                configure_logging(stream=stream, **settings)
+            costs = run(frame_logging, args.frames, args.people) * 1e6
+            results.append(
+                {
+                    "mode": name,
+                    "mean_us_per_frame": float(costs.mean()),
+                    "p99_us_per_frame": float(np.percentile(costs, 99)),
+                    "max_us_per_frame": float(costs.max()),
+                }
+            )
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    for row in results:
+        logger.info(
+            f"{row['mode']:<34} mean {row['mean_us_per_frame']:7.2f} us, "
+            f"p99 {row['p99_us_per_frame']:8.2f} us, max {row['max_us_per_frame']:9.2f} us"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
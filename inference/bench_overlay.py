@@ -0,0 +1,85 @@
+# Built-in imports
+import sys
+import json
+import argparse
+import timeit
+
+# Third-party imports
+import numpy as np
+import supervision as sv
+from loguru import logger
+
+# Local imports
+from overlay import ZoneOverlay
+
+
+def make_polygons(n, frame_shape, seed=0):
+    """`n` random quadrilateral zones on the frame."""
+    rng = np.random.default_rng(seed)
+    height, width = frame_shape[:2]
+    polygons = []
+    for _ in range(n):
+        x, y = rng.integers(0, width - 400), rng.integers(0, height - 250)
+        polygons.append(
+            np.array([[x, y], [x + 400, y + 20], [x + 380, y + 250], [x - 10, y + 230]])
+        )
+    return polygons
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(
+        description="Compare per-zone annotators with the cached zone overlay."
+    )
+    parser.add_argument("--zones", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    frame = np.random.default_rng(0).integers(
+        0, 255, (args.height, args.width, 3), dtype=np.uint8
+    )
+    results = []
+    for n in args.zones:
+        polygons = make_polygons(n, frame.shape)
+        labels = [f"area_{i}: {i % 7}" for i in range(n)]
+        annotators = [
+            sv.PolygonZoneAnnotator(
+                zone=sv.PolygonZone(p), color=sv.Color.WHITE, thickness=2
+            )
+            for p in polygons
+        ]
+        overlay = ZoneOverlay()
+        overlay.set_zones(frame.shape, polygons)
+
+        def annotators_frame():
+            image = frame.copy()
+            for annotator, label in zip(annotators, labels):
+                image = annotator.annotate(scene=image, label=label)
+
+        def overlay_frame():
+            overlay.render(frame.copy(), labels)
+
+        row = {"zones": n}
+        for name, func in (
+            ("annotators", annotators_frame),
+            ("overlay", overlay_frame),
+        ):
+            row[f"{name}_ms"] = (
+                min(timeit.repeat(func, number=1, repeat=args.repeat)) * 1000
+            )
+        # Both include the frame copy, which the render path pays either way
+        row["copy_ms"] = (
+            min(timeit.repeat(frame.copy, number=1, repeat=args.repeat)) * 1000
+        )
+        results.append(row)
+        logger.info(
+            f"{n:>3} zones: annotators {row['annotators_ms']:.2f} ms, "
+            f"overlay {row['overlay_ms']:.2f} ms (frame copy {row['copy_ms']:.2f} ms)"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,104 @@
+# Built-in imports
+import sys
+import json
+import argparse
+import timeit
+
+# Third-party imports
+import numpy as np
+import supervision as sv
+from bson import ObjectId
+from loguru import logger
+
+# Local imports
+from records import PeopleBatch
+
+TRACKER_PREFIX = "1700000000000_"
+
+
+def make_detections(n, seed=0):
+    """Random tracked detections on a 1920x1080 frame."""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, [1800, 900], size=(n, 2))
+    wh = rng.uniform([20, 60], [120, 300], size=(n, 2))
+    return sv.Detections(
+        xyxy=np.hstack([xy, xy + wh]).astype(np.float32),
+        confidence=rng.uniform(0.45, 1.0, n).astype(np.float32),
+        class_id=np.zeros(n, dtype=int),
+        tracker_id=np.arange(1, n + 1),
+    )
+
+
+def legacy_capture(detections, masks):
+    """The former per-person dict path, up to the documents and count lists."""
+    people_list = []
+    for xyxy, mask, confidence, class_id, tracker_id, data in detections:
+        x1, y1, x2, y2 = map(int, xyxy)
+        people_list.append(
+            {
+                "location": "bench",
+                "conf": float(confidence),
+                "bbox": [x1, y1, x2, y2],
+                "tracker_id": f"{TRACKER_PREFIX}{tracker_id}",
+                "snapshot": None,
+            }
+        )
+    inserted_ids = np.array([ObjectId() for _ in people_list]).astype(str)
+    for polygon_trigger in masks:
+        inserted_ids[polygon_trigger].tolist()
+        inserted_ids[~polygon_trigger].tolist()
+        [f"{TRACKER_PREFIX}{t}" for t in detections[polygon_trigger].tracker_id]
+        [f"{TRACKER_PREFIX}{t}" for t in detections[~polygon_trigger].tracker_id]
+
+
+def batch_capture(detections, masks):
+    """The column path, up to the same documents and count lists."""
+    batch = PeopleBatch.from_detections(detections, "bench", TRACKER_PREFIX)
+    ids = [ObjectId() for _ in range(len(batch))]
+    # What set_people_columns hands to insert_many
+    [
+        {"_id": i, "location": batch.location, "conf": c, "bbox": b, "tracker_id": t}
+        for i, c, b, t in zip(
+            ids, batch.conf.tolist(), batch.bbox.tolist(), batch.tracker_id.tolist()
+        )
+    ]
+    batch.ids = np.empty(len(ids), dtype=object)
+    batch.ids[:] = ids
+    for polygon_trigger in masks:
+        batch.split(polygon_trigger)
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(
+        description="Compare the per-person dict and column capture paths."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--areas", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        detections = make_detections(n)
+        rng = np.random.default_rng(n)
+        masks = [rng.random(n) < 0.5 for _ in range(args.areas)]
+        row = {"detections": n, "areas": args.areas}
+        for name, func in (("legacy", legacy_capture), ("batch", batch_capture)):
+            best = min(
+                timeit.repeat(
+                    lambda: func(detections, masks), number=1, repeat=args.repeat
+                )
+            )
+            row[f"{name}_us"] = best * 1e6
+        row["speedup"] = row["legacy_us"] / row["batch_us"]
+        results.append(row)
+        logger.info(
+            f"{n:>4} detections: legacy {row['legacy_us']:.0f} us, "
+            f"batch {row['batch_us']:.0f} us ({row['speedup']:.1f}x)"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,206 @@
+# Built-in imports
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party imports
+import cv2
+import numpy as np
+
+# Local imports
+from snapshot_pack import SnapshotPacker
+from synapsis_common.clients import MINIO_UPLOAD_WORKERS
+
+
+def score_crop(crop, confidence, frame_area):
+    """Score a person crop by detector confidence, relative size and sharpness.
+
+    Sharpness is the variance of the Laplacian on a downscaled grey crop, squashed
+    into [0, 1) so a very textured background cannot dominate the score.
+
+    Args:
+        crop (np.ndarray): BGR crop of the person.
+        confidence (float): Detector confidence.
+        frame_area (int): Pixel area of the full frame.
+    Returns:
+        float: Higher is better.
+    """
+    h, w = crop.shape[:2]
+    if h == 0 or w == 0:
+        return 0.0
+    scale = 64 / max(h, w)
+    if scale < 1:
+        crop = cv2.resize(crop, (max(int(w * scale), 1), max(int(h * scale), 1)))
+    grey = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    sharpness = cv2.Laplacian(grey, cv2.CV_64F).var()
+    sharpness = sharpness / (sharpness + 100.0)
+    size = np.sqrt((h * w) / frame_area)
+    return float(confidence) * float(size) * (0.5 + 0.5 * sharpness)
+
+
+class BestShotSelector:
+    """Keep the best crop per track and upload it once instead of once per capture.
+
+    The best crop is handed to a SnapshotPacker when the track ends, or every
+    `refresh_interval` seconds while it is still visible and has a better crop
+    than the packed one. Once its pack is written, the track's people records
+    point at it and `snapshot_ref` returns the reference for later records.
+
+    Args:
+        tracker_prefix (str): Prefix of the stored tracker IDs, e.g. '<run epoch>_'.
+        object_prefix (str): Pack object prefix, '<bucket>/<path>/'.
+        pack_window (float, optional): Seconds a snapshot pack stays open. Defaults to 60.
+        track_timeout (float, optional): Seconds unseen before a track is ended. Defaults to 5.
+        refresh_interval (float, optional): Seconds between re-uploads of a live track. Defaults to 300.
+        rescore_interval (float, optional): Seconds between re-scoring a known track. Defaults to 1.
+        max_tracks (int, optional): Tracks kept in memory; the stalest is ended first. Defaults to 512.
+        upload_workers (int, optional): Background upload threads. Defaults to
+            MINIO_UPLOAD_WORKERS, which also sizes the shared MinIO HTTP pool.
+        on_uploaded (callable, optional): Called with the frame capture times of
+            the crops of every written pack.
+    """
+
+    def __init__(
+        self,
+        tracker_prefix,
+        object_prefix,
+        pack_window=60.0,
+        track_timeout=5.0,
+        refresh_interval=300.0,
+        rescore_interval=1.0,
+        max_tracks=512,
+        upload_workers=MINIO_UPLOAD_WORKERS,
+        on_uploaded=None,
+    ):
+        self.tracker_prefix = tracker_prefix
+        self.packer = SnapshotPacker(
+            object_prefix,
+            window=pack_window,
+            on_packed=self._on_packed,
+            on_uploaded=on_uploaded,
+        )
+        self.track_timeout = track_timeout
+        self.refresh_interval = refresh_interval
+        self.rescore_interval = rescore_interval
+        self.max_tracks = max_tracks
+        self.executor = ThreadPoolExecutor(
+            max_workers=upload_workers, thread_name_prefix="best-shot"
+        )
+        self.tracks = {}
+        self.uploads = 0
+
+    def snapshot_ref(self, tracker_id):
+        """Packed snapshot reference of a track, or None until its first pack is written."""
+        track = self.tracks.get(int(tracker_id))
+        return None if track is None else track["snapshot"]
+
+    def update(self, frame, detections, now=None, scale=1.0, captured_at=None):
+        """Score the crops of new tracks, and of known tracks every `rescore_interval`.
+
+        `scale` maps detection boxes onto `frame`, e.g. when detection ran on a
+        downscaled copy and `frame` is the full-resolution one. `captured_at` is
+        the frame's capture time, kept with the crop.
+
+        The full-resolution frame of the `ffmpeg` backend is the latest one its
+        second decoder produced, not matched by pts to the frame the boxes come
+        from, so a moving person's crop can be offset by up to a frame or two.
+        """
+        now = time.time() if now is None else now
+        if detections.tracker_id is None or len(detections) == 0:
+            return
+        frame_h, frame_w = frame.shape[:2]
+        frame_area = frame_h * frame_w
+        boxes = np.clip(
+            (detections.xyxy * scale).astype(int),
+            0,
+            [frame_w, frame_h, frame_w, frame_h],
+        )
+        for (x1, y1, x2, y2), confidence, tracker_id in zip(
+            boxes, detections.confidence, detections.tracker_id
+        ):
+            tracker_id = int(tracker_id)
+            track = self.tracks.get(tracker_id)
+            if track is not None:
+                track["last_seen"] = now
+                if now - track["scored_at"] < self.rescore_interval:
+                    continue
+            crop = frame[y1:y2, x1:x2]
+            if crop.size == 0:
+                continue
+            score = score_crop(crop, confidence, frame_area)
+            if track is None:
+                # `uploaded_at` starts at first sight, so short tracks upload once, at the end
+                track = {
+                    "score": -1.0,
+                    "crop": None,
+                    "dirty": False,
+                    "last_seen": now,
+                    "uploaded_at": now,
+                    "snapshot": None,
+                    "captured_at": None,
+                }
+                self.tracks[tracker_id] = track
+            track["scored_at"] = now
+            if score > track["score"]:
+                track["score"] = score
+                track["crop"] = crop.copy()
+                track["captured_at"] = captured_at
+                track["dirty"] = True
+
+        if len(self.tracks) > self.max_tracks:
+            stalest = sorted(self.tracks, key=lambda t: self.tracks[t]["last_seen"])
+            for tracker_id in stalest[: len(self.tracks) - self.max_tracks]:
+                self._end(tracker_id)
+
+    def touch(self, tracker_ids, now=None):
+        """Mark known tracks as seen without scoring a crop.
+
+        For frames analysed without a frame to crop from, e.g. between the
+        `ffmpeg` backend's full-resolution frames, so visible tracks are not
+        ended by `track_timeout` in the meantime.
+        """
+        if tracker_ids is None:
+            return
+        now = time.time() if now is None else now
+        for tracker_id in tracker_ids:
+            track = self.tracks.get(int(tracker_id))
+            if track is not None:
+                track["last_seen"] = now
+
+    def flush(self, now=None, force=False):
+        """Upload ended tracks and due refreshes; `force` ends every track."""
+        now = time.time() if now is None else now
+        for tracker_id in list(self.tracks):
+            track = self.tracks[tracker_id]
+            if force or now - track["last_seen"] >= self.track_timeout:
+                self._end(tracker_id)
+            elif track["dirty"] and now - track["uploaded_at"] >= self.refresh_interval:
+                self._upload(tracker_id, track, now)
+        if self.packer.due(now):
+            self.executor.submit(self.packer.flush)
+
+    def close(self):
+        self.flush(force=True)
+        self.executor.shutdown(wait=True)
+        self.packer.flush(force=True)
+
+    def _end(self, tracker_id):
+        track = self.tracks.pop(tracker_id)
+        if track["dirty"]:
+            self._upload(tracker_id, track, time.time())
+
+    def _upload(self, tracker_id, track, now):
+        track["dirty"] = False
+        track["uploaded_at"] = now
+        self.uploads += 1
+        self.executor.submit(
+            self.packer.add,
+            f"{self.tracker_prefix}{tracker_id}",
+            track["crop"],
+            track["captured_at"],
+        )
+
+    def _on_packed(self, refs):
+        for tracker_id, ref in refs.items():
+            track = self.tracks.get(int(tracker_id[len(self.tracker_prefix) :]))
+            if track is not None:
+                track["snapshot"] = ref
@@ -0,0 +1,273 @@
+# Built-in imports
+import os
+import re
+import shutil
+import threading
+import subprocess
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+
+# Session folder name, `output/<timestamp>` in the layout before per-location folders
+SESSION_NAME = re.compile(r"\d{8}_\d{6}")
+
+
+def parse_ladder(spec):
+    """Parse a resolution ladder such as "source:2500k,1280x720:1500k,640x360:500k".
+
+    Returns:
+        list of tuple: (width, height, bitrate) per rendition; width and height
+        are None for the input resolution.
+    """
+    ladder = []
+    for rendition in spec.split(","):
+        size, bitrate = rendition.strip().split(":")
+        if size == "source":
+            ladder.append((None, None, bitrate))
+        else:
+            width, height = size.split("x")
+            ladder.append((int(width), int(height), bitrate))
+    return ladder
+
+
+def directory_size(path):
+    """Total size in bytes of the files below `path`."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                # Segments are deleted by the encoder while walking
+                pass
+    return total
+
+
+def prune_sessions(root, keep=3, max_bytes=None, protect=None, pattern=None):
+    """Delete old output session folders below `root`, oldest first.
+
+    Every restart writes to a new timestamped folder, so folders beyond the
+    newest `keep`, and the oldest ones while `root` exceeds `max_bytes`, are
+    removed. `protect` (the running session) is never removed. With `pattern`,
+    only folders whose name matches it are sessions.
+
+    Returns:
+        list of str: Removed folders.
+    """
+    if not os.path.isdir(root):
+        return []
+    sessions = sorted(
+        (
+            entry
+            for entry in os.scandir(root)
+            if entry.is_dir() and (pattern is None or pattern.fullmatch(entry.name))
+        ),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    protect = os.path.abspath(protect) if protect else None
+    sizes = {entry.path: directory_size(entry.path) for entry in sessions}
+    total = sum(sizes.values())
+    removed = []
+    for index, entry in reversed(list(enumerate(sessions))):
+        if os.path.abspath(entry.path) == protect:
+            continue
+        if index >= keep or (max_bytes is not None and total > max_bytes):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            total -= sizes[entry.path]
+            removed.append(entry.path)
+    if removed:
+        logger.info(f"Removed {len(removed)} old output sessions from {root}")
+    return removed
+
+
+class SessionPruner:
+    """Apply `prune_sessions` to a location's output folder in the background.
+
+    Runs on start and then every `interval` seconds, so sessions left by
+    crashed runs or outliving the size limit are removed while the camera
+    runs. Session folders of the layout before per-location folders, directly
+    below `root`, get the same limits.
+
+    Args:
+        root (str): Output root, e.g. 'output'.
+        location (str): Camera/location name; its sessions are `<root>/<location>/`.
+        protect (str): The running session, never removed.
+        keep (int, optional): Sessions kept. Defaults to 3.
+        max_bytes (float, optional): Size limit of the sessions. Defaults to None.
+        interval (float, optional): Seconds between two passes. Defaults to 600.
+    """
+
+    def __init__(self, root, location, protect, keep=3, max_bytes=None, interval=600.0):
+        self.root = root
+        self.location = location
+        self.protect = protect
+        self.keep = keep
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while True:
+            try:
+                self.prune()
+            except Exception as e:
+                logger.error(f"Error pruning output sessions: {str(e)}")
+            if self._stop.wait(self.interval):
+                break
+
+    def prune(self):
+        removed = prune_sessions(
+            os.path.join(self.root, self.location),
+            keep=self.keep,
+            max_bytes=self.max_bytes,
+            protect=self.protect,
+        )
+        return removed + prune_sessions(
+            self.root, keep=self.keep, max_bytes=self.max_bytes, pattern=SESSION_NAME
+        )
+
+    def stop(self):
+        self._stop.set()
+
+
+class DashOutput:
+    """Persistent low-latency DASH encoder fed raw BGR frames over a pipe.
+
+    One ffmpeg process is started on the first frame and kept for the whole
+    run; frames are written from their own buffer, without a Python copy.
+    Input timestamps are taken from the wall clock and the output is resampled
+    to a constant rate, so a loop running below the source rate does not push
+    the stream behind real time. Segments are short, chunked (low-latency
+    DASH) and deleted by ffmpeg once `window_size + extra_window_size`
+    segments old, so a session's disk usage is bounded.
+
+    Args:
+        output_folder (str): Session folder for the manifest and segments.
+        framerate (float): Output frame rate.
+        preset (str, optional): x264 preset. Defaults to "veryfast".
+        ladder (str, optional): Renditions, see `parse_ladder`. Defaults to "source:2000k".
+        segment_seconds (float, optional): Segment duration. Defaults to 1.
+        window_size (int, optional): Segments listed in the manifest. Defaults to 4.
+        extra_window_size (int, optional): Segments kept on disk after leaving
+            the manifest. Defaults to 2.
+        manifest (str, optional): Manifest file name. Defaults to "dash_out.mpd".
+    """
+
+    def __init__(
+        self,
+        output_folder,
+        framerate,
+        preset="veryfast",
+        ladder="source:2000k",
+        segment_seconds=1.0,
+        window_size=4,
+        extra_window_size=2,
+        manifest="dash_out.mpd",
+    ):
+        self.output_folder = output_folder
+        self.framerate = framerate
+        self.preset = preset
+        self.ladder = parse_ladder(ladder)
+        self.segment_seconds = segment_seconds
+        self.window_size = window_size
+        self.extra_window_size = extra_window_size
+        self.manifest = os.path.join(output_folder, manifest)
+        self.process = None
+        self.shape = None
+        self.frames_written = 0
+        self.restarts = 0
+
+    def _command(self, width, height):
+        gop = max(1, int(round(self.framerate * self.segment_seconds)))
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+        command += ["-use_wallclock_as_timestamps", "1"]
+        command += ["-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}"]
+        command += ["-i", "pipe:0", "-an"]
+
+        outputs = len(self.ladder)
+        graph = [f"[0:v]split={outputs}" + "".join(f"[s{i}]" for i in range(outputs))]
+        for i, (w, h, _) in enumerate(self.ladder):
+            scale = f"scale={w}:{h}:flags=bilinear," if w else ""
+            graph.append(f"[s{i}]{scale}format=yuv420p[v{i}]")
+        command += ["-filter_complex", ";".join(graph)]
+        for i, (_, _, bitrate) in enumerate(self.ladder):
+            command += ["-map", f"[v{i}]", f"-b:v:{i}", bitrate]
+            command += [f"-maxrate:v:{i}", bitrate, f"-bufsize:v:{i}", bitrate]
+
+        command += ["-c:v", "libx264", "-preset", self.preset, "-tune", "zerolatency"]
+        command += ["-vsync", "cfr", "-r", f"{self.framerate:g}"]
+        # Fixed GOP at the segment duration, so every segment starts on a keyframe
+        command += ["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"]
+        command += [
+            "-f",
+            "dash",
+            "-seg_duration",
+            f"{self.segment_seconds:g}",
+            "-window_size",
+            str(self.window_size),
+            "-extra_window_size",
+            str(self.extra_window_size),
+            "-streaming",
+            "1",
+            "-ldash",
+            "1",
+            "-use_template",
+            "1",
+            "-use_timeline",
+            "0",
+            "-adaptation_sets",
+            "id=0,streams=v",
+            self.manifest,
+        ]
+        return command
+
+    def start(self, frame_shape):
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.shape = frame_shape
+        height, width = frame_shape[:2]
+        self.process = subprocess.Popen(
+            self._command(width, height), stdin=subprocess.PIPE, bufsize=0
+        )
+        logger.info(
+            f"DASH encoder: {width}x{height} @ {self.framerate:g} fps, "
+            f"{len(self.ladder)} renditions, {self.segment_seconds:g} s segments "
+            f"-> {self.manifest}"
+        )
+        return self
+
+    def write(self, frame):
+        """Send one BGR frame to the encoder, restarting it if it has exited."""
+        if self.process is not None and self.process.poll() is not None:
+            logger.error(f"DASH encoder exited ({self.process.returncode}), restarting")
+            self.process = None
+            self.restarts += 1
+        if self.process is None or frame.shape != self.shape:
+            self.close()
+            self.start(frame.shape)
+        try:
+            self.process.stdin.write(memoryview(np.ascontiguousarray(frame)))
+            self.frames_written += 1
+        except (BrokenPipeError, OSError) as e:
+            logger.error(f"Error writing frame to DASH encoder: {str(e)}")
+
+    def disk_usage(self):
+        return directory_size(self.output_folder)
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10)
+        except (BrokenPipeError, OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
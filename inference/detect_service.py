@@ -0,0 +1,374 @@
+# Built-in imports
+import os
+import json
+import time
+import queue
+import hmac
+import base64
+import argparse
+import threading
+import ipaddress
+from concurrent.futures import Future
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Third-party imports
+import cv2
+import numpy as np
+import supervision as sv
+from loguru import logger
+from ultralytics import YOLO
+
+# Local imports
+from synapsis_common.log import configure_logging, install_level_toggle
+from synapsis_common.utility import (
+    get_area,
+    SynapsisResponse,
+    get_area_names_based_on_location,
+)
+from warmup import warmup_model
+
+# Shared secret of /detect; without it only loopback callers may detect
+DETECT_TOKEN = os.getenv("DETECT_TOKEN", "")
+# Largest request body accepted, in bytes
+DETECT_MAX_BODY = int(float(os.getenv("DETECT_MAX_BODY_MB", "32")) * 1024 * 1024)
+
+
+class DynamicBatcher:
+    """Merge concurrent detection requests into model batches.
+
+    A batch is sent to the model once `max_batch` frames are waiting, or
+    `max_wait_ms` after its first frame arrived, whichever comes first. With
+    `max_batch=1` every frame is its own model call.
+
+    Args:
+        predict (callable): Takes a list of BGR frames, returns one result per frame.
+        max_batch (int, optional): Frames per model call. Defaults to 8.
+        max_wait_ms (float, optional): Longest a frame waits for others. Defaults to 10.
+        max_queue (int, optional): Frames waiting before requests are refused. Defaults to 256.
+    """
+
+    def __init__(self, predict, max_batch=8, max_wait_ms=10.0, max_queue=256):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.pending = queue.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.frames = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def has_room(self, count):
+        """Whether `count` more frames fit in the queue right now."""
+        return self.pending.qsize() + count <= self.max_queue
+
+    def submit(self, frames):
+        """Queue frames for detection.
+
+        Returns:
+            list of Future: One per frame, or None if the queue is full.
+        """
+        futures = [Future() for _ in frames]
+        try:
+            for frame, future in zip(frames, futures):
+                self.pending.put_nowait((frame, future))
+        except queue.Full:
+            for future in futures:
+                future.cancel()
+            return None
+        return futures
+
+    def _loop(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Frames of a request refused mid-way were cancelled; the others
+            # can't be cancelled any more once marked running
+            batch = [(f, fut) for f, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.predict([frame for frame, _ in batch])
+            except Exception as e:
+                logger.error(f"Error running detection batch: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    @property
+    def mean_batch(self):
+        return self.frames / self.batches if self.batches else 0.0
+
+
+class AreaCache:
+    """Area polygons per location, reloaded after `ttl` seconds."""
+
+    def __init__(self, ttl=10.0):
+        self.ttl = ttl
+        self.areas = {}
+        self.lock = threading.Lock()
+
+    def get(self, location):
+        """List of (area_name, PolygonZone), or the SynapsisResponse of a failed read."""
+        with self.lock:
+            cached = self.areas.get(location)
+            if cached is not None and time.time() - cached[0] < self.ttl:
+                return cached[1]
+        try:
+            names = get_area_names_based_on_location(location)
+        except Exception as e:
+            logger.error(f"Error retrieving areas of {location}: {str(e)}")
+            return SynapsisResponse.SERVER_ERROR
+        if not names:
+            return SynapsisResponse.NOT_FOUND
+        zones = []
+        for name in names:
+            resp = get_area(location=location, area_name=name)
+            if resp in (SynapsisResponse.NOT_FOUND, SynapsisResponse.SERVER_ERROR):
+                return resp
+            zones.append((name, sv.PolygonZone(np.array(resp["polygon_zone"]))))
+        with self.lock:
+            self.areas[location] = (time.time(), zones)
+        return zones
+
+
+class DetectionService:
+    """Person detection for images and frame batches over HTTP.
+
+    Args:
+        model (YOLO): Loaded Ultralytics model.
+        imgsz (int, optional): Model input size. Defaults to 640.
+        conf (float, optional): Confidence threshold. Defaults to 0.45.
+        device (int | str, optional): Inference device. Defaults to 0.
+        max_batch (int, optional): See `DynamicBatcher`. Defaults to 8.
+        max_wait_ms (float, optional): See `DynamicBatcher`. Defaults to 10.
+        timeout (float, optional): Seconds a request waits for its results. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        model,
+        imgsz=640,
+        conf=0.45,
+        device=0,
+        max_batch=8,
+        max_wait_ms=10.0,
+        timeout=30.0,
+    ):
+        self.model = model
+        self.imgsz = imgsz
+        self.conf = conf
+        self.device = device
+        self.timeout = timeout
+        self.batcher = DynamicBatcher(self._predict, max_batch, max_wait_ms)
+        self.areas = AreaCache()
+
+    def _predict(self, frames):
+        results = self.model.predict(
+            source=frames,
+            imgsz=self.imgsz,
+            conf=self.conf,
+            classes=[0],
+            device=self.device,
+            verbose=False,
+        )
+        return [sv.Detections.from_ultralytics(result) for result in results]
+
+    def detect(self, frames, location=None):
+        """Detect people on frames and, with a location, assign them to its areas.
+
+        Returns:
+            list of dict: Per frame, detections (bbox, confidence, areas) and
+            people per area. SynapsisResponse.NOT_FOUND or SERVER_ERROR if the
+            location's areas can't be read, None if the service is saturated.
+        """
+        zones = None
+        if location is not None:
+            zones = self.areas.get(location)
+            if not isinstance(zones, list):
+                return zones
+        futures = self.batcher.submit(frames)
+        if futures is None:
+            return None
+        try:
+            detections = [future.result(self.timeout) for future in futures]
+        except Exception as e:
+            logger.error(f"Error waiting for detections: {str(e)}")
+            return SynapsisResponse.SERVER_ERROR
+        return [self._describe(d, zones) for d in detections]
+
+    def _describe(self, detections, zones):
+        inside = {name: zone.trigger(detections) for name, zone in zones or []}
+        return {
+            "detections": [
+                {
+                    "bbox": [round(float(v), 1) for v in detections.xyxy[i]],
+                    "confidence": round(float(detections.confidence[i]), 3),
+                    "areas": [name for name, mask in inside.items() if mask[i]],
+                }
+                for i in range(len(detections))
+            ],
+            "areas": {name: int(mask.sum()) for name, mask in inside.items()},
+        }
+
+
+def split_images(body, content_type):
+    """Encoded images of a request body: one image, or JSON {"images": [base64]}."""
+    if content_type.startswith("application/json"):
+        return [base64.b64decode(image) for image in json.loads(body)["images"]]
+    return [body]
+
+
+def decode_images(encoded):
+    """BGR frames of encoded images."""
+    frames = [
+        cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        for data in encoded
+    ]
+    if any(frame is None for frame in frames):
+        raise ValueError("Undecodable image")
+    return frames
+
+
+def is_trusted_caller(client_host, authorization):
+    if DETECT_TOKEN:
+        return authorization is not None and hmac.compare_digest(
+            authorization.encode(), f"Bearer {DETECT_TOKEN}".encode()
+        )
+    try:
+        return ipaddress.ip_address(client_host).is_loopback
+    except ValueError:
+        return False
+
+
+def make_handler(service):
+    class DetectionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, message, data=None):
+            body = json.dumps(
+                {"status": status, "message": message, "data": data}
+            ).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if urlparse(self.path).path != "/health":
+                return self._reply(404, "Not found")
+            batcher = service.batcher
+            self._reply(
+                200,
+                "Detection service is running",
+                {
+                    "queued": batcher.pending.qsize(),
+                    "batches": batcher.batches,
+                    "frames": batcher.frames,
+                    "mean_batch": round(batcher.mean_batch, 2),
+                },
+            )
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/detect":
+                return self._reply(404, "Not found")
+            if not is_trusted_caller(
+                self.client_address[0], self.headers.get("Authorization")
+            ):
+                self.close_connection = True
+                return self._reply(401, "Unauthorized")
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                self.close_connection = True
+                return self._reply(400, "Invalid Content-Length")
+            if length > DETECT_MAX_BODY:
+                # The body is not read, so the connection can't be reused
+                self.close_connection = True
+                return self._reply(413, f"Body over {DETECT_MAX_BODY} bytes")
+            location = parse_qs(url.query).get("location", [None])[0]
+            body = self.rfile.read(length)
+            try:
+                encoded = split_images(body, self.headers.get("Content-Type", ""))
+            except Exception as e:
+                return self._reply(400, f"Invalid images: {str(e)}")
+            if len(encoded) > service.batcher.max_queue:
+                return self._reply(
+                    413, f"More than {service.batcher.max_queue} images per request"
+                )
+            # Refused before decoding, so a saturated service spends nothing on it
+            if not service.batcher.has_room(len(encoded)):
+                return self._reply(503, "Detection queue is full, retry later")
+            try:
+                frames = decode_images(encoded)
+            except Exception as e:
+                return self._reply(400, f"Invalid images: {str(e)}")
+            results = service.detect(frames, location)
+            if results is None:
+                return self._reply(503, "Detection queue is full, retry later")
+            if results == SynapsisResponse.NOT_FOUND:
+                return self._reply(404, f"Areas of location {location} not found")
+            if results == SynapsisResponse.SERVER_ERROR:
+                return self._reply(500, "Error running detection or reading areas")
+            self._reply(200, "Detections retrieved successfully", results)
+
+        def log_message(self, format, *args):
+            logger.trace("{} {}", self.address_string(), format % args)
+
+    return DetectionHandler
+
+
+def create_server(service, host="127.0.0.1", port=8010):
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    configure_logging()
+    install_level_toggle()
+    parser = argparse.ArgumentParser(
+        description="Serve person detection and area membership over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--model", default=os.getenv("DETECT_MODEL", "yolo11l.pt"))
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.45)
+    parser.add_argument("--device", default="0")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    device = int(args.device) if args.device.isdigit() else args.device
+    model = YOLO(os.path.join("models", args.model))
+    warmup_model(model, imgsz=args.imgsz, batch=args.max_batch, device=device)
+    service = DetectionService(
+        model,
+        imgsz=args.imgsz,
+        conf=args.conf,
+        device=device,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+    )
+    server = create_server(service, args.host, args.port)
+    logger.info(
+        f"Detection service on {args.host}:{args.port} "
+        f"(max batch {args.max_batch}, max wait {args.max_wait_ms} ms)"
+    )
+    server.serve_forever()
@@ -0,0 +1,185 @@
+# Built-in imports
+import time
+import uuid
+import bisect
+import threading
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+from synapsis_common.utility import (
+    SynapsisResponse,
+    set_freshness,
+    FRESHNESS_SLO_SECONDS,
+)
+
+# Upper bounds (seconds) of the lag buckets; the last bucket is unbounded
+LAG_BOUNDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+class LagHistogram:
+    """Fixed-bucket histogram of lags, in seconds, plus a count of failed writes.
+
+    Args:
+        bounds (tuple of float, optional): Bucket upper bounds. Defaults to LAG_BOUNDS.
+        slo (float, optional): Lags counted as within the SLO. Defaults to FRESHNESS_SLO_SECONDS.
+    """
+
+    def __init__(self, bounds=LAG_BOUNDS, slo=FRESHNESS_SLO_SECONDS):
+        self.bounds = bounds
+        self.slo = slo
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.within_slo = 0
+        # Writes that failed; they never reached the stage, so have no lag
+        self.failed = 0
+
+    def observe(self, lag):
+        self.counts[bisect.bisect_left(self.bounds, lag)] += 1
+        self.count += 1
+        self.sum += lag
+        self.max = max(self.max, lag)
+        self.within_slo += lag <= self.slo
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, capped at the max."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return (
+                    min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+                )
+        return self.max
+
+    def to_dict(self):
+        return {
+            "bounds": list(self.bounds),
+            "counts": list(self.counts),
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 4),
+            "within_slo": (
+                round(self.within_slo / self.count, 4) if self.count else None
+            ),
+            "failed": self.failed,
+        }
+
+
+class FreshnessTracer:
+    """Per-stage lag histograms of a camera, measured from frame capture.
+
+    Every stage is timed from the capture of the frame it works on, so each
+    histogram is the age of the data when it leaves that stage. The histograms
+    of the last `interval` seconds, and since start, are stored with
+    `set_freshness` every `interval` seconds. Stages used by the camera loop:
+    'read' (frame reached the loop), 'detect' (detections ready), 'people' and
+    'counts' (records written) and 'snapshot' (crop uploaded). A failed write is
+    counted with `fail` instead of being observed.
+
+    Args:
+        location (str): Camera/location name.
+        interval (float, optional): Seconds between stored reports. Defaults to 60.
+        slo (float, optional): Target lag in seconds. Defaults to FRESHNESS_SLO_SECONDS.
+    """
+
+    def __init__(self, location, interval=60.0, slo=FRESHNESS_SLO_SECONDS):
+        self.location = location
+        self.interval = interval
+        self.slo = slo
+        self.window = {}
+        self.total = {}
+        self.window_start = time.time()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_trace():
+        """ID linking the records written for one capture."""
+        return uuid.uuid4().hex
+
+    def observe(self, stage, captured_at, now=None):
+        """Record the lag of `stage` for a frame captured at `captured_at`."""
+        if captured_at is None:
+            return
+        lag = max((time.time() if now is None else now) - captured_at, 0.0)
+        with self._lock:
+            for histogram in self._histograms(stage):
+                histogram.observe(lag)
+
+    def fail(self, stage):
+        """Count a failed write of `stage`; it does not add a lag sample."""
+        with self._lock:
+            for histogram in self._histograms(stage):
+                histogram.failed += 1
+
+    def _histograms(self, stage):
+        if stage not in self.window:
+            self.window[stage] = LagHistogram(slo=self.slo)
+            self.total[stage] = LagHistogram(slo=self.slo)
+        return self.window[stage], self.total[stage]
+
+    def observe_many(self, stage, captured_at, now=None):
+        now = time.time() if now is None else now
+        for t in captured_at:
+            self.observe(stage, t, now=now)
+
+    def report(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._report(now)
+
+    def _report(self, now):
+        return {
+            "slo_seconds": self.slo,
+            "window_seconds": round(now - self.window_start, 1),
+            "stages": {
+                stage: {
+                    "window": self.window[stage].to_dict(),
+                    "total": self.total[stage].to_dict(),
+                }
+                for stage in self.window
+            },
+        }
+
+    def maybe_publish(self, now=None):
+        now = time.time() if now is None else now
+        if now - self.window_start >= self.interval:
+            self.publish(now)
+
+    def publish(self, now=None):
+        """Store the report and start a new window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            report = self._report(now)
+            for histogram in self.window.values():
+                histogram.reset()
+            self.window_start = now
+        counts = report["stages"].get("counts", {}).get("window", {})
+        if counts.get("p95") is not None and counts["p95"] > self.slo:
+            logger.warning(
+                "Counts of {} are stale: p95 {}s from capture to database (SLO {}s)",
+                self.location,
+                counts["p95"],
+                self.slo,
+            )
+        if counts.get("failed"):
+            logger.warning(
+                "{} count writes of {} failed in the last {}s",
+                counts["failed"],
+                self.location,
+                report["window_seconds"],
+            )
+        if set_freshness(self.location, report) == SynapsisResponse.SERVER_ERROR:
+            logger.error(f"Error storing freshness of {self.location}")
+        return report
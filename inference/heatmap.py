@@ -0,0 +1,112 @@
+# Built-in imports
+import time
+import zlib
+from datetime import datetime, timezone
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+from synapsis_common.utility import SynapsisResponse, set_heatmaps
+
+
+class OccupancyHeatmap:
+    """Accumulate a downscaled occupancy raster per camera and per area.
+
+    Each analysed frame adds one hit per detection to the grid cell under its
+    anchor point (bottom-centre of the box, where the person stands). Rasters
+    are flushed every `bucket_seconds` as zlib-compressed arrays, one document
+    per (area, time bucket), so a heatmap over any range is a sum of buckets.
+
+    Args:
+        location (str): Camera/location name.
+        frame_shape (tuple): Source frame size as (height, width).
+        cell (int, optional): Grid cell size in source pixels. Defaults to 16.
+        bucket_seconds (int, optional): Time bucket length. Defaults to 300.
+    """
+
+    CAMERA = "_camera"  # area_id of the whole-frame raster
+
+    def __init__(self, location, frame_shape, cell=16, bucket_seconds=300):
+        self.location = location
+        self.cell = cell
+        self.bucket_seconds = bucket_seconds
+        height, width = frame_shape
+        self.shape = (-(-height // cell), -(-width // cell))
+        self.rasters = {}
+        self.frames = 0
+        self.bucket_start = self._bucket_of(time.time())
+
+    def _bucket_of(self, now):
+        return int(now // self.bucket_seconds) * self.bucket_seconds
+
+    def _raster(self, area_id):
+        raster = self.rasters.get(area_id)
+        if raster is None:
+            raster = np.zeros(self.shape, dtype=np.uint32)
+            self.rasters[area_id] = raster
+        return raster
+
+    def cells(self, detections, scale=1.0):
+        """Flat raster indices of the detections' anchor points.
+
+        `scale` converts detection pixels to source pixels when frames were
+        downscaled before detection.
+        """
+        xyxy = detections.xyxy * scale
+        cols = ((xyxy[:, 0] + xyxy[:, 2]) * 0.5 / self.cell).astype(np.intp)
+        rows = (xyxy[:, 3] / self.cell).astype(np.intp)
+        np.clip(rows, 0, self.shape[0] - 1, out=rows)
+        np.clip(cols, 0, self.shape[1] - 1, out=cols)
+        return rows * self.shape[1] + cols
+
+    def update(self, cells, area_id=None, mask=None):
+        """Add one hit per detection, for the camera or for one area.
+
+        Args:
+            cells (np.ndarray): Output of `cells()` for this frame.
+            area_id (str, optional): Area to add to; None for the whole camera.
+            mask (np.ndarray, optional): Boolean mask of detections inside the area.
+        """
+        if area_id is None:
+            area_id = self.CAMERA
+            self.frames += 1
+        if mask is not None:
+            cells = cells[mask]
+        if len(cells):
+            np.add.at(self._raster(area_id).reshape(-1), cells, 1)
+
+    def maybe_flush(self, now=None):
+        """Flush the current bucket once time has moved past it."""
+        now = time.time() if now is None else now
+        if self._bucket_of(now) != self.bucket_start:
+            self.flush()
+            self.bucket_start = self._bucket_of(now)
+
+    def flush(self):
+        """Write the current bucket's non-empty rasters and reset them."""
+        bucket_start = datetime.fromtimestamp(self.bucket_start, tz=timezone.utc)
+        docs = []
+        for area_id, raster in self.rasters.items():
+            peak = int(raster.max())
+            if peak == 0:
+                continue
+            dtype = np.uint16 if peak <= np.iinfo(np.uint16).max else np.uint32
+            docs.append(
+                {
+                    "location": self.location,
+                    "area_id": area_id,
+                    "bucket_start": bucket_start,
+                    "bucket_seconds": self.bucket_seconds,
+                    "cell": self.cell,
+                    "shape": list(self.shape),
+                    "dtype": np.dtype(dtype).name,
+                    "frames": self.frames,
+                    "data": zlib.compress(raster.astype(dtype).tobytes(), 6),
+                }
+            )
+        self.rasters = {}
+        self.frames = 0
+        if docs and set_heatmaps(docs) == SynapsisResponse.SERVER_ERROR:
+            logger.error(f"Error flushing {len(docs)} heatmap buckets")
@@ -16,107 +16,240 @@ import numpy as np
 import supervision as sv
 from loguru import logger
 from ultralytics import YOLO
-from vidgear.gears import CamGear, StreamGear
-
+from vidgear.gears import CamGear
 
 # Local imports
-from utility import (
+from synapsis_common.log import configure_logging, install_level_toggle
+from synapsis_common.utility import (
     get_epoch_ms_iso_utc,
     get_area,
     SynapsisResponse,
-    upload_ndarray_to_minio,
-    set_people_many,
     set_counts,
+    ensure_count_collections,
+    ensure_heatmap_indexes,
+    ensure_trajectory_indexes,
     get_timestamp_for_filename,
     get_area_names_based_on_location,
 )
+from warmup import warmup_model
+from qos import QosController
+from best_shot import BestShotSelector
+from heatmap import OccupancyHeatmap
+from ingest import FFmpegSource
+from records import PeopleBatch
+from alerts import AlertEngine
+from overlay import ZoneOverlay
+from dash_output import DashOutput, SessionPruner
+from memory import MemoryMonitor
+from trajectory import TrajectoryRecorder
+from freshness import FreshnessTracer
+from occupancy_feed import OccupancyPublisher
 
 # Logger configuration
-logger.remove()
-logger.add(sys.stdout, level="TRACE")
+# Background, rate-limited sink; SIGUSR2 toggles DEBUG at runtime
+configure_logging()
+install_level_toggle()
 
 
-def refresh_areas(LOCATION, AREAS):
-    area_ids, area_names, polygon_zones, polygon_annotators = [], [], [], []
+def refresh_areas(LOCATION, AREAS, scale=1.0):
+    area_ids, area_names, polygon_zones, polygons = [], [], [], []
     for area in AREAS:
         resp = get_area(location=LOCATION, area_name=area)
-        logger.debug(f"Area response: {resp}")
+        logger.debug("Area {} loaded for {}", area, LOCATION)
 
         if resp == SynapsisResponse.NOT_FOUND:
             logger.warning(f"Area {area} not found in location {LOCATION}")
-            return None, None, None
+            return None, None, None, None
         if resp == SynapsisResponse.SERVER_ERROR:
             logger.error(f"Error retrieving area {area} in location {LOCATION}")
-            return None, None, None
+            return None, None, None, None
         id_temp = resp["_id"]
         area_ids.append(str(id_temp))
         area_names.append(resp["area_name"])
 
-        p_temp = sv.PolygonZone(np.array(resp["polygon_zone"]))
+        # Polygons are stored in source pixels; detections may be downscaled
+        polygon = (np.array(resp["polygon_zone"]) / scale).astype(int)
+        p_temp = sv.PolygonZone(polygon)
         polygon_zones.append(p_temp)
-        polygon_annotators.append(
-            sv.PolygonZoneAnnotator(zone=p_temp, color=sv.Color.WHITE, thickness=2)
-        )
-    return area_ids, area_names, polygon_zones, polygon_annotators
-
-
-def main():
-    LOCATION = "kepatihan"  # You can change this
-    """
-    AREA options (default):
-        kepatihan           : depan_gerbang_masuk
-        beringharjo         : penyeberangan_pasar
-        nolkm               : area_1, area_2
-        dewi_sartika        : area_1, area_2
-        pedati_arah_gudang  : lorong_gudang
-        pedati_surken       : lorong_pasar
+        polygons.append(polygon)
+    return area_ids, area_names, polygon_zones, polygons
+
+
+# AREA options (default):
+#     kepatihan           : depan_gerbang_masuk
+#     beringharjo         : penyeberangan_pasar
+#     nolkm               : area_1, area_2
+#     dewi_sartika        : area_1, area_2
+#     pedati_arah_gudang  : lorong_gudang
+#     pedati_surken       : lorong_pasar
+SOURCES = {
+    "kepatihan": "https://cctvjss.jogjakota.go.id/malioboro/Malioboro_10_Kepatihan.stream/playlist.m3u8",
+    "nolkm": "https://cctvjss.jogjakota.go.id/malioboro/NolKm_Utara.stream/playlist.m3u8",
+    "beringharjo": "https://cctvjss.jogjakota.go.id/malioboro/Malioboro_30_Pasar_Beringharjo.stream/playlist.m3u8",
+    "dewi_sartika": "https://restreamer3.kotabogor.go.id/memfs/b99d528a-1eb8-47bf-ba0f-a63fe11dbece.m3u8",
+    "pedati_arah_gudang": "https://restreamer3.kotabogor.go.id/memfs/c2d90a44-8f2c-4103-82ad-6cb1730a5000.m3u8",
+    "pedati_surken": "https://restreamer3.kotabogor.go.id/memfs/eedbb9a2-1571-41bd-92db-73b946e3e9b2.m3u8",
+}
+
+
+def run_camera(LOCATION, source=None, stop_event=None, load=None, display=None):
+    """Run detection, tracking and counting on one camera until its stream ends.
+
+    Args:
+        LOCATION (str): Camera/location name, as used by its areas.
+        source (str, optional): Stream URL or file. Defaults to INGEST_SOURCE or SOURCES[LOCATION].
+        stop_event (Event, optional): Stops the loop when set.
+        load (Array, optional): Shared [fps, detections per frame], updated every second.
+        display (bool, optional): Show a window instead of streaming DASH.
+            Defaults to True outside Docker.
     """
-
-    SOURCES = {
-        "kepatihan": "https://cctvjss.jogjakota.go.id/malioboro/Malioboro_10_Kepatihan.stream/playlist.m3u8",
-        "nolkm": "https://cctvjss.jogjakota.go.id/malioboro/NolKm_Utara.stream/playlist.m3u8",
-        "beringharjo": "https://cctvjss.jogjakota.go.id/malioboro/Malioboro_30_Pasar_Beringharjo.stream/playlist.m3u8",
-        "dewi_sartika": "https://restreamer3.kotabogor.go.id/memfs/b99d528a-1eb8-47bf-ba0f-a63fe11dbece.m3u8",
-        "pedati_arah_gudang": "https://restreamer3.kotabogor.go.id/memfs/c2d90a44-8f2c-4103-82ad-6cb1730a5000.m3u8",
-        "pedati_surken": "https://restreamer3.kotabogor.go.id/memfs/eedbb9a2-1571-41bd-92db-73b946e3e9b2.m3u8",
-    }
+    if display is None:
+        display = not os.path.exists("/.dockerenv")
     MINIO_BUCKET = "synapsis"
+    MODEL_DEVICE = 0
+    MODEL_BATCH = 1
+    # Per-camera latency budget in ms; cameras not listed use the frame interval
+    QOS_DEADLINES_MS = {}
+    # "ffmpeg" decodes and downscales in a managed ffmpeg process, "camgear"
+    # decodes full frames in Python; INGEST_SOURCE overrides the camera URL
+    INGEST_BACKEND = os.getenv("INGEST_BACKEND", "camgear")
+    INGEST_SOURCE = source or os.getenv("INGEST_SOURCE") or SOURCES[LOCATION]
+    INGEST_WIDTH = int(os.getenv("INGEST_WIDTH", "960"))
+    INGEST_DECODE_THREADS = int(os.getenv("INGEST_DECODE_THREADS", "2"))
+    # Keep full-resolution frames on capture ticks for best-shot crops
+    INGEST_FULL_RES = os.getenv("INGEST_FULL_RES", "True") == "True"
+    # DASH output: x264 preset, "WxH:bitrate" ladder ("source" keeps the frame
+    # size), segment length, and retention of segments and session folders
+    DASH_PRESET = os.getenv("DASH_PRESET", "veryfast")
+    DASH_LADDER = os.getenv("DASH_LADDER", "source:2000k")
+    DASH_SEGMENT_SECONDS = float(os.getenv("DASH_SEGMENT_SECONDS", "1"))
+    DASH_WINDOW_SIZE = int(os.getenv("DASH_WINDOW_SIZE", "4"))
+    DASH_KEEP_SESSIONS = int(os.getenv("DASH_KEEP_SESSIONS", "3"))
+    DASH_MAX_MB = float(os.getenv("DASH_MAX_MB", "2048"))
+    DASH_PRUNE_INTERVAL = float(os.getenv("DASH_PRUNE_INTERVAL", "600"))
+    # Upper bounds of per-track state, in tracks or frames
+    MAX_TRACKS = int(os.getenv("MAX_TRACKS", "512"))
+    TRACE_LENGTH = int(os.getenv("TRACE_LENGTH", "30"))
+    # Replay file sources endlessly (`ffmpeg` backend), e.g. for soak tests
+    INGEST_LOOP = os.getenv("INGEST_LOOP", "False") == "True"
+    memory_monitor = MemoryMonitor(
+        interval=float(os.getenv("MEMORY_SAMPLE_INTERVAL", "30")),
+        max_growth_mb_per_hour=float(os.getenv("MEMORY_MAX_GROWTH_MB_PER_HOUR", "20")),
+        tracemalloc_frames=int(os.getenv("MEMORY_TRACEMALLOC_FRAMES", "0")),
+    ).start()
     PROGRAM_START_EPOCH_MS, PROGRAM_START_ISO_UTC = get_epoch_ms_iso_utc()
+    ensure_count_collections()
+    ensure_heatmap_indexes()
+    ensure_trajectory_indexes()
+
+    # QoS ladder levels whose weights are not in models/ are skipped; the
+    # starting level is warmed up now, the others on their first use
+    qos = QosController(camera=LOCATION, deadline_ms=0)
+    missing = sorted(
+        {
+            level["model"]
+            for level in qos.levels
+            if not os.path.isfile(os.path.join("models", level["model"]))
+        }
+    )
+    if missing:
+        logger.warning(
+            f"Skipping QoS levels without weights in models/: {', '.join(missing)}"
+        )
+        qos.levels = [level for level in qos.levels if level["model"] not in missing]
+    if not qos.levels:
+        logger.error("No model weights in models/")
+        return
+    models, warmed_up = {}, set()
+
+    def load_level(level):
+        name, imgsz = level["model"], level["imgsz"]
+        if name not in models:
+            models[name] = YOLO(os.path.join("models", name))
+        if (name, imgsz) not in warmed_up:
+            logger.info(f"Warming up {name} at imgsz={imgsz}")
+            warmup_model(
+                models[name],
+                imgsz=imgsz,
+                batch=MODEL_BATCH,
+                device=MODEL_DEVICE,
+                track=True,
+            )
+            warmed_up.add((name, imgsz))
+        return models[name]
+
+    model = load_level(qos.level)
 
     # Start video stream
-    stream = CamGear(source=SOURCES[LOCATION]).start()
+    capture_trigger_interval = 5
+    if INGEST_BACKEND == "ffmpeg":
+        stream = FFmpegSource(
+            INGEST_SOURCE,
+            width=INGEST_WIDTH,
+            decode_threads=INGEST_DECODE_THREADS,
+            full_res_interval=capture_trigger_interval if INGEST_FULL_RES else None,
+            # Local files are paced like a live camera
+            realtime=os.path.isfile(INGEST_SOURCE),
+            loop=INGEST_LOOP and os.path.isfile(INGEST_SOURCE),
+        ).start()
+        # Detection pixels -> source pixels (zones, stored boxes, heatmap)
+        scale = stream.scale
+    else:
+        stream = CamGear(source=INGEST_SOURCE).start()
+        scale = 1.0
     delay = int(1000 / stream.framerate)
+    qos.deadline_ms = QOS_DEADLINES_MS.get(LOCATION, 1000 / stream.framerate)
 
-    # Enable livestreaming
-    stream_params = {
-        "-input_framerate": int(stream.framerate),
-        "-livestream": True,
-        "-window_size": 2,
-        "-extra_window_size": 2,
-    }
-    # describe a suitable manifest-file location/name
-    output_folder = f"output/{get_timestamp_for_filename()}"
+    # Enable livestreaming; the encoder starts on the first frame
+    output_folder = f"output/{LOCATION}/{get_timestamp_for_filename()}"
     os.makedirs(output_folder, exist_ok=True)
-    streamer = StreamGear(
-        output=f"{output_folder}/dash_out.mpd",
-        format="dash",
-        logging=True,
-        **stream_params,
+    session_pruner = SessionPruner(
+        "output",
+        LOCATION,
+        protect=output_folder,
+        keep=DASH_KEEP_SESSIONS,
+        max_bytes=DASH_MAX_MB * 1024 * 1024,
+        interval=DASH_PRUNE_INTERVAL,
+    ).start()
+    streamer = DashOutput(
+        output_folder,
+        framerate=stream.framerate,
+        preset=DASH_PRESET,
+        ladder=DASH_LADDER,
+        segment_seconds=DASH_SEGMENT_SECONDS,
+        window_size=DASH_WINDOW_SIZE,
     )
 
-    # YOLO + Supervision setup
-    model = YOLO(os.path.join("models", "yolo11l.pt"))
+    # Lag of every stage from frame capture, stored every FRESHNESS_INTERVAL
+    freshness = FreshnessTracer(
+        LOCATION, interval=float(os.getenv("FRESHNESS_INTERVAL", "60"))
+    )
+
+    # Supervision setup
     tracker = sv.ByteTrack()
-    smoother = sv.DetectionsSmoother()
+    smoother = sv.DetectionsSmoother(length=5)
     box_annotator = sv.BoxAnnotator()
     label_annotator = sv.LabelAnnotator()
-    trace_annotator = sv.TraceAnnotator()
+    trace_annotator = sv.TraceAnnotator(trace_length=TRACE_LENGTH)
+    best_shots = BestShotSelector(
+        tracker_prefix=f"{PROGRAM_START_EPOCH_MS}_",
+        object_prefix=f"{MINIO_BUCKET}/{LOCATION}/packs/",
+        max_tracks=MAX_TRACKS,
+        on_uploaded=lambda captured: freshness.observe_many("snapshot", captured),
+    )
+    trajectories = TrajectoryRecorder(
+        LOCATION, tracker_prefix=f"{PROGRAM_START_EPOCH_MS}_", max_tracks=MAX_TRACKS
+    )
+    alert_engine = AlertEngine(LOCATION)
+    # Per-area occupancy of analysed frames, streamed to the API
+    occupancy_feed = OccupancyPublisher(LOCATION)
+    zone_overlay = ZoneOverlay(color=(255, 255, 255), thickness=2)
 
     # Define polygon zone
-    area_ids, area_names, polygon_zones, polygon_annotators = refresh_areas(
-        LOCATION, get_area_names_based_on_location(LOCATION)
+    area_ids, area_names, polygon_zones, polygons = refresh_areas(
+        LOCATION, get_area_names_based_on_location(LOCATION), scale
     )
-    if area_ids is None and polygon_zones is None and polygon_annotators is None:
+    if area_ids is None and polygon_zones is None and polygons is None:
         logger.error("Error retrieving areas. Exiting...")
         return
 
@@ -126,123 +259,180 @@ def main():
 
     # Capture trigger setup
     last_capture_trigger_time = time.time()
-    capture_trigger_interval = 5
     capture_trigger_flag = False
-    while True:
+    frame_index = 0
+    detections = sv.Detections.empty()
+    heatmap = None
+    load_window_start, load_frames, load_detections = time.time(), 0, 0
+    while stop_event is None or not stop_event.is_set():
         frame = stream.read()
         if frame is None:
             break
+        frame_start = time.perf_counter()
+        # CamGear does not time frames; its reads are stamped on arrival
+        captured_at = getattr(stream, "captured_at", None) or time.time()
+        freshness.observe("read", captured_at)
+        if heatmap is None:
+            heatmap = OccupancyHeatmap(
+                LOCATION, (int(frame.shape[0] * scale), int(frame.shape[1] * scale))
+            )
 
-        # Inference
-        result = model.track(
-            source=frame,
-            conf=0.45,
-            classes=[0],
-            persist=True,
-            tracker="bytetrack.yaml",
-            device=0,
-            verbose=False,
-        )[0]
-        detections = sv.Detections.from_ultralytics(result)
-        detections = tracker.update_with_detections(detections)
-        detections = smoother.update_with_detections(detections)
+        # Inference (skipped frames reuse the previous detections)
+        analyse = qos.should_analyse(frame_index)
+        if analyse:
+            result = model.track(
+                source=frame,
+                conf=0.45,
+                classes=[0],
+                persist=True,
+                tracker="bytetrack.yaml",
+                imgsz=qos.level["imgsz"],
+                device=MODEL_DEVICE,
+                verbose=False,
+            )[0]
+            detections = sv.Detections.from_ultralytics(result)
+            detections = tracker.update_with_detections(detections)
+            detections = smoother.update_with_detections(detections)
+            if getattr(stream, "full_res_interval", None):
+                # Crops come from the occasional full-resolution frame; every
+                # analysed frame keeps its tracks alive in between
+                best_shots.touch(detections.tracker_id)
+                full_frame = stream.read_full()
+                if full_frame is not None:
+                    best_shots.update(
+                        full_frame,
+                        detections,
+                        scale=scale,
+                        captured_at=stream.full_captured_at,
+                    )
+            else:
+                best_shots.update(frame, detections, captured_at=captured_at)
+            heatmap_cells = heatmap.cells(detections, scale=scale)
+            heatmap.update(heatmap_cells)
+            freshness.observe("detect", captured_at)
 
         current_time = time.time()
+        best_shots.flush(now=current_time)
+        trajectories.flush(now=current_time)
+        heatmap.maybe_flush(now=current_time)
+        freshness.maybe_publish(now=current_time)
         # Capture trigger
         if current_time - last_capture_trigger_time >= capture_trigger_interval:
             capture_trigger_flag = True
-            logger.info(
-                f"Triggered event at {capture_trigger_interval} second interval"
+            logger.debug(
+                "Triggered event at {} second interval", capture_trigger_interval
             )
             last_capture_trigger_time = current_time
         # Refresh areas trigger
         if current_time - last_refresh_areas_time >= refresh_areas_interval:
-            area_ids, area_names, polygon_zones, polygon_annotators = refresh_areas(
-                LOCATION, get_area_names_based_on_location(LOCATION)
+            area_ids, area_names, polygon_zones, polygons = refresh_areas(
+                LOCATION, get_area_names_based_on_location(LOCATION), scale
+            )
+            if area_ids is not None:
+                alert_engine.retain(area_ids)
+            logger.debug(
+                "Refreshing areas at {} second interval", refresh_areas_interval
             )
-            logger.info(f"Refreshing areas at {refresh_areas_interval} second interval")
             last_refresh_areas_time = current_time
 
+        # One column batch per capture tick, shared by every area's count;
+        # its records carry the frame's capture time and one trace ID
+        people_batch = None
+        trace_id = freshness.new_trace() if capture_trigger_flag and analyse else None
+        if capture_trigger_flag and analyse and len(detections):
+            st_ = time.time()
+            # The track's best shot is packed by `best_shots`; records
+            # inserted before its pack is written are updated afterwards
+            people_batch = PeopleBatch.from_detections(
+                detections,
+                location=LOCATION,
+                tracker_prefix=f"{PROGRAM_START_EPOCH_MS}_",
+                scale=scale,
+                snapshot_ref=best_shots.snapshot_ref,
+            )
+            # Insert people to MongoDB
+            if (
+                people_batch.insert(captured_at=captured_at, trace_id=trace_id)
+                == SynapsisResponse.SERVER_ERROR
+            ):
+                logger.error("Error inserting people to database")
+                return
+            freshness.observe("people", captured_at)
+            logger.debug(
+                "Set people time: {:.4f} seconds (trace {})",
+                time.time() - st_,
+                trace_id,
+            )
+
         annotated_image = frame.copy()
-        for area_id, area_name, polygon_zone, polygon_annotator in zip(
-            area_ids, area_names, polygon_zones, polygon_annotators
+        # Zone outlines are re-rasterised only when the areas change
+        zone_overlay.set_zones(frame.shape, polygons)
+        zone_labels = []
+        area_masks = {}
+        occupancy = []
+        for area_id, area_name, polygon_zone in zip(
+            area_ids, area_names, polygon_zones
         ):
             polygon_trigger = polygon_zone.trigger(detections)
-            detections_inside = detections[polygon_trigger]
-            detections_inside_count = len(detections_inside)
-            detections_outside = detections[~polygon_trigger]
-            detections_outside_count = len(detections_outside)
+            area_masks[area_id] = polygon_trigger
+            detections_inside_count = int(polygon_trigger.sum())
+            detections_outside_count = len(detections) - detections_inside_count
+
+            if analyse:
+                occupancy.append((area_id, area_name, detections_inside_count))
+                heatmap.update(heatmap_cells, area_id=area_id, mask=polygon_trigger)
+                alert_engine.update(
+                    area_id,
+                    area_name,
+                    (
+                        detections.tracker_id[polygon_trigger].tolist()
+                        if detections.tracker_id is not None
+                        else []
+                    ),
+                    now=current_time,
+                )
 
-            annotated_image = polygon_annotator.annotate(
-                scene=annotated_image, label=f"{area_name}: {detections_inside_count}"
-            )
+            zone_labels.append(f"{area_name}: {detections_inside_count}")
 
             # trigger event for capture people inside polygon zone
-            if capture_trigger_flag:
-                st_ = time.time()
-
-                people_list = []
-                for (
-                    xyxy,
-                    mask,
-                    confidence,
-                    class_id,
-                    tracker_id,
-                    data,
-                ) in detections:
-                    x1, y1, x2, y2 = map(int, xyxy)
-
-                    # Upload snapshot to MinIO
-                    presigned_url = upload_ndarray_to_minio(
-                        object_name=f"{MINIO_BUCKET}/{LOCATION}/{area_name}/{uuid.uuid4()}.jpg",
-                        ndarray_image=cv2.cvtColor(
-                            sv.crop_image(image=frame, xyxy=[x1, y1, x2, y2]),
-                            cv2.COLOR_BGR2RGB,
-                        ),
-                    )
-
-                    people_list.append(
-                        {
-                            "conf": float(confidence),
-                            "bbox": [x1, y1, x2, y2],
-                            "tracker_id": f"{PROGRAM_START_EPOCH_MS}_{tracker_id}",
-                            "snapshot": presigned_url,
-                        }
-                    )
-
-                if people_list == []:
+            if capture_trigger_flag and analyse:
+                if people_batch is None:
                     logger.warning(
                         f"No people detected inside polygon zone of {area_name}"
                     )
                     continue
-                # Insert people to MongoDB
-                inserted_ids = set_people_many(people_list)
-                if inserted_ids == SynapsisResponse.SERVER_ERROR:
-                    logger.error("Error inserting people to database")
-                    return
-                inserted_ids = np.array(inserted_ids).astype(str)
-
-                set_counts(
+                st_ = time.time()
+                in_ids, out_ids, in_tracker_ids, out_tracker_ids = people_batch.split(
+                    polygon_trigger
+                )
+                resp = set_counts(
+                    location=LOCATION,
                     area_id=area_id,
                     in_num=detections_inside_count,
                     out_num=detections_outside_count,
-                    in_people_id=inserted_ids[polygon_trigger].tolist(),
-                    out_people_id=inserted_ids[~polygon_trigger].tolist(),
-                    in_people_tracker_id=[
-                        f"{PROGRAM_START_EPOCH_MS}_{tracker_id}"
-                        for tracker_id in detections_inside.tracker_id
-                    ],
-                    out_people_tracker_id=[
-                        f"{PROGRAM_START_EPOCH_MS}_{tracker_id}"
-                        for tracker_id in detections_outside.tracker_id
-                    ],
+                    in_people_id=in_ids,
+                    out_people_id=out_ids,
+                    in_people_tracker_id=in_tracker_ids,
+                    out_people_tracker_id=out_tracker_ids,
+                    captured_at=captured_at,
+                    trace_id=trace_id,
                 )
+                if resp == SynapsisResponse.SERVER_ERROR:
+                    logger.error(f"Error setting counts of {area_name}")
+                    freshness.fail("counts")
+                else:
+                    freshness.observe("counts", captured_at)
+
+                logger.debug("Set counts time: {:.4f} seconds", time.time() - st_)
+
+        if analyse:
+            capture_trigger_flag = False
+            trajectories.update(detections, current_time, scale, area_masks)
+            occupancy_feed.publish(
+                captured_at, occupancy, len(detections), now=current_time
+            )
 
-                en = time.time()
-                logger.debug(f"Set people and counts time: {en - st_} seconds")
-
-        capture_trigger_flag = False
-
+        annotated_image = zone_overlay.render(annotated_image, zone_labels)
         labels = [f"#{tracker_id}" for tracker_id in detections.tracker_id]
         annotated_image = trace_annotator.annotate(annotated_image, detections)
         annotated_image = box_annotator.annotate(
@@ -252,25 +442,51 @@ def main():
             scene=annotated_image, detections=detections, labels=labels
         )
 
+        # Adapt analysis FPS / imgsz / model variant to the latency budget
+        if qos.observe(time.perf_counter() - frame_start, analysed=analyse):
+            model = load_level(qos.level)
+        frame_index += 1
+
+        # Measured load, used by workers to balance cameras
+        load_frames += 1
+        load_detections += len(detections)
+        if load is not None and current_time - load_window_start >= 1:
+            load[0] = load_frames / (current_time - load_window_start)
+            load[1] = load_detections / load_frames
+            load_window_start, load_frames, load_detections = current_time, 0, 0
+
         # Only show window if not running inside Docker
-        if not os.path.exists("/.dockerenv"):
+        if display:
             cv2.imshow("view", annotated_image)
             if cv2.waitKey(delay) & 0xFF == ord("q"):
                 break
         else:
             # send frame to streamer
-            streamer.stream(annotated_image)
+            streamer.write(annotated_image)
             cv2.waitKey(delay)
 
     cv2.destroyAllWindows()
     stream.stop()
     streamer.close()
+    best_shots.close()
+    trajectories.close()
+    occupancy_feed.close()
+    freshness.publish()
+    if heatmap is not None:
+        heatmap.flush()
+    session_pruner.stop()
+    memory_monitor.stop()
+    logger.info(f"Memory at exit: {memory_monitor.report()}")
 
 
 def test_get_area_based_on_location():
     print(get_area_names_based_on_location("kepatihan"))
 
 
+def main():
+    run_camera("kepatihan")  # You can change this
+
+
 if __name__ == "__main__":
     main()
     # test_get_area_based_on_location()
@@ -0,0 +1,297 @@
+# Built-in imports
+import os
+import json
+import time
+import threading
+import subprocess
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+
+
+def probe_stream(source):
+    """Read width, height and frame rate of the first video stream with ffprobe."""
+    output = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height,avg_frame_rate,r_frame_rate",
+            "-of",
+            "json",
+            source,
+        ],
+        check=True,
+        capture_output=True,
+        timeout=30,
+    ).stdout
+    stream = json.loads(output)["streams"][0]
+    num, den = (stream.get("avg_frame_rate") or stream["r_frame_rate"]).split("/")
+    if int(num) == 0 or int(den) == 0:
+        num, den = stream["r_frame_rate"].split("/")
+    return int(stream["width"]), int(stream["height"]), int(num) / int(den)
+
+
+class _FrameRing:
+    """Preallocated frame slots filled by one producer and read by one consumer.
+
+    The producer never writes into the newest slot nor the slot the consumer
+    holds, so a frame returned by `latest()` stays valid until the next call;
+    that takes at least three slots.
+    Without `drop`, the producer waits until the newest frame has been taken.
+    `stamps` holds the wall-clock time each slot's frame arrived.
+    """
+
+    def __init__(self, shape, slots=3, drop=True):
+        self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(slots)]
+        self.stamps = [0.0] * slots
+        self.drop = drop
+        self.newest = -1
+        self.held = -1
+        self.sequence = 0
+        self.taken = 0
+        self.cond = threading.Condition()
+
+    def free_slot(self):
+        """A slot to write the next frame into, or None if every slot is in use."""
+        with self.cond:
+            while not self.drop and self.taken < self.sequence:
+                self.cond.wait()
+            for i in range(len(self.buffers)):
+                if i != self.newest and i != self.held:
+                    return i
+
+    def publish(self, slot):
+        with self.cond:
+            self.stamps[slot] = time.time()
+            self.newest = slot
+            self.sequence += 1
+            self.cond.notify_all()
+
+    def latest(self, after_sequence, timeout, alive):
+        with self.cond:
+            while self.sequence <= after_sequence and alive():
+                self.cond.wait(timeout)
+            if self.sequence <= after_sequence:
+                return None, after_sequence
+            self.held = self.newest
+            self.taken = self.sequence
+            self.cond.notify_all()
+            return self.buffers[self.held], self.sequence
+
+
+def _read_exact(pipe, view):
+    """Fill `view` from `pipe`; False on EOF."""
+    filled = 0
+    while filled < len(view):
+        n = pipe.readinto(view[filled:])
+        if not n:
+            return False
+        filled += n
+    return True
+
+
+class FFmpegSource:
+    """Decode a stream with a managed ffmpeg process at detection resolution.
+
+    ffmpeg decodes, scales and converts to BGR in one pass and writes raw frames
+    into preallocated buffers, so Python never touches full-resolution pixels it
+    does not need. Optionally a second ffmpeg output delivers a full-resolution
+    frame every `full_res_interval` seconds for snapshots.
+
+    The interface follows CamGear: `start()`, `read()`, `stop()` and `framerate`.
+    A frame returned by `read()` is only valid until the next `read()`;
+    `captured_at` (and `full_captured_at`) is the time it left the decoder.
+
+    Args:
+        source (str): URL or file path.
+        width (int, optional): Output width; None keeps the source width.
+        height (int, optional): Output height; None keeps the aspect ratio.
+        decode_threads (int, optional): ffmpeg decoder threads. Defaults to 2.
+        full_res_interval (float, optional): Seconds between full-resolution
+            frames; None disables the second output. Defaults to None.
+        realtime (bool, optional): Read file sources at their native rate. Defaults to False.
+        loop (bool, optional): Replay file sources endlessly, e.g. for soak tests.
+            Defaults to False.
+        drop_frames (bool, optional): Keep only the newest frame when the consumer
+            falls behind, as live sources need; False delivers every frame.
+            Defaults to True.
+    """
+
+    def __init__(
+        self,
+        source,
+        width=None,
+        height=None,
+        decode_threads=2,
+        full_res_interval=None,
+        realtime=False,
+        drop_frames=True,
+        loop=False,
+    ):
+        self.source = source
+        self.source_width, self.source_height, self.framerate = probe_stream(source)
+        self.width = width or self.source_width
+        self.height = height or int(
+            round(self.source_height * self.width / self.source_width / 2) * 2
+        )
+        self.decode_threads = decode_threads
+        self.full_res_interval = full_res_interval
+        self.realtime = realtime
+        self.loop = loop
+
+        self.ring = _FrameRing((self.height, self.width, 3), drop=drop_frames)
+        self.full_ring = (
+            _FrameRing((self.source_height, self.source_width, 3))
+            if full_res_interval
+            else None
+        )
+        self.process = None
+        self.threads = []
+        self.pump_failed = False
+        self.sequence = 0
+        self.full_sequence = 0
+        self.frames_read = 0
+        self.captured_at = None
+        self.full_captured_at = None
+
+    @property
+    def scale(self):
+        """Factor from output pixel coordinates to source pixel coordinates."""
+        return self.source_width / self.width
+
+    def _command(self, full_fd):
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if self.realtime:
+            command += ["-re"]
+        if self.loop:
+            command += ["-stream_loop", "-1"]
+        command += ["-threads", str(self.decode_threads), "-i", self.source]
+        scale = f"scale={self.width}:{self.height}:flags=bilinear"
+        if full_fd is None:
+            command += ["-an", "-vf", scale]
+            command += ["-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+        else:
+            command += [
+                "-an",
+                "-filter_complex",
+                f"[0:v]split=2[d][f];[d]{scale}[do];"
+                f"[f]fps=1/{self.full_res_interval}[fo]",
+                "-map",
+                "[do]",
+                "-pix_fmt",
+                "bgr24",
+                "-f",
+                "rawvideo",
+                "pipe:1",
+                "-map",
+                "[fo]",
+                "-pix_fmt",
+                "bgr24",
+                "-f",
+                "rawvideo",
+                f"pipe:{full_fd}",
+            ]
+        return command
+
+    def start(self):
+        full_read, full_write = os.pipe() if self.full_ring else (None, None)
+        self.process = subprocess.Popen(
+            self._command(full_write),
+            stdout=subprocess.PIPE,
+            pass_fds=(full_write,) if full_write is not None else (),
+            bufsize=0,
+        )
+        self.threads = [
+            threading.Thread(
+                target=self._pump,
+                args=(self.process.stdout, self.ring),
+                daemon=True,
+            )
+        ]
+        if full_write is not None:
+            os.close(full_write)
+            self.threads.append(
+                threading.Thread(
+                    target=self._pump,
+                    args=(os.fdopen(full_read, "rb", buffering=0), self.full_ring),
+                    daemon=True,
+                )
+            )
+        for thread in self.threads:
+            thread.start()
+        logger.info(
+            f"ffmpeg ingest: {self.source_width}x{self.source_height} -> "
+            f"{self.width}x{self.height} @ {self.framerate:.1f} fps, "
+            f"{self.decode_threads} decode threads"
+        )
+        return self
+
+    def _pump(self, pipe, ring):
+        discard = None
+        try:
+            while True:
+                slot = ring.free_slot()
+                if slot is None:
+                    # Keep draining the pipe so ffmpeg never blocks on it
+                    if discard is None:
+                        discard = np.empty_like(ring.buffers[0])
+                    if not _read_exact(pipe, memoryview(discard).cast("B")):
+                        break
+                    continue
+                if not _read_exact(pipe, memoryview(ring.buffers[slot]).cast("B")):
+                    break
+                ring.publish(slot)
+        except Exception as e:
+            # ffmpeg would block on this pipe and stall the other output too
+            logger.error(f"ffmpeg ingest pump stopped: {str(e)}")
+            self.pump_failed = True
+        finally:
+            for r in (self.ring, ring):
+                with r.cond:
+                    r.cond.notify_all()
+
+    def _alive(self):
+        # The pump outlives ffmpeg until the pipe is drained
+        return (
+            bool(self.threads) and self.threads[0].is_alive() and not self.pump_failed
+        )
+
+    def read(self, timeout=10.0):
+        """Newest detection-resolution frame not returned yet, or None at the end."""
+        frame, self.sequence = self.ring.latest(self.sequence, timeout, self._alive)
+        if frame is not None:
+            self.frames_read += 1
+            self.captured_at = self.ring.stamps[self.ring.held]
+        return frame
+
+    def read_full(self):
+        """Newest full-resolution frame not returned yet, or None."""
+        if self.full_ring is None:
+            return None
+        frame, self.full_sequence = self.full_ring.latest(
+            self.full_sequence, 0, lambda: False
+        )
+        if frame is not None:
+            self.full_captured_at = self.full_ring.stamps[self.full_ring.held]
+        return frame
+
+    def stop(self):
+        with self.ring.cond:
+            # Release a pump waiting for the consumer
+            self.ring.drop = True
+            self.ring.cond.notify_all()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        for thread in self.threads:
+            thread.join(timeout=1)
@@ -0,0 +1,154 @@
+# Built-in imports
+import os
+import time
+import signal
+import resource
+import threading
+import tracemalloc
+from collections import deque
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+
+
+def rss_bytes(pid=None):
+    """Resident set size of a process (this one by default), in bytes."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # No procfs (macOS): peak RSS of this process, in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def growth_per_hour(samples):
+    """Least-squares slope of (time, bytes) samples, in bytes per hour."""
+    if len(samples) < 3:
+        return 0.0
+    times, values = np.asarray(samples, dtype=np.float64).T
+    if times[-1] - times[0] <= 0:
+        return 0.0
+    return float(np.polyfit(times - times[0], values, 1)[0] * 3600)
+
+
+class MemoryMonitor:
+    """Sample RSS in the background and warn when it keeps growing.
+
+    Every `interval` seconds RSS is sampled; the slope over the last `window`
+    samples is fitted, and a warning is logged when it exceeds
+    `max_growth_mb_per_hour` once the window spans at least `min_span` seconds.
+    The warning repeats at most every `warn_interval` seconds. `snapshot()`
+    compares tracemalloc snapshots; sending SIGUSR1 takes one.
+
+    Args:
+        interval (float, optional): Seconds between RSS samples. Defaults to 30.
+        window (int, optional): Samples in the trend fit. Defaults to 120.
+        min_span (float, optional): Seconds of samples before trends are judged. Defaults to 1800.
+        max_growth_mb_per_hour (float, optional): Growth that triggers a warning. Defaults to 20.
+        warn_interval (float, optional): Seconds between two warnings. Defaults to 600.
+        tracemalloc_frames (int, optional): Start tracing right away with this
+            traceback depth; 0 starts it on the first snapshot. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        interval=30.0,
+        window=120,
+        min_span=1800.0,
+        max_growth_mb_per_hour=20.0,
+        warn_interval=600.0,
+        tracemalloc_frames=0,
+    ):
+        self.interval = interval
+        self.min_span = min_span
+        self.max_growth = max_growth_mb_per_hour * 1024 * 1024
+        self.warn_interval = warn_interval
+        self.warned_at = 0.0
+        self.samples = deque(maxlen=window)
+        self.started_at = time.time()
+        self.start_rss = rss_bytes()
+        self.previous_snapshot = None
+        self.snapshot_requested = threading.Event()
+        self._stop = threading.Event()
+        if tracemalloc_frames:
+            tracemalloc.start(tracemalloc_frames)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda *_: self.snapshot_requested.set())
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while True:
+            self.sample()
+            requested = self.snapshot_requested.wait(self.interval)
+            if self._stop.is_set():
+                break
+            if requested:
+                self.snapshot_requested.clear()
+                self.snapshot()
+
+    def sample(self, now=None):
+        now = time.time() if now is None else now
+        self.samples.append((now, rss_bytes()))
+        growth = self.growth_per_hour()
+        if (
+            now - self.samples[0][0] >= self.min_span
+            and growth > self.max_growth
+            and now - self.warned_at >= self.warn_interval
+        ):
+            self.warned_at = now
+            logger.warning(
+                f"RSS growing {growth / 2**20:.1f} MB/h over the last "
+                f"{(now - self.samples[0][0]) / 60:.0f} min "
+                f"(now {self.samples[-1][1] / 2**20:.0f} MB); send SIGUSR1 "
+                f"to pid {os.getpid()} for a tracemalloc diff"
+            )
+
+    def growth_per_hour(self):
+        return growth_per_hour(self.samples)
+
+    def snapshot(self, limit=15):
+        """Log the top allocation sites, and their change since the last snapshot.
+
+        Tracing starts on the first call, so the first diff is only meaningful
+        from the second snapshot on.
+
+        Returns:
+            list of str: The logged statistics.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+            logger.info("tracemalloc started; take another snapshot for a diff")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        if self.previous_snapshot is None:
+            stats = snapshot.statistics("lineno")[:limit]
+        else:
+            stats = snapshot.compare_to(self.previous_snapshot, "lineno")[:limit]
+        self.previous_snapshot = snapshot
+        lines = [str(stat) for stat in stats]
+        traced, peak = tracemalloc.get_traced_memory()
+        logger.info(
+            f"tracemalloc: {traced / 2**20:.1f} MB traced (peak {peak / 2**20:.1f} MB)\n"
+            + "\n".join(lines)
+        )
+        return lines
+
+    def report(self):
+        return {
+            "rss_mb": round(rss_bytes() / 2**20, 1),
+            "start_rss_mb": round(self.start_rss / 2**20, 1),
+            "growth_mb_per_hour": round(self.growth_per_hour() / 2**20, 2),
+            "uptime_seconds": round(time.time() - self.started_at),
+        }
+
+    def stop(self):
+        self._stop.set()
+        self.snapshot_requested.set()
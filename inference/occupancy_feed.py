@@ -0,0 +1,133 @@
+# Built-in imports
+import os
+import json
+import time
+import socket
+import threading
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+
+OCCUPANCY_FEED_DIR = os.getenv("OCCUPANCY_FEED_DIR", "/tmp/synapsis/occupancy")
+
+
+class OccupancyPublisher:
+    """Publish the per-area occupancy of analysed frames to local subscribers.
+
+    The camera listens on a Unix seqpacket socket, `<feed_dir>/<location>.sock`,
+    that every API worker connects to. Each publish is one JSON message to each
+    subscriber, sent without blocking: a subscriber whose buffer is full misses
+    that message instead of holding up the frame loop, and one that has gone
+    away is dropped. Nothing is stored; Mongo keeps the capture-tick counts.
+
+    Args:
+        location (str): Camera/location name.
+        feed_dir (str, optional): Socket directory; empty disables the feed.
+            Defaults to OCCUPANCY_FEED_DIR.
+        max_rate (float, optional): Messages per second at most. Defaults to
+            OCCUPANCY_FEED_RATE (10).
+    """
+
+    def __init__(self, location, feed_dir=None, max_rate=None):
+        self.location = location
+        self.feed_dir = OCCUPANCY_FEED_DIR if feed_dir is None else feed_dir
+        max_rate = (
+            float(os.getenv("OCCUPANCY_FEED_RATE", "10"))
+            if max_rate is None
+            else max_rate
+        )
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.published_at = 0.0
+        self.subscribers = []
+        self.published = 0
+        self.dropped = 0
+        self.server = None
+        self._lock = threading.Lock()
+        if self.feed_dir:
+            self._listen()
+
+    def _listen(self):
+        self.path = os.path.join(self.feed_dir, f"{self.location}.sock")
+        try:
+            os.makedirs(self.feed_dir, exist_ok=True)
+            if os.path.exists(self.path):
+                # Left behind by a previous run of this camera
+                os.remove(self.path)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            server.bind(self.path)
+            server.listen(16)
+            # Wakes the accept loop up so `close` does not wait on it
+            server.settimeout(1.0)
+        except OSError as e:
+            logger.error(f"Occupancy feed of {self.location} disabled: {str(e)}")
+            return
+        self.server = server
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        logger.info(f"Occupancy feed of {self.location} at {self.path}")
+
+    def _accept_loop(self):
+        while self.server is not None:
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.setblocking(False)
+            with self._lock:
+                self.subscribers.append(conn)
+            logger.debug(
+                "Occupancy subscriber joined {} ({} connected)",
+                self.location,
+                len(self.subscribers),
+            )
+
+    def publish(self, captured_at, areas, total, now=None):
+        """Send the occupancy of a frame, at most `max_rate` times a second.
+
+        Args:
+            captured_at (float): Capture time (epoch seconds) of the frame.
+            areas (list of tuple): (area_id, area_name, people inside) per area.
+            total (int): People detected in the frame.
+            now (float, optional): Current time. Defaults to now.
+        """
+        now = time.time() if now is None else now
+        if not self.subscribers or now - self.published_at < self.interval:
+            return
+        self.published_at = now
+        message = json.dumps(
+            {
+                "location": self.location,
+                "captured_at": captured_at,
+                "total": total,
+                "areas": [
+                    {"area_id": a, "area_name": n, "occupancy": k} for a, n, k in areas
+                ],
+            }
+        ).encode()
+        with self._lock:
+            for conn in list(self.subscribers):
+                try:
+                    conn.send(message)
+                except BlockingIOError:
+                    self.dropped += 1
+                except OSError:
+                    self.subscribers.remove(conn)
+                    conn.close()
+        self.published += 1
+
+    def close(self):
+        server, self.server = self.server, None
+        if server is None:
+            return
+        server.close()
+        with self._lock:
+            for conn in self.subscribers:
+                conn.close()
+            self.subscribers = []
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
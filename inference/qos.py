@@ -0,0 +1,130 @@
+# Built-in imports
+from collections import deque
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+
+
+# Ordered from most to least expensive. `stride` means "analyse every n-th frame".
+DEFAULT_QOS_LEVELS = [
+    {"model": "yolo11l.pt", "imgsz": 640, "stride": 1},
+    {"model": "yolo11l.pt", "imgsz": 640, "stride": 2},
+    {"model": "yolo11l.pt", "imgsz": 480, "stride": 2},
+    {"model": "yolo11m.pt", "imgsz": 480, "stride": 2},
+    {"model": "yolo11s.pt", "imgsz": 416, "stride": 3},
+    {"model": "yolo11n.pt", "imgsz": 320, "stride": 3},
+]
+
+
+class QosController:
+    """Step the analysis quality up or down to keep a camera within its deadline.
+
+    Every `window` analysed frames the p95 of their latency is compared with the
+    budget of an analysed frame, `stride` frame deadlines: at stride 2 a frame
+    is analysed every other frame, so it may take twice as long. The level steps down (cheaper) after `down_windows`
+    consecutive windows over the deadline, and steps back up after `up_windows`
+    consecutive windows under `headroom * deadline`. The gap between the two
+    thresholds and the asymmetric window counts provide the hysteresis.
+
+    Args:
+        camera (str): Camera/location name, used in log messages.
+        deadline_ms (float): Per-frame latency budget in milliseconds, at stride 1.
+        levels (list of dict, optional): Quality ladder, most expensive first.
+            Defaults to DEFAULT_QOS_LEVELS.
+        window (int, optional): Analysed frames per evaluation window. Defaults to 30.
+        headroom (float, optional): Fraction of the deadline under which a step
+            up is considered. Defaults to 0.6.
+        down_windows (int, optional): Over-budget windows before stepping down. Defaults to 1.
+        up_windows (int, optional): Under-budget windows before stepping up. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        camera,
+        deadline_ms,
+        levels=None,
+        window=30,
+        headroom=0.6,
+        down_windows=1,
+        up_windows=5,
+    ):
+        self.camera = camera
+        self.deadline_ms = deadline_ms
+        self.levels = levels or DEFAULT_QOS_LEVELS
+        self.window = window
+        self.headroom = headroom
+        self.down_windows = down_windows
+        self.up_windows = up_windows
+
+        self.index = 0
+        self.latencies = deque(maxlen=window)
+        self.over_streak = 0
+        self.under_streak = 0
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def should_analyse(self, frame_index):
+        """Whether the detector should run on this frame at the current level."""
+        return frame_index % self.level["stride"] == 0
+
+    @property
+    def budget_ms(self):
+        """Latency budget of an analysed frame at the current level."""
+        return self.deadline_ms * self.level["stride"]
+
+    def observe(self, latency_s, analysed=True):
+        """Record one frame's processing latency.
+
+        Args:
+            latency_s (float): Processing time of the frame in seconds.
+            analysed (bool, optional): Whether the detector ran on the frame;
+                skipped frames are not counted. Defaults to True.
+        Returns:
+            bool: True if the level changed on this observation.
+        """
+        if not analysed:
+            return False
+        self.latencies.append(latency_s * 1000.0)
+        if len(self.latencies) < self.window:
+            return False
+
+        p95 = float(np.percentile(self.latencies, 95))
+        self.latencies.clear()
+
+        if p95 > self.budget_ms:
+            self.over_streak += 1
+            self.under_streak = 0
+        elif p95 < self.headroom * self.budget_ms:
+            self.under_streak += 1
+            self.over_streak = 0
+        else:
+            self.over_streak = 0
+            self.under_streak = 0
+
+        if self.over_streak >= self.down_windows and self.index < len(self.levels) - 1:
+            return self._step(+1, p95, "over budget")
+        if self.under_streak >= self.up_windows and self.index > 0:
+            return self._step(-1, p95, "headroom available")
+
+        logger.debug(
+            f"QoS [{self.camera}] hold level {self.index} {self.level}: "
+            f"p95={p95:.1f} ms, budget={self.budget_ms:.1f} ms"
+        )
+        return False
+
+    def _step(self, direction, p95, reason):
+        previous, budget_ms = self.level, self.budget_ms
+        self.index += direction
+        self.over_streak = 0
+        self.under_streak = 0
+        logger.info(
+            f"QoS [{self.camera}] step {'down' if direction > 0 else 'up'} ({reason}): "
+            f"p95={p95:.1f} ms, budget={budget_ms:.1f} ms, "
+            f"{previous} -> {self.level}"
+        )
+        return True
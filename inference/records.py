@@ -0,0 +1,100 @@
+# Built-in imports
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from synapsis_common.utility import SynapsisResponse, set_people_columns
+
+
+class PeopleBatch:
+    """Column-oriented people records of one capture.
+
+    Boxes are converted and tracker IDs formatted once for the whole batch with
+    array operations; per-area subsets are boolean-mask selections of the same
+    columns, so nothing is rebuilt per person or per area.
+
+    Args:
+        location (str): Camera/location of the capture.
+        conf (np.ndarray): float32 confidences, shape (n,).
+        bbox (np.ndarray): int32 boxes in source pixels, shape (n, 4).
+        tracker_id (np.ndarray): Stored tracker IDs ('<run epoch>_<id>'), shape (n,).
+        snapshot (list): Snapshot reference (or None) per person.
+    """
+
+    __slots__ = ("location", "conf", "bbox", "tracker_id", "snapshot", "ids")
+
+    def __init__(self, location, conf, bbox, tracker_id, snapshot):
+        self.location = location
+        self.conf = conf
+        self.bbox = bbox
+        self.tracker_id = tracker_id
+        self.snapshot = snapshot
+        self.ids = None
+
+    @classmethod
+    def from_detections(
+        cls, detections, location, tracker_prefix, scale=1.0, snapshot_ref=None
+    ):
+        """Build a batch from tracked `sv.Detections`.
+
+        Args:
+            detections (sv.Detections): Tracked detections of the frame.
+            location (str): Camera/location of the capture.
+            tracker_prefix (str): Prefix of the stored tracker IDs.
+            scale (float, optional): Detection pixels to source pixels. Defaults to 1.0.
+            snapshot_ref (callable, optional): Raw tracker ID to snapshot reference.
+        """
+        bbox = detections.xyxy * scale if scale != 1.0 else detections.xyxy
+        raw_ids = detections.tracker_id
+        tracker_id = np.char.add(tracker_prefix, raw_ids.astype(np.str_))
+        snapshot = (
+            [snapshot_ref(i) for i in raw_ids.tolist()]
+            if snapshot_ref is not None
+            else [None] * len(raw_ids)
+        )
+        return cls(
+            location,
+            detections.confidence.astype(np.float32),
+            bbox.astype(np.int32),
+            tracker_id,
+            snapshot,
+        )
+
+    def __len__(self):
+        return len(self.tracker_id)
+
+    def insert(self, captured_at=None, trace_id=None):
+        """Write the batch to `people` and keep the inserted IDs as an array.
+
+        Args:
+            captured_at (float, optional): Capture time (epoch seconds) of the frame.
+            trace_id (str, optional): ID shared by the records of the capture.
+        """
+        ids = set_people_columns(
+            self.location,
+            self.conf.tolist(),
+            self.bbox.tolist(),
+            self.tracker_id.tolist(),
+            self.snapshot,
+            captured_at=captured_at,
+            trace_id=trace_id,
+        )
+        if ids == SynapsisResponse.SERVER_ERROR:
+            return ids
+        self.ids = np.empty(len(ids), dtype=object)
+        self.ids[:] = ids
+        return SynapsisResponse.SUCCESS
+
+    def split(self, mask):
+        """People IDs and tracker IDs inside and outside `mask`.
+
+        Returns:
+            tuple: (in_ids, out_ids, in_tracker_ids, out_tracker_ids) as lists.
+        """
+        return (
+            self.ids[mask].tolist(),
+            self.ids[~mask].tolist(),
+            self.tracker_id[mask].tolist(),
+            self.tracker_id[~mask].tolist(),
+        )
@@ -0,0 +1,110 @@
+# Built-in imports
+import time
+import uuid
+import threading
+
+# Third-party imports
+import cv2
+from loguru import logger
+
+# Local imports
+from synapsis_common.utility import (
+    SynapsisResponse,
+    upload_bytes_to_minio,
+    set_people_snapshots,
+    get_timestamp_for_filename,
+)
+
+
+class SnapshotPacker:
+    """Concatenate JPEG crops into one MinIO object per time window.
+
+    Crops are appended to an in-memory pack; when the pack is `window` seconds
+    old or reaches `max_bytes` it is written with a single PUT, and every people
+    record of the packed tracks gets {"object", "offset", "length"} so a crop can
+    be read back with an HTTP range request.
+
+    Args:
+        object_prefix (str): Pack object prefix, '<bucket>/<path>/'.
+        window (float, optional): Seconds a pack stays open. Defaults to 60.
+        max_bytes (int, optional): Pack size that forces a flush. Defaults to 8 MiB.
+        on_packed (callable, optional): Called with the {tracker_id: ref} of a
+            written pack.
+        on_uploaded (callable, optional): Called with the frame capture times
+            (epoch seconds) of the crops of a written pack.
+    """
+
+    def __init__(
+        self,
+        object_prefix,
+        window=60.0,
+        max_bytes=8 * 1024 * 1024,
+        on_packed=None,
+        on_uploaded=None,
+    ):
+        self.object_prefix = object_prefix
+        self.window = window
+        self.max_bytes = max_bytes
+        self.on_packed = on_packed
+        self.on_uploaded = on_uploaded
+        self._lock = threading.Lock()
+        self._parts = []
+        self._size = 0
+        self._opened_at = None
+        self.puts = 0
+
+    def add(self, tracker_id, crop, captured_at=None):
+        """JPEG-encode a BGR crop and append it to the open pack."""
+        ok, encoded = cv2.imencode(".jpg", crop)
+        if not ok:
+            logger.error(f"Could not encode snapshot of track {tracker_id}")
+            return
+        with self._lock:
+            if self._opened_at is None:
+                self._opened_at = time.time()
+            self._parts.append((tracker_id, encoded.tobytes(), captured_at))
+            self._size += encoded.nbytes
+            full = self._size >= self.max_bytes
+        if full:
+            self.flush(force=True)
+
+    def due(self, now=None):
+        """Whether the open pack has reached its window."""
+        opened_at = self._opened_at
+        now = time.time() if now is None else now
+        return opened_at is not None and now - opened_at >= self.window
+
+    def flush(self, force=False):
+        """Write the open pack if it is due (or `force`) and index its crops."""
+        with self._lock:
+            if not self._parts or not (force or self.due()):
+                return
+            parts = self._parts
+            self._parts, self._size, self._opened_at = [], 0, None
+
+        pack_name = f"{get_timestamp_for_filename()}_{uuid.uuid4().hex[:8]}.pack"
+        object_name = f"{self.object_prefix}{pack_name}"
+        refs, offset = {}, 0
+        for tracker_id, data, _ in parts:
+            # A track packed twice in one window keeps its latest (best) crop
+            refs[tracker_id] = {
+                "object": object_name,
+                "offset": offset,
+                "length": len(data),
+            }
+            offset += len(data)
+
+        body = b"".join(data for _, data, _ in parts)
+        if upload_bytes_to_minio(object_name, body) == SynapsisResponse.SERVER_ERROR:
+            logger.error(f"Snapshot pack upload failed, {len(parts)} crops dropped")
+            return
+        self.puts += 1
+        logger.debug(
+            f"Snapshot pack written: {object_name} ({len(parts)} crops, {len(body)} bytes)"
+        )
+
+        if self.on_uploaded is not None:
+            self.on_uploaded([t for _, _, t in parts if t is not None])
+        set_people_snapshots(refs)
+        if self.on_packed is not None:
+            self.on_packed(refs)
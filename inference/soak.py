@@ -0,0 +1,101 @@
+# Built-in imports
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+from memory import rss_bytes, growth_per_hour
+
+
+def soak_camera(location, source, stop_event):
+    from inference import run_camera
+
+    run_camera(location, source, stop_event=stop_event, display=False)
+
+
+if __name__ == "__main__":
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    parser = argparse.ArgumentParser(
+        description="Replay a video through the camera loop and check memory stays flat."
+    )
+    parser.add_argument("video", help="Video file, replayed endlessly in real time")
+    parser.add_argument("--location", default="kepatihan", help="Areas to count on")
+    parser.add_argument("--duration", type=float, default=4 * 3600)
+    parser.add_argument("--warmup", type=float, default=900, help="Seconds not judged")
+    parser.add_argument("--interval", type=float, default=10)
+    parser.add_argument("--max-growth-mb-per-hour", type=float, default=5.0)
+    parser.add_argument("--max-growth-mb", type=float, default=50.0)
+    parser.add_argument("--output", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    # Inherited by the spawned camera process
+    os.environ.update(
+        {"INGEST_BACKEND": "ffmpeg", "INGEST_LOOP": "True", "LOG_LEVEL": "WARNING"}
+    )
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    process = context.Process(
+        target=soak_camera,
+        args=(args.location, os.path.abspath(args.video), stop_event),
+        daemon=True,
+    )
+    process.start()
+
+    start = time.time()
+    samples = []
+    while time.time() - start < args.duration and process.is_alive():
+        samples.append((time.time(), rss_bytes(process.pid)))
+        if len(samples) % max(1, int(600 / args.interval)) == 0:
+            logger.info(
+                f"{(time.time() - start) / 60:.0f} min: "
+                f"RSS {samples[-1][1] / 2**20:.0f} MB"
+            )
+        time.sleep(args.interval)
+    crashed = not process.is_alive()
+    stop_event.set()
+    process.join(timeout=30)
+    if process.is_alive():
+        process.kill()
+
+    judged = [(t, rss) for t, rss in samples if t - start >= args.warmup]
+    head = max(1, len(judged) // 10)
+    growth = (
+        float(np.median([r for _, r in judged[-head:]]))
+        - float(np.median([r for _, r in judged[:head]]))
+        if judged
+        else 0.0
+    )
+    result = {
+        "video": args.video,
+        "seconds": round(time.time() - start),
+        "crashed": crashed,
+        "rss_start_mb": samples[0][1] / 2**20 if samples else None,
+        "rss_end_mb": samples[-1][1] / 2**20 if samples else None,
+        "growth_mb": growth / 2**20,
+        "growth_mb_per_hour": growth_per_hour(judged) / 2**20,
+        "samples": len(samples),
+    }
+    result["flat"] = (
+        not crashed
+        and len(judged) >= 3
+        and result["growth_mb_per_hour"] <= args.max_growth_mb_per_hour
+        and result["growth_mb"] <= args.max_growth_mb
+    )
+    logger.info(
+        f"RSS {result['rss_start_mb']:.0f} -> {result['rss_end_mb']:.0f} MB, "
+        f"after warm-up {result['growth_mb']:+.1f} MB "
+        f"({result['growth_mb_per_hour']:+.2f} MB/h): "
+        f"{'flat' if result['flat'] else 'NOT flat'}"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    sys.exit(0 if result["flat"] else 1)
@@ -0,0 +1,151 @@
+# Built-in imports
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party imports
+import numpy as np
+from loguru import logger
+
+# Local imports
+from synapsis_common.utility import (
+    SynapsisResponse,
+    encode_trajectory,
+    set_trajectories,
+)
+
+
+class TrajectoryRecorder:
+    """Record downsampled track paths and store them as compact segments.
+
+    A track's anchor point (bottom-centre of the box, in source pixels) is kept
+    when it moved at least `min_distance` pixels or `max_interval` seconds
+    passed since the last kept point. A segment is closed after
+    `segment_seconds` or `max_points` points, or when the track ends, and is
+    written delta-encoded (see `encode_trajectory`) from a background thread.
+
+    Args:
+        location (str): Camera/location name.
+        tracker_prefix (str): Prefix of the stored tracker IDs, e.g. '<run epoch>_'.
+        min_distance (float, optional): Pixels moved before a new point. Defaults to 8.
+        max_interval (float, optional): Seconds between points of a still track. Defaults to 1.
+        segment_seconds (float, optional): Longest segment. Defaults to 120.
+        max_points (int, optional): Points per segment. Defaults to 256.
+        track_timeout (float, optional): Seconds unseen before a track ends. Defaults to 5.
+        max_tracks (int, optional): Open tracks kept; the stalest is closed first. Defaults to 512.
+    """
+
+    def __init__(
+        self,
+        location,
+        tracker_prefix,
+        min_distance=8.0,
+        max_interval=1.0,
+        segment_seconds=120.0,
+        max_points=256,
+        track_timeout=5.0,
+        max_tracks=512,
+    ):
+        self.location = location
+        self.tracker_prefix = tracker_prefix
+        self.min_distance = min_distance
+        self.max_interval = max_interval
+        self.segment_seconds = segment_seconds
+        self.max_points = max_points
+        self.track_timeout = track_timeout
+        self.max_tracks = max_tracks
+        self.tracks = {}
+        self.closed = []
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="trajectory"
+        )
+        self.segments_written = 0
+
+    def update(self, detections, now=None, scale=1.0, area_masks=None):
+        """Add the anchor points of an analysed frame's tracked detections.
+
+        Args:
+            detections (sv.Detections): Tracked detections.
+            now (float, optional): Frame time (epoch seconds). Defaults to now.
+            scale (float, optional): Detection pixels to source pixels. Defaults to 1.
+            area_masks (dict, optional): Area ID -> boolean mask of detections inside.
+        """
+        now = time.time() if now is None else now
+        if detections.tracker_id is None or len(detections) == 0:
+            return
+        now_ms = int(now * 1000)
+        xyxy = detections.xyxy * scale
+        anchors = np.stack(
+            [(xyxy[:, 0] + xyxy[:, 2]) * 0.5, xyxy[:, 3]], axis=1
+        ).astype(np.int64)
+        inside = [
+            (area_id, mask)
+            for area_id, mask in (area_masks or {}).items()
+            if mask.any()
+        ]
+        for i, tracker_id in enumerate(detections.tracker_id.tolist()):
+            track = self.tracks.get(tracker_id)
+            if track is not None and (
+                now_ms - track["times"][0] >= self.segment_seconds * 1000
+                or now_ms - track["times"][-1] > np.iinfo(np.uint16).max
+            ):
+                self._close(tracker_id)
+                track = None
+            if track is None:
+                track = {"times": [], "points": [], "areas": set()}
+                self.tracks[tracker_id] = track
+            track["last_seen"] = now
+            for area_id, mask in inside:
+                if mask[i]:
+                    track["areas"].add(area_id)
+            x, y = anchors[i]
+            if track["points"]:
+                px, py = track["points"][-1]
+                moved = (x - px) ** 2 + (y - py) ** 2 >= self.min_distance**2
+                waited = now_ms - track["times"][-1] >= self.max_interval * 1000
+                if not moved and not waited:
+                    continue
+            track["times"].append(now_ms)
+            track["points"].append((int(x), int(y)))
+            if len(track["points"]) >= self.max_points:
+                self._close(tracker_id)
+
+        if len(self.tracks) > self.max_tracks:
+            stalest = sorted(self.tracks, key=lambda t: self.tracks[t]["last_seen"])
+            for tracker_id in stalest[: len(self.tracks) - self.max_tracks]:
+                self._close(tracker_id)
+
+    def _close(self, tracker_id):
+        track = self.tracks.pop(tracker_id)
+        if not track["points"]:
+            return
+        self.closed.append(
+            {
+                "location": self.location,
+                "tracker_id": f"{self.tracker_prefix}{tracker_id}",
+                "area_ids": sorted(track["areas"]),
+                **encode_trajectory(track["times"], track["points"]),
+            }
+        )
+
+    def flush(self, now=None, force=False):
+        """Close ended tracks and write closed segments; `force` closes every track."""
+        now = time.time() if now is None else now
+        for tracker_id in list(self.tracks):
+            if (
+                force
+                or now - self.tracks[tracker_id]["last_seen"] >= self.track_timeout
+            ):
+                self._close(tracker_id)
+        if self.closed:
+            segments, self.closed = self.closed, []
+            self.executor.submit(self._write, segments)
+
+    def _write(self, segments):
+        if set_trajectories(segments) == SynapsisResponse.SERVER_ERROR:
+            logger.error(f"Error writing {len(segments)} trajectory segments")
+        else:
+            self.segments_written += len(segments)
+
+    def close(self):
+        self.flush(force=True)
+        self.executor.shutdown(wait=True)
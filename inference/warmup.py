@@ -0,0 +1,152 @@
+# Built-in imports
+import time
+
+# Third-party imports
+import torch
+import numpy as np
+from loguru import logger
+
+# Local imports
+
+
+def allocate_warmup_frames(batch, frame_shape):
+    """Allocate a reusable batch of synthetic BGR frames.
+
+    The frames are plain uint8 arrays like the decoded ones, so warm-up goes
+    through the same letterbox/normalise/host-to-device path as live frames.
+
+    Args:
+        batch (int): Number of frames per model call.
+        frame_shape (tuple): Source frame size as (height, width).
+    Returns:
+        np.ndarray: Array of shape (batch, height, width, 3) with dtype uint8.
+    """
+    height, width = frame_shape
+    shape = (batch, height, width, 3)
+    # Noise instead of zeros so the letterbox/normalise path touches real data
+    return np.random.default_rng(0).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def _percentile_ms(latencies, q):
+    return float(np.percentile(np.asarray(latencies) * 1000.0, q))
+
+
+def warmup_model(
+    model,
+    imgsz=640,
+    batch=1,
+    device=0,
+    frame_shape=(1080, 1920),
+    window=10,
+    tolerance=0.1,
+    max_iterations=200,
+    track=False,
+    conf=0.45,
+    tracker="bytetrack.yaml",
+):
+    """Run the detector on synthetic frames until its latency is steady.
+
+    The first call pays kernel selection, graph tracing and allocation costs.
+    Warm-up keeps calling the model in windows of `window` iterations and stops
+    once the p95 latency of two consecutive windows differs by at most
+    `tolerance` (relative), or after `max_iterations` calls.
+
+    With `track`, warm-up goes through `model.track(persist=True)` like the
+    camera loop, so the tracker setup is paid here too; the tracker state the
+    synthetic frames leave behind is reset afterwards.
+
+    Args:
+        model (YOLO): The loaded Ultralytics model.
+        imgsz (int, optional): Model input size. Defaults to 640.
+        batch (int, optional): Frames per model call. Defaults to 1.
+        device (int | str, optional): Inference device. Defaults to 0.
+        frame_shape (tuple, optional): Source frame size as (height, width), so
+            the letterboxed tensor matches the live one. Defaults to (1080, 1920).
+        window (int, optional): Iterations per p95 window. Defaults to 10.
+        tolerance (float, optional): Relative p95 change considered stable. Defaults to 0.1.
+        max_iterations (int, optional): Upper bound on warm-up calls. Defaults to 200.
+        track (bool, optional): Warm `model.track` instead of `model.predict`.
+            Defaults to False.
+        conf (float, optional): Confidence threshold of the calls. Defaults to 0.45.
+        tracker (str, optional): Tracker config when `track` is set. Defaults
+            to "bytetrack.yaml".
+    Returns:
+        dict: cold_ms, warm_p50_ms, warm_p95_ms, iterations and stable flag.
+    """
+    frames = allocate_warmup_frames(batch, frame_shape)
+    # A single frame is passed as is, like the camera loop does
+    source = frames[0] if batch == 1 else list(frames)
+
+    def run_once():
+        st_ = time.perf_counter()
+        if track:
+            model.track(
+                source=source,
+                conf=conf,
+                classes=[0],
+                persist=True,
+                tracker=tracker,
+                imgsz=imgsz,
+                device=device,
+                verbose=False,
+            )
+        else:
+            model.predict(
+                source=source,
+                conf=conf,
+                classes=[0],
+                imgsz=imgsz,
+                device=device,
+                verbose=False,
+            )
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+        return time.perf_counter() - st_
+
+    cold = run_once()
+    logger.info(f"Warm-up cold call: {cold * 1000:.1f} ms")
+
+    latencies = []
+    previous_p95 = None
+    stable = False
+    while len(latencies) < max_iterations:
+        window_latencies = [run_once() for _ in range(window)]
+        latencies.extend(window_latencies)
+        current_p95 = _percentile_ms(window_latencies, 95)
+        logger.debug(
+            f"Warm-up window {len(latencies) // window}: p95={current_p95:.1f} ms"
+        )
+        if (
+            previous_p95 is not None
+            and abs(current_p95 - previous_p95) <= tolerance * previous_p95
+        ):
+            stable = True
+            break
+        previous_p95 = current_p95
+
+    if track:
+        # Live frames must not continue the synthetic frames' tracks
+        for model_tracker in getattr(model.predictor, "trackers", None) or []:
+            model_tracker.reset()
+
+    recent = latencies[-window:]
+    report = {
+        "cold_ms": cold * 1000.0,
+        "warm_p50_ms": _percentile_ms(recent, 50),
+        "warm_p95_ms": _percentile_ms(recent, 95),
+        "iterations": len(latencies) + 1,
+        "stable": stable,
+    }
+    if stable:
+        logger.info(
+            f"Warm-up done after {report['iterations']} calls: "
+            f"cold={report['cold_ms']:.1f} ms, "
+            f"warm p50={report['warm_p50_ms']:.1f} ms, "
+            f"warm p95={report['warm_p95_ms']:.1f} ms"
+        )
+    else:
+        logger.warning(
+            f"Warm-up p95 did not stabilise within {max_iterations} calls "
+            f"(last p95={report['warm_p95_ms']:.1f} ms), starting anyway"
+        )
+    return report
@@ -0,0 +1,362 @@
+# Built-in imports
+import os
+import time
+import uuid
+import socket
+import argparse
+import threading
+import multiprocessing
+
+# Third-party imports
+from loguru import logger
+
+# Local imports
+from synapsis_common.log import configure_logging, install_level_toggle
+from synapsis_common.clients import STORAGE_BACKEND
+from synapsis_common.utility import (
+    ensure_lease_indexes,
+    register_cameras,
+    get_cameras,
+    acquire_camera_lease,
+    renew_camera_lease,
+    release_camera_lease,
+    get_camera_leases,
+    heartbeat_worker,
+    get_live_workers,
+    remove_worker,
+    get_timestamp,
+)
+
+# Detections per frame that cost as much as decoding and inferring the frame itself
+DETECTION_COST = float(os.getenv("WORKER_DETECTION_COST", "10"))
+
+
+def camera_cost(load):
+    """Relative processing cost of a camera from its measured [fps, detections]."""
+    if not load:
+        return None
+    fps, detections = load
+    return fps * (1 + detections / DETECTION_COST)
+
+
+def camera_process(camera, source, stop_event, load, lease_deadline, parent_pid):
+    """Entry point of a camera's process.
+
+    A watchdog stops the camera once its lease deadline passes without renewal
+    or its worker is gone, so a hung or killed worker cannot leave a stream
+    processed twice after another worker takes the lease.
+    """
+    from inference import run_camera
+
+    def watchdog():
+        while not stop_event.is_set():
+            if os.getppid() != parent_pid or time.time() > lease_deadline.value:
+                logger.error(f"Lease of {camera} is no longer held, stopping")
+                stop_event.set()
+                # The loop stops at the next frame; do not wait for a stuck one
+                time.sleep(5)
+                os._exit(1)
+            time.sleep(0.5)
+
+    threading.Thread(target=watchdog, daemon=True).start()
+    run_camera(camera, source, stop_event=stop_event, load=load, display=False)
+
+
+class InferenceWorker:
+    """Claim cameras from the shared registry and run each in its own process.
+
+    Every `heartbeat_interval` the worker renews its leases, stopping any camera
+    whose lease was lost or whose stream ended, then rebalances:
+    free cameras go to the least loaded worker or to any worker still under the
+    fair share, and a worker over the fair share releases one camera for a less
+    loaded worker to claim. Load is the measured FPS and detections per camera.
+
+    Stopping a camera only signals its process. The process is joined, and its
+    lease released, on a later heartbeat once it has exited, so a slow shutdown
+    never holds up the renewal of the other cameras' leases.
+
+    Args:
+        worker_id (str, optional): Defaults to '<hostname>-<pid>-<random>'.
+        lease_ttl (float, optional): Lease duration in seconds. Defaults to 15.
+        heartbeat_interval (float, optional): Seconds between renewals. Defaults to 5.
+        max_cameras (int, optional): Cameras this worker runs at most. Defaults to no limit.
+        slack (float, optional): Tolerated load above the fair share. Defaults to 0.25.
+        release_cooldown (float, optional): Seconds before a released camera may be
+            claimed back by the same worker. Defaults to 30.
+        stop_timeout (float, optional): Seconds a stopping camera gets before it
+            is terminated. Defaults to 10.
+    """
+
+    def __init__(
+        self,
+        worker_id=None,
+        lease_ttl=15.0,
+        heartbeat_interval=5.0,
+        max_cameras=None,
+        slack=0.25,
+        release_cooldown=30.0,
+        stop_timeout=10.0,
+    ):
+        self.worker_id = (
+            worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        )
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.max_cameras = max_cameras
+        self.slack = slack
+        self.release_cooldown = release_cooldown
+        self.stop_timeout = stop_timeout
+        self.ctx = multiprocessing.get_context("spawn")
+        self.cameras = {}
+        # Cameras signalled to stop whose process has not been reaped yet
+        self.retiring = {}
+        self.released_at = {}
+        self.stopping = threading.Event()
+
+    # -------- camera processes --------
+
+    def _start(self, camera, source, expires_at):
+        load = self.ctx.Array("d", 2)
+        deadline = self.ctx.Value("d", self._deadline(expires_at))
+        stop_event = self.ctx.Event()
+        process = self.ctx.Process(
+            target=camera_process,
+            args=(camera, source, stop_event, load, deadline, os.getpid()),
+            name=f"camera-{camera}",
+            daemon=True,
+        )
+        process.start()
+        self.cameras[camera] = {
+            "process": process,
+            "stop_event": stop_event,
+            "load": load,
+            "deadline": deadline,
+        }
+        logger.info(f"{self.worker_id}: started {camera} (pid {process.pid})")
+
+    def _stop(self, camera, release=True):
+        """Signal a camera to stop; `_reap` joins it and releases its lease."""
+        entry = self.cameras.pop(camera)
+        entry["stop_event"].set()
+        self.retiring[camera] = {**entry, "release": release, "stop_at": time.time()}
+        self.released_at[camera] = time.time()
+        logger.info(f"{self.worker_id}: stopping {camera}")
+
+    def _reap(self, wait=False):
+        """Join stopped camera processes that have exited and release their leases.
+
+        A process still running `stop_timeout` seconds after its stop signal is
+        terminated. Without `wait` this never blocks; the lease of a camera that
+        does not exit is no longer renewed, so its watchdog stops it anyway.
+
+        Args:
+            wait (bool, optional): Block until every stopped process has exited.
+                Defaults to False.
+        """
+        for camera in list(self.retiring):
+            entry = self.retiring[camera]
+            process = entry["process"]
+            if wait:
+                process.join(
+                    timeout=max(0.0, entry["stop_at"] + self.stop_timeout - time.time())
+                )
+            if (
+                process.is_alive()
+                and time.time() - entry["stop_at"] >= self.stop_timeout
+            ):
+                logger.warning(f"{self.worker_id}: terminating {camera}")
+                process.terminate()
+                if wait:
+                    process.join(timeout=5)
+                    if process.is_alive():
+                        process.kill()
+            if wait:
+                process.join()
+            if process.is_alive():
+                continue
+            process.join()
+            del self.retiring[camera]
+            if entry["release"]:
+                release_camera_lease(camera, self.worker_id)
+            self.released_at[camera] = time.time()
+            logger.info(f"{self.worker_id}: stopped {camera}")
+
+    def _deadline(self, expires_at):
+        # A camera stops a little before its lease can be taken by someone else
+        return expires_at.timestamp() - min(2.0, self.lease_ttl / 4)
+
+    def _load(self, camera):
+        fps, detections = self.cameras[camera]["load"][:]
+        return [fps, detections] if fps > 0 else None
+
+    # -------- coordination --------
+
+    def heartbeat(self):
+        # Cameras whose stream ended give their lease back
+        for camera in [
+            c for c, e in self.cameras.items() if not e["process"].is_alive()
+        ]:
+            logger.warning(f"{self.worker_id}: {camera} exited")
+            self._stop(camera)
+
+        for camera in list(self.cameras):
+            expires_at = renew_camera_lease(
+                camera, self.worker_id, self.lease_ttl, self._load(camera)
+            )
+            if expires_at is None:
+                logger.warning(f"{self.worker_id}: lost the lease of {camera}")
+                self._stop(camera, release=False)
+            else:
+                self.cameras[camera]["deadline"].value = self._deadline(expires_at)
+        self._reap()
+
+        loads = [camera_cost(self._load(c)) or 0.0 for c in self.cameras]
+        heartbeat_worker(
+            self.worker_id, self.lease_ttl, sorted(self.cameras), sum(loads)
+        )
+        self.rebalance()
+
+    def rebalance(self):
+        cameras = get_cameras()
+        leases = get_camera_leases()
+        workers = list(get_live_workers())
+        if self.worker_id not in workers:
+            workers.append(self.worker_id)
+        now = get_timestamp()
+
+        for camera in [c for c in self.cameras if c not in cameras]:
+            logger.info(f"{self.worker_id}: {camera} was disabled")
+            self._stop(camera)
+
+        # Unmeasured cameras count as an average one
+        costs = {c: camera_cost(leases.get(c, {}).get("load")) for c in cameras}
+        measured = [v for v in costs.values() if v]
+        default_cost = sum(measured) / len(measured) if measured else 1.0
+        costs = {c: v or default_cost for c, v in costs.items()}
+        target = sum(costs.values()) / len(workers)
+        limit = target * (1 + self.slack)
+
+        worker_loads = dict.fromkeys(workers, 0.0)
+        free = []
+        for camera in cameras:
+            lease = leases.get(camera)
+            held = lease and lease.get("worker_id") and lease["expires_at"] > now
+            if held and lease["worker_id"] in worker_loads:
+                worker_loads[lease["worker_id"]] += costs[camera]
+            elif not held:
+                free.append(camera)
+
+        # Claim free cameras, most expensive first
+        for camera in sorted(free, key=costs.get, reverse=True):
+            if self.max_cameras is not None and len(self.cameras) >= self.max_cameras:
+                break
+            if camera in self.retiring:
+                continue
+            if time.time() - self.released_at.get(camera, 0) < self.release_cooldown:
+                continue
+            mine = worker_loads[self.worker_id]
+            least = min(worker_loads, key=lambda w: (worker_loads[w], w))
+            if least != self.worker_id and mine + costs[camera] > limit:
+                continue
+            lease = acquire_camera_lease(camera, self.worker_id, self.lease_ttl)
+            if lease is None:
+                continue
+            self._start(camera, cameras[camera], lease["expires_at"])
+            worker_loads[self.worker_id] += costs[camera]
+
+        # Shed one camera when over the fair share and another worker can take it
+        mine = worker_loads[self.worker_id]
+        others = [w for w in worker_loads if w != self.worker_id]
+        if mine > limit and len(self.cameras) > 1 and others:
+            least = min(worker_loads[w] for w in others)
+            movable = [
+                c for c in self.cameras if least + costs.get(c, default_cost) < mine
+            ]
+            if movable:
+                camera = min(
+                    movable,
+                    key=lambda c: abs(mine - costs.get(c, default_cost) - target),
+                )
+                logger.info(
+                    f"{self.worker_id}: releasing {camera} to rebalance "
+                    f"(load {mine:.1f}, fair share {target:.1f})"
+                )
+                self._stop(camera)
+
+    def run(self):
+        ensure_lease_indexes()
+        logger.info(f"Worker {self.worker_id} joined")
+        try:
+            while not self.stopping.is_set():
+                started = time.time()
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    logger.error(f"{self.worker_id}: heartbeat failed: {str(e)}")
+                self.stopping.wait(
+                    max(0.0, self.heartbeat_interval - (time.time() - started))
+                )
+        finally:
+            self.close()
+
+    def close(self):
+        for camera in list(self.cameras):
+            self._stop(camera)
+        self._reap(wait=True)
+        remove_worker(self.worker_id)
+        logger.info(f"Worker {self.worker_id} left")
+
+
+def _parse_cameras(values):
+    cameras = {}
+    for value in values or []:
+        name, _, source = value.partition("=")
+        if not source:
+            raise argparse.ArgumentTypeError(f"Expected NAME=SOURCE, got {value!r}")
+        cameras[name] = source
+    return cameras
+
+
+if __name__ == "__main__":
+    configure_logging()
+    install_level_toggle()
+    if STORAGE_BACKEND == "embedded":
+        # Leases only exist in MongoDB; a single box runs inference.py directly
+        logger.error("The worker needs MongoDB camera leases; unset STORAGE_BACKEND")
+        raise SystemExit(1)
+    parser = argparse.ArgumentParser(
+        description="Inference worker that claims cameras from the shared registry."
+    )
+    parser.add_argument(
+        "--camera",
+        action="append",
+        metavar="NAME=SOURCE",
+        help="Register (or re-point) a camera; repeatable. Sources may be local files.",
+    )
+    parser.add_argument(
+        "--register-defaults",
+        action="store_true",
+        help="Register the built-in camera list of inference.py",
+    )
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--lease-ttl", type=float, default=15.0)
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0)
+    parser.add_argument("--max-cameras", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.register_defaults:
+        from inference import SOURCES
+
+        register_cameras(SOURCES)
+    register_cameras(_parse_cameras(args.camera), overwrite=True)
+
+    worker = InferenceWorker(
+        worker_id=args.worker_id,
+        lease_ttl=args.lease_ttl,
+        heartbeat_interval=args.heartbeat_interval,
+        max_cameras=args.max_cameras,
+    )
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stopping.set()
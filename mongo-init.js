@@ -7,6 +7,15 @@ db.createCollection("areas");
 db.createCollection("counts");
 db.createCollection("people");
 
+// Time-series counts (metaField = {location, area_id}) + compact people references.
+// Retention defaults to 30 days; the services re-apply COUNTS_RETENTION_DAYS on start-up.
+db.createCollection("counts_ts", {
+    timeseries: { timeField: "timestamp", metaField: "meta", granularity: "seconds" },
+    expireAfterSeconds: 30 * 86400
+});
+db.createCollection("count_people");
+db.areas.createIndex({ location: 1, area_name: 1 }, { unique: true });
+
 db.areas.insertMany([
     {
         "location": "kepatihan",